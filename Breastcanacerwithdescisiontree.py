@@ -6,10 +6,17 @@ import joblib
 
 from sklearn.datasets import load_breast_cancer
 from sklearn.preprocessing import PowerTransformer
-from sklearn.model_selection import train_test_split, GridSearchCV
+from sklearn.model_selection import train_test_split
 from sklearn.tree import DecisionTreeClassifier, plot_tree
 from sklearn.metrics import accuracy_score, confusion_matrix, classification_report
 
+from hyperparameter_search import STRATEGIES, compare_strategies, search
+from training_cache import TrainingRun
+
+RUN_NAME = "breast_cancer_tree"
+MODEL_PATH = "breast_cancer_model.joblib"
+CODE = [__file__, "hyperparameter_search.py"]
+
 # ================= USER-FRIENDLY FEATURE NAMES AND RANGES =================
 # All 30 features of the breast cancer dataset with user-friendly names and ranges
 FEATURE_INFO = {
@@ -45,7 +52,7 @@ FEATURE_INFO = {
     "worst fractal dimension": {"label": "Worst Fractal Dimension", "range": "0.06 – 0.15", "unit": "coastline approximation"},
 }
 
-def load_data():
+def load_data(show_plots=True):
     # Load dataset
     data = load_breast_cancer()
 
@@ -53,19 +60,10 @@ def load_data():
     y = pd.Series(data.target, name="diagnosis")
 
     df = pd.concat([X, y], axis=1)
-    print(df.head())
-
-    print("\nSHAPE")
-    print(df.shape)
-
-    print("\nINFO")
-    print(df.info())
-
-    print("\nMISSING VALUES")
-    print(df.isnull().sum())
+    print(f"Loaded {df.shape[0]} rows x {df.shape[1]} columns, {int(df.isnull().sum().sum())} missing values")
 
     skewness = X.skew().sort_values(ascending=False)
-    print("skweness",skewness)
+    print(f"\nMost skewed features\n{skewness.head(5).to_string()}")
     pt = PowerTransformer(method="yeo-johnson")
     X_normalized = pt.fit_transform(X)
 
@@ -74,20 +72,23 @@ def load_data():
         columns=X.columns
     )
 
-    print("skwenes  after ",X_normalized.skew().sort_values(ascending=False))
+    skewness_after = X_normalized.skew().sort_values(ascending=False)
+    print(f"\nMost skewed after the transform\n{skewness_after.head(5).to_string()}")
     df_normalized = pd.concat([X_normalized, y], axis=1)
 
     corr = df_normalized.corr()["diagnosis"].sort_values(ascending=False)
 
-    print("\n===== FEATURE CORRELATION WITH TARGET =====")
-    print(corr)
+    print("\n===== STRONGEST FEATURE CORRELATIONS WITH TARGET =====")
+    print(corr.drop("diagnosis").sort_values(key=abs, ascending=False).head(10).to_string())
 
-    plt.figure(figsize=(8, 10))
-    sns.barplot(x=corr.values, y=corr.index)
-    plt.title("Feature Correlation with Target")
-    plt.show()
+    if show_plots:
+        plt.figure(figsize=(8, 10))
+        sns.barplot(x=corr.values, y=corr.index)
+        plt.title("Feature Correlation with Target")
+        plt.show()
 
-    return X_normalized, y
+    # The transformer is saved with the model, so it is fitted only here
+    return X_normalized, y, pt
 
 def split_data(X, y):
     return train_test_split(
@@ -98,7 +99,7 @@ def split_data(X, y):
         stratify=y
     )
 
-def train_decision_tree(X_train, y_train):
+def train_decision_tree(X_train, y_train, strategy="grid", compare=False):
     param_grid = {
         "max_depth": [3, 5, 7, 10, None],
         "min_samples_split": [2, 5, 10],
@@ -108,20 +109,19 @@ def train_decision_tree(X_train, y_train):
 
     dt = DecisionTreeClassifier(random_state=42)
 
-    grid = GridSearchCV(
-        dt,
-        param_grid,
-        cv=5,
-        scoring="accuracy",
-        n_jobs=-1
-    )
+    if compare:
+        # Report wall time and best score of each strategy, then train with `strategy`
+        compare_strategies(dt, param_grid, X_train, y_train, cv=5, scoring="accuracy")
 
-    grid.fit(X_train, y_train)
+    # "halving" drops most of the 90 combinations after training on a
+    # fraction of each fold (see hyperparameter_search.py)
+    result = search(dt, param_grid, X_train, y_train, cv=5, scoring="accuracy", strategy=strategy)
+    print("\n" + result.summary())
 
     print("\nBEST PARAMETERS")
-    print(grid.best_params_)
+    print(result.best_params)
 
-    return grid.best_estimator_
+    return result.best_estimator
 
 def evaluate_model(model, X_test, y_test):
     y_pred = model.predict(X_test)
@@ -145,7 +145,7 @@ def visualize_tree(model, feature_names):
     )
     plt.show()
 
-def save_model_components(model, transformer, feature_names, feature_info, output_path="breast_cancer_model.joblib"):
+def save_model_components(model, transformer, feature_names, feature_info, output_path=MODEL_PATH, run=None):
     """
     Save all model components to a single joblib file.
     
@@ -155,6 +155,7 @@ def save_model_components(model, transformer, feature_names, feature_info, outpu
         feature_names: List of original feature names
         feature_info: Dictionary with user-friendly feature information
         output_path: Path to save the joblib file
+        run: TrainingRun to store the components under (then published to output_path)
     """
     import os
     
@@ -173,7 +174,11 @@ def save_model_components(model, transformer, feature_names, feature_info, outpu
         "classes": ["Malignant", "Benign"]  # 0 = Malignant, 1 = Benign
     }
     
-    joblib.dump(components, output_path)
+    if run is None:
+        joblib.dump(components, output_path)
+    else:
+        run.save({"components": components})
+        run.publish({output_path: "components"})
     print(f"\n===== MODEL SAVED TO {output_path} =====")
     print(f"Feature importance saved:")
     for i, (feature, importance) in enumerate(list(feature_importance_sorted.items())[:10]):
@@ -182,31 +187,41 @@ def save_model_components(model, transformer, feature_names, feature_info, outpu
     
     return components
 
-def main():
-    X, y = load_data()
+def main(strategy="grid", compare=False, show_plots=True):
+    run = TrainingRun(RUN_NAME, code=CODE, params={"strategy": strategy})
+    if not compare and run.is_cached():
+        # Skips loading, plotting and the search altogether
+        print(f"Data, code and parameters unchanged, reusing {run.version}")
+        run.publish({MODEL_PATH: "components"})
+        return run
+
+    X, y, transformer = load_data(show_plots)
 
     X_train, X_test, y_train, y_test = split_data(X, y)
 
-    model = train_decision_tree(X_train, y_train)
+    model = train_decision_tree(X_train, y_train, strategy, compare)
 
     evaluate_model(model, X_test, y_test)
 
-    visualize_tree(model, X.columns)
-    
-    # Get the PowerTransformer from the load_data function
-    # Re-create it since we need to save it
-    data = load_breast_cancer()
-    X_original = pd.DataFrame(data.data, columns=data.feature_names)
-    transformer = PowerTransformer(method="yeo-johnson")
-    transformer.fit(X_original)
+    if show_plots:
+        visualize_tree(model, X.columns)
     
     # Save all components
     save_model_components(
         model=model,
         transformer=transformer,
-        feature_names=data.feature_names.tolist(),
-        feature_info=FEATURE_INFO
+        feature_names=X.columns.tolist(),
+        feature_info=FEATURE_INFO,
+        run=run
     )
+    return run
 
 if __name__ == "__main__":
-    main()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Train the breast cancer decision tree")
+    parser.add_argument("--strategy", choices=STRATEGIES, default="grid", help="hyperparameter search strategy")
+    parser.add_argument("--compare", action="store_true", help="also report wall time and best score of each strategy")
+    parser.add_argument("--no-plots", action="store_true", help="skip the correlation and tree plots")
+    args = parser.parse_args()
+    main(args.strategy, args.compare, show_plots=not args.no_plots)
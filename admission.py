@@ -0,0 +1,111 @@
+"""
+Admission control for the prediction routes of app.py.
+
+Each model gets an AdmissionGate: at most `max_concurrent` requests run its
+route at once, up to `max_queue` more wait for a slot (first come, first
+served), and anything beyond that is turned away immediately instead of
+piling up behind the slow ones:
+
+- queue full: 429, the client should back off
+- waited `max_wait` seconds without getting a slot: 503
+
+Both carry a Retry-After estimated from the queue length and the recent
+time a request holds a slot. Because every model has its own gate, a burst
+on the bitcoin forest fills only the bitcoin queue; banknote requests keep
+their own slots.
+
+Limits are given as "model=concurrency:queue" pairs:
+
+    ADMISSION_LIMITS="bitcoin=2:16,banknote=8:64"
+"""
+import math
+import threading
+import time
+
+# Weight of the newest sample in the moving average of slot hold times
+SERVICE_TIME_SMOOTHING = 0.1
+
+
+class Rejected(Exception):
+    """Raised by AdmissionGate.acquire; carries the HTTP status and Retry-After seconds."""
+
+    def __init__(self, status, reason, retry_after):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionGate:
+    def __init__(self, max_concurrent, max_queue, max_wait):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self.queued = 0
+        self.service_time = 0.0
+        self._cond = threading.Condition()
+
+    def retry_after(self):
+        """Whole seconds until the current queue should have drained (at least 1)."""
+        drain = (self.queued + 1) * self.service_time / self.max_concurrent
+        return max(1, math.ceil(drain))
+
+    def acquire(self):
+        """Take a slot, waiting in the queue if needed; returns the seconds waited or raises Rejected."""
+        start = time.perf_counter()
+        with self._cond:
+            # Arrivals do not overtake requests already waiting
+            if self.in_flight < self.max_concurrent and not self.queued:
+                self.in_flight += 1
+                return 0.0
+            if self.queued >= self.max_queue:
+                raise Rejected(429, "queue_full", self.retry_after())
+
+            self.queued += 1
+            try:
+                deadline = start + self.max_wait
+                while self.in_flight >= self.max_concurrent:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        raise Rejected(503, "queue_timeout", self.retry_after())
+                    self._cond.wait(remaining)
+            finally:
+                self.queued -= 1
+            self.in_flight += 1
+            if self.queued and self.in_flight < self.max_concurrent:
+                self._cond.notify()
+        return time.perf_counter() - start
+
+    def release(self, held_seconds):
+        with self._cond:
+            self.in_flight -= 1
+            self.service_time += SERVICE_TIME_SMOOTHING * (held_seconds - self.service_time)
+            self._cond.notify()
+
+    def stats(self):
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "max_wait_seconds": self.max_wait,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "service_time_seconds": round(self.service_time, 6),
+        }
+
+
+def parse_limits(spec):
+    """Parse "bitcoin=2:16,banknote=8:64" into {"bitcoin": (2, 16), "banknote": (8, 64)}."""
+    limits = {}
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        try:
+            name, values = part.split("=")
+            concurrency, queue_size = (int(value) for value in values.split(":"))
+        except ValueError:
+            raise ValueError(f"Bad admission limit {part!r}, expected model=concurrency:queue") from None
+        if concurrency < 1 or queue_size < 0:
+            raise ValueError(f"Bad admission limit {part!r}: concurrency must be >= 1 and queue >= 0")
+        limits[name.strip()] = (concurrency, queue_size)
+    return limits
@@ -1,30 +1,777 @@
-from flask import Flask, jsonify, request
+from datetime import datetime, timezone
+from flask import Flask, Response, g, has_request_context, jsonify, request, stream_with_context
 from flask_cors import CORS
-import joblib
+import atexit
+import json
 import numpy as np
-import pandas as pd
+import os
+import queue
+import time
+
+from admission import AdmissionGate, Rejected, parse_limits
+from bar_store import horizons_for
+from binary_io import is_binary, read_matrix, response_format, write_table
+from metrics import Metrics, mark
+from micro_batcher import MicroBatcher
+from model_loaders import (
+    BANKNOTE_FEATURES, DIABETES_FEATURES, SHARED_MODELS, export_shared_models, load_banknote_model,
+    load_bitcoin_model, load_breast_cancer_model, load_diabetes_model, serving_model,
+)
+from model_registry import ModelRegistry
+from prediction_cache import PredictionCache, row_keys
+from prediction_log import PredictionLogger
+from price_stream import PriceStreams, parse_timestamp
+from schemas import SchemaError, schema_for
+from shadow import ShadowScorer
 
 app = Flask(__name__)
-CORS(app)
+# Browsers may read the version of the model that served a response
+CORS(app, expose_headers=["X-Model-Version"])
+
+# ================================
+# Model Loading Settings
+# ================================
+# MODEL_LOADING: "parallel" (default) loads every model at startup on a thread
+# pool, "eager" loads them one by one, "lazy" loads each on first use.
+MODEL_LOADING = os.environ.get("MODEL_LOADING", "parallel")
+
+# How each artifact is loaded (compiled kernels, shared memory, compact
+# bitcoin forest) is configured in model_loaders.py
+
+
+# ================================
+# Warm-up
+# ================================
+# A reloaded model answers a few dummy batches before it is swapped in, so
+# the first requests it serves do not pay for first-call setup
+WARMUP_BATCH_SIZES = (1, 64)
+
+
+def warmup_batches(n_features):
+    return [np.zeros((n_rows, n_features)) for n_rows in WARMUP_BATCH_SIZES]
+
+
+def warm_diabetes(model):
+    for features in warmup_batches(len(DIABETES_FEATURES)):
+        model.predict(features)
+
+
+def warm_banknote(banknote):
+    for features in warmup_batches(len(BANKNOTE_FEATURES)):
+        features[:, 2:4] = banknote["transformer"].transform(features[:, 2:4])
+        banknote["model"].predict(features)
+        banknote["model"].predict_proba(features)
+
+
+def warm_breast_cancer(breast_cancer):
+    for features in warmup_batches(len(breast_cancer["feature_names"])):
+        features = breast_cancer["transformer"].transform(features)
+        breast_cancer["explainer"].explain(features, transformed=True)
+        breast_cancer["model"].predict(features)
+        breast_cancer["model"].predict_proba(features)
+
+
+def warm_bitcoin(model):
+    for features in warmup_batches(6):
+        model.predict(features)
+
+
+registry = ModelRegistry(MODEL_LOADING)
+registry.register("diabetes", load_diabetes_model, ["best_diabetes_model.joblib"], warm_diabetes)
+registry.register("banknote", load_banknote_model, ["bank_note_authentication_model.joblib", "power_transformer.joblib"],
+                  warm_banknote)
+registry.register("breastcancer", load_breast_cancer_model, ["breast_cancer_model.joblib"], warm_breast_cancer)
+registry.register("bitcoin", load_bitcoin_model, ["bitcoin_model.joblib"], warm_bitcoin)
+
+# ================================
+# Shadow Models
+# ================================
+# BANKNOTE_SHADOW_MODELS="banknote_decision_tree" has these candidates score
+# every banknote prediction again, on SHADOW_WORKERS background threads and
+# off the response path (see shadow.py). Candidates are the per-run artifacts
+# the banknote training scripts publish to CANDIDATES_DIR; they are registered
+# like the served models, so they are versioned and hot-reloaded too. Jobs
+# beyond SHADOW_QUEUE_SIZE pending batches are dropped rather than queued.
+# Cache hits are not scored again: each distinct row is compared once per version.
+BANKNOTE_SHADOW_MODELS = [name.strip() for name in os.environ.get("BANKNOTE_SHADOW_MODELS", "").split(",") if name.strip()]
+CANDIDATES_DIR = os.environ.get("CANDIDATES_DIR", "candidates")
+SHADOW_WORKERS = int(os.environ.get("SHADOW_WORKERS", "1"))
+SHADOW_QUEUE_SIZE = int(os.environ.get("SHADOW_QUEUE_SIZE", "1000"))
+
+
+def banknote_candidate_sources(name):
+    return [os.path.join(CANDIDATES_DIR, f"{name}_model.joblib"),
+            os.path.join(CANDIDATES_DIR, f"{name}_transformer.joblib")]
+
+
+def banknote_candidate_loader(name):
+    model_path, transformer_path = banknote_candidate_sources(name)
+
+    def load():
+        return {
+            "model": serving_model(name, model_path),
+            "transformer": serving_model(f"{name}_transformer", transformer_path),
+        }
+    return load
+
+
+def score_banknote(banknote, features):
+    features = features.copy()
+    features[:, 2:4] = banknote["transformer"].transform(features[:, 2:4])
+    return banknote["model"].predict(features), banknote["model"].predict_proba(features)
+
+
+def score_banknote_candidate(name, features):
+    # Pinned so the version reported is the one that scored
+    registry.pin()
+    try:
+        banknote = registry.get(name)
+        return (registry.version(name), *score_banknote(banknote, features))
+    finally:
+        registry.unpin()
+
+
+for name in BANKNOTE_SHADOW_MODELS:
+    if name in registry.loaders:
+        raise ValueError(f"BANKNOTE_SHADOW_MODELS: {name!r} is already a served model")
+    registry.register(name, banknote_candidate_loader(name), banknote_candidate_sources(name), warm_banknote)
+
+shadow_scorers = {
+    "banknote": ShadowScorer(score_banknote_candidate, BANKNOTE_SHADOW_MODELS, SHADOW_WORKERS, SHADOW_QUEUE_SIZE,
+                             name="banknote-shadow"),
+} if BANKNOTE_SHADOW_MODELS else {}
+
+# ================================
+# Load Models (at startup unless lazy)
+# ================================
+if SHARED_MODELS:
+    export_shared_models()
+registry.start()
+
+# ================================
+# Hot Reload
+# ================================
+# Every MODEL_RELOAD_INTERVAL seconds the registry checks the artifacts of the
+# loaded models, and loads, warms up and swaps in any that changed (see
+# model_registry.py); 0 turns the watcher off. POST /api/models/reload does
+# the same on demand. Requests in flight finish on the version they started with.
+MODEL_RELOAD_INTERVAL = float(os.environ.get("MODEL_RELOAD_INTERVAL", "5"))
+
+
+def prepare_reload(names):
+    # Shared workers map exported kernels, so export the new artifacts first
+    if SHARED_MODELS:
+        export_shared_models()
+
+
+if MODEL_RELOAD_INTERVAL > 0:
+    registry.watch(MODEL_RELOAD_INTERVAL, prepare_reload)
+
+# Input fields expected by each model (DIABETES_FEATURES and BANKNOTE_FEATURES
+# come from model_loaders.py, in the order the models were trained on)
+BITCOIN_FEATURES = ["price"]
+# Columns of the matrix the bitcoin model predicts from (see bitcoin_feature_matrix)
+BITCOIN_MODEL_FEATURES = ["lag1", "lag2", "price", "hour", "minute", "dayofweek"]
+
+# Upper bound on rows accepted by a single predict_batch call
+MAX_BATCH_SIZE = 50000
+# Same for .npy / Arrow bodies, which skip JSON decoding and the cache
+MAX_BINARY_BATCH_SIZE = 1000000
+
+# Validation and float conversion of request payloads (see schemas.py). The
+# breast cancer feature list comes with its model, see breast_cancer_schema().
+DIABETES_SCHEMA = schema_for(DIABETES_FEATURES, MAX_BATCH_SIZE)
+BANKNOTE_SCHEMA = schema_for(BANKNOTE_FEATURES, MAX_BATCH_SIZE)
+BITCOIN_SCHEMA = schema_for(BITCOIN_FEATURES, MAX_BATCH_SIZE)
+
+# Minute bars kept per symbol by the bitcoin price stream
+BITCOIN_HISTORY_SIZE = int(os.environ.get("BITCOIN_HISTORY_SIZE", "1440"))
+BITCOIN_DEFAULT_SYMBOL = "BTC-USD"
+
+price_streams = PriceStreams(BITCOIN_HISTORY_SIZE)
+
+
+# ================================
+# Vectorized Prediction Helpers
+# ================================
+def predict_diabetes_matrix(features):
+    prediction = registry.get("diabetes").predict(features)
+    mark("predict")
+    return prediction
+
+
+def predict_banknote_matrix(features):
+    start = time.perf_counter()
+    banknote = registry.get("banknote")
+    transformed = features.copy()
+
+    # Apply power transformer ONLY on curt & entr
+    transformed[:, 2:4] = banknote["transformer"].transform(transformed[:, 2:4])
+    mark("transform")
+
+    prediction = banknote["model"].predict(transformed)
+    probability = banknote["model"].predict_proba(transformed)
+    mark("predict")
+
+    scorer = shadow_scorers.get("banknote")
+    if scorer is not None:
+        scorer.submit(features, registry.version("banknote"), prediction, probability, time.perf_counter() - start)
+    return prediction, probability
+
+
+def transform_breast_cancer(features):
+    # Apply power transformer to normalize skewed features
+    features_normalized = registry.get("breastcancer")["transformer"].transform(features)
+    mark("transform")
+    return features_normalized
+
+
+def predict_breast_cancer_transformed(features_normalized):
+    """Predict rows already passed through transform_breast_cancer (shared with the explainer)."""
+    breast_cancer = registry.get("breastcancer")
+    prediction = breast_cancer["model"].predict(features_normalized)
+    probability = breast_cancer["model"].predict_proba(features_normalized)
+    mark("predict")
+    return prediction, probability
+
+
+def predict_breast_cancer_matrix(features):
+    return predict_breast_cancer_transformed(transform_breast_cancer(features))
+
+
+def bitcoin_feature_matrix(prices, now):
+    # Prepare features: [lag1, lag2, price, hour, minute, dayofweek]
+    # For prediction, we use current_price as both lag1 and lag2.
+    # `now` is UTC: the model is trained on UTC bar times (bar_store.bar_features)
+    features = np.empty((len(prices), 6))
+    features[:, 0] = prices  # lag1
+    features[:, 1] = prices  # lag2
+    features[:, 2] = prices  # price
+    features[:, 3] = now.hour
+    features[:, 4] = now.minute
+    features[:, 5] = now.weekday()
+    return features
+
+
+def predict_bitcoin_matrix(prices, now):
+    prediction = registry.get("bitcoin").predict(bitcoin_feature_matrix(prices, now))
+    mark("predict")
+    return prediction
+
+
+def breast_cancer_schema():
+    return schema_for(registry.get("breastcancer")["feature_names"], MAX_BATCH_SIZE)
+
+
+def breast_cancer_importance_list():
+    # Global top 10, formatted when the model is loaded
+    return registry.get("breastcancer")["importance_list"]
+
+
+def explain_requested(data, default):
+    # "explain" in the JSON body, else ?explain=1 / ?explain=0
+    value = data.get("explain") if isinstance(data, dict) else None
+    if value is None:
+        value = request.args.get("explain")
+    if value is None:
+        return default
+    return str(value).lower() in ("1", "true", "yes")
+
+
+def breast_cancer_contributions(features_normalized, predictions):
+    """
+    Leaves reached by the transformed rows `features_normalized`, each
+    feature's contribution to the probability of the row's predicted class
+    (n_rows, n_features), and that class's base probability.
+    """
+    explainer = registry.get("breastcancer")["explainer"]
+    leaves, contributions = explainer.explain(features_normalized, transformed=True)
+    class_index = np.searchsorted(explainer.kernel.classes_, predictions)
+    contributions = contributions[np.arange(len(features_normalized)), :, class_index]
+    mark("explain")
+    return leaves, contributions, explainer.base_value[class_index]
+
+
+def breast_cancer_explanations(features, features_normalized, predictions):
+    """
+    One explanation per row of `features` (`features_normalized` is the same
+    rows transformed): the predicted class's base probability, the
+    decision path (raw feature values against raw thresholds) and the
+    non-zero feature contributions, largest first. The base value plus the
+    contributions is the probability of the predicted class.
+    """
+    breast_cancer = registry.get("breastcancer")
+    explainer = breast_cancer["explainer"]
+    labels = breast_cancer["feature_labels"]
+    feature_names = explainer.feature_names
+
+    leaves, contributions, base_values = breast_cancer_contributions(features_normalized, predictions)
+    order = np.argsort(-np.abs(contributions), axis=1, kind="stable")
+    explanations = []
+    for r in range(len(features)):
+        decision_path = explainer.decision_path(leaves[r, 0], features[r])
+        for step in decision_path:
+            step["label"] = labels[step["feature"]]
+        explanations.append({
+            "base_value": float(base_values[r]),
+            "decision_path": decision_path,
+            "leaf": int(leaves[r, 0]),
+            "contributions": [
+                {"feature": feature_names[j], "label": labels[feature_names[j]],
+                 "contribution": float(contributions[r, j])}
+                for j in order[r].tolist() if contributions[r, j] != 0
+            ],
+        })
+    return explanations
+
+
+def requested_horizons(data=None):
+    """
+    Forecast horizons (minutes) asked for as "horizons" in the JSON body or
+    as ?horizons=1,5,15 in the query string; None means every horizon.
+    """
+    value = data.get("horizons") if isinstance(data, dict) else None
+    if value is None:
+        value = request.args.get("horizons")
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = [part.strip() for part in value.split(",")]
+    elif not isinstance(value, list):
+        value = [value]
+
+    horizons = []
+    for h in value:
+        if isinstance(h, str) and h.isdigit():
+            h = int(h)
+        if isinstance(h, bool) or not isinstance(h, int) or h <= 0:
+            raise SchemaError([{"field": "horizons", "error": f"Expected positive whole minutes, got {h!r}"}])
+        horizons.append(h)
+    if not horizons:
+        raise SchemaError([{"field": "horizons", "error": "Expected at least one horizon"}])
+    return list(dict.fromkeys(horizons))
+
+
+def bitcoin_forecast(prediction, horizons=None):
+    """
+    Split bitcoin predictions into (horizons, prices of shape (n_rows, n_horizons)).
+    `prediction` is one value per row (the single 2-minute model) or one
+    column per minute ahead; `horizons` picks a subset of those columns.
+    """
+    prediction = np.asarray(prediction, dtype=np.float64)
+    prediction = prediction.reshape(len(prediction), -1)
+    available = horizons_for(prediction.shape[1])
+    if horizons is None:
+        return list(available), prediction
+
+    missing = [h for h in horizons if h not in available]
+    if missing:
+        raise SchemaError([{
+            "field": "horizons",
+            "error": f"Not predicted by the current model: {missing} (available: {list(available)})"
+        }])
+    return horizons, prediction[:, [available.index(h) for h in horizons]]
+
+
+def headline_horizon(horizons):
+    # The 2-minute forecast stays the top-level prediction when it was asked for
+    return horizons.index(2) if 2 in horizons else 0
+
+
+def price_change_fields(current_price, prediction):
+    # Calculate price change
+    price_change = prediction - current_price
+    price_change_percent = (price_change / current_price) * 100
+
+    return {
+        "predicted_price": round(prediction, 2),
+        "price_change": round(price_change, 2),
+        "price_change_percent": round(price_change_percent, 2),
+    }
+
+
+def bitcoin_response(current_price, prediction, horizons=None):
+    # `prediction` is one cached row: a price, or the model's whole horizon curve
+    horizons, prices = bitcoin_forecast([prediction], horizons)
+    prices = prices[0].tolist()
+    forecast = [
+        {"horizon_minutes": h, **price_change_fields(current_price, price)}
+        for h, price in zip(horizons, prices)
+    ]
+    headline = headline_horizon(horizons)
+
+    return {
+        "current_price": current_price,
+        **price_change_fields(current_price, prices[headline]),
+        "prediction_timeframe": f"{horizons[headline]} minute{'s' if horizons[headline] != 1 else ''} ahead",
+        "forecast": forecast
+    }
+
+
+# ================================
+# Prediction Log
+# ================================
+# PREDICTION_LOG=1 keeps an audit trail of every prediction served: inputs and
+# results are queued in memory and written in batches by a background thread
+# to rotating Parquet (or Arrow IPC) files under PREDICTION_LOG_DIR, see
+# prediction_log.py. When PREDICTION_LOG_QUEUE_ROWS rows are waiting,
+# PREDICTION_LOG_FULL_POLICY decides: drop_newest (default, requests never
+# wait), drop_oldest, or block for up to PREDICTION_LOG_BLOCK_MS.
+PREDICTION_LOG = os.environ.get("PREDICTION_LOG") == "1"
+PREDICTION_LOG_DIR = os.environ.get("PREDICTION_LOG_DIR", "prediction_logs")
+
+prediction_log = PredictionLogger(
+    PREDICTION_LOG_DIR,
+    fmt=os.environ.get("PREDICTION_LOG_FORMAT", "parquet"),
+    max_queue_rows=int(os.environ.get("PREDICTION_LOG_QUEUE_ROWS", "100000")),
+    flush_rows=int(os.environ.get("PREDICTION_LOG_FLUSH_ROWS", "5000")),
+    flush_interval=float(os.environ.get("PREDICTION_LOG_FLUSH_MS", "1000")) / 1000,
+    rotate_rows=int(os.environ.get("PREDICTION_LOG_ROTATE_ROWS", "1000000")),
+    rotate_seconds=float(os.environ.get("PREDICTION_LOG_ROTATE_SECONDS", "3600")),
+    full_policy=os.environ.get("PREDICTION_LOG_FULL_POLICY", "drop_newest"),
+    block_timeout=float(os.environ.get("PREDICTION_LOG_BLOCK_MS", "50")) / 1000,
+) if PREDICTION_LOG else None
+
+if prediction_log is not None:
+    # Write out what is still queued when the server stops
+    atexit.register(prediction_log.close, 10)
+
+
+def model_feature_names(name):
+    if name == "breastcancer":
+        return registry.get("breastcancer")["feature_names"]
+    return {"diabetes": DIABETES_FEATURES, "banknote": BANKNOTE_FEATURES, "bitcoin": BITCOIN_MODEL_FEATURES}[name]
+
+
+def log_predictions(name, features, outputs, feature_names=None):
+    # Only queues the arrays; converting and writing them happens on the writer thread
+    if prediction_log is None:
+        return
+    endpoint = request.url_rule.rule if has_request_context() and request.url_rule else ""
+    prediction_log.log(name, registry.version(name), features, feature_names or model_feature_names(name),
+                       outputs, endpoint)
+    mark("log")
+
+
+# ================================
+# Prediction Cache
+# ================================
+# One LRU/TTL cache per model; PREDICTION_CACHE_SIZE=0 turns caching off
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", "10000"))
+PREDICTION_CACHE_TTL = float(os.environ.get("PREDICTION_CACHE_TTL", "300"))
+
+prediction_caches = {
+    name: PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL)
+    for name in registry.loaders if name not in BANKNOTE_SHADOW_MODELS
+} if PREDICTION_CACHE_SIZE > 0 else {}
+
+
+def cached_predict(name, features, predict_rows, model_input=None):
+    """
+    Return one result per row of `features`, calling predict_rows only for
+    the rows missing from the cache. Keys are the full model input row, so
+    a bitcoin entry stops matching as soon as its time features change.
+    predict_rows gets the rows of `model_input` instead when given (the
+    same rows already transformed, e.g. for an explanation too).
+    """
+    if model_input is None:
+        model_input = features
+    cache = prediction_caches.get(name)
+    if cache is None:
+        results = predict_rows(model_input)
+        log_predictions(name, features, results)
+        return results
+
+    keys = row_keys(registry.version(name), features)
+    results = [cache.get(key) for key in keys]
+    missing = [i for i, result in enumerate(results) if result is None]
+    mark("cache_lookup")
+    if missing:
+        for i, result in zip(missing, predict_rows(model_input[missing])):
+            results[i] = result
+            cache.put(keys[i], result)
+        mark("cache_store")
+    log_predictions(name, features, results)
+    return results
+
+
+def diabetes_rows(features):
+    return predict_diabetes_matrix(features).tolist()
+
+
+def banknote_rows(features):
+    prediction, probability = predict_banknote_matrix(features)
+    return list(zip(prediction.tolist(), probability.tolist()))
+
+
+def breast_cancer_rows(features):
+    prediction, probability = predict_breast_cancer_matrix(features)
+    return list(zip(prediction.tolist(), probability.tolist()))
+
+
+def breast_cancer_transformed_rows(features_normalized):
+    prediction, probability = predict_breast_cancer_transformed(features_normalized)
+    return list(zip(prediction.tolist(), probability.tolist()))
+
+
+def bitcoin_rows(features):
+    # Multi-horizon models give each row its whole curve, cached as one entry
+    prediction = registry.get("bitcoin").predict(features)
+    mark("predict")
+    return prediction.tolist()
+
+
+ROW_PREDICTORS = {
+    "diabetes": diabetes_rows,
+    "banknote": banknote_rows,
+    "breastcancer": breast_cancer_rows,
+    "bitcoin": bitcoin_rows,
+}
+
+
+# ================================
+# Micro-Batching
+# ================================
+# MICRO_BATCHING=1 sends concurrent single-row predictions through one
+# MicroBatcher per model, which waits up to MICRO_BATCH_WAIT_MS (or until
+# MICRO_BATCH_MAX_SIZE rows) and runs them as one vectorized predict
+MICRO_BATCHING = os.environ.get("MICRO_BATCHING") == "1"
+MICRO_BATCH_WAIT_MS = float(os.environ.get("MICRO_BATCH_WAIT_MS", "2"))
+MICRO_BATCH_MAX_SIZE = int(os.environ.get("MICRO_BATCH_MAX_SIZE", "64"))
+
+micro_batchers = {
+    name: MicroBatcher(predict_rows, MICRO_BATCH_WAIT_MS, MICRO_BATCH_MAX_SIZE, name=name,
+                       bind=lambda entry, name=name: registry.pinned_to({name: entry}))
+    for name, predict_rows in ROW_PREDICTORS.items()
+} if MICRO_BATCHING else {}
+
+
+def single_row_predictor(name):
+    batcher = micro_batchers.get(name)
+    if batcher is None:
+        return ROW_PREDICTORS[name]
+
+    def predict_rows(features):
+        # Predicted with the version this request is pinned to, which the cache keys on
+        results = batcher.predict_rows(features, registry.entry(name))
+        mark("micro_batch")  # queue wait plus the shared predict, run on the batcher thread
+        return results
+    return predict_rows
+
+
+# ================================
+# Request Metrics
+# ================================
+# Per-endpoint and per-phase latency histograms plus request/error counters,
+# served at /metrics. PROFILE_SAMPLE_RATE > 0 profiles that fraction of
+# requests with cProfile and writes the stats to PROFILE_DIR.
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+
+metrics = Metrics(PROFILE_SAMPLE_RATE, PROFILE_DIR)
+
+
+def request_model():
+    # /api/<model>/..., or "" for routes that are not about one model
+    parts = request.path.split("/")
+    return parts[2] if len(parts) > 2 and parts[2] in registry.loaders else ""
+
+
+def request_labels():
+    # Route pattern rather than the raw path, so unknown URLs share one label
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    model = request_model()
+    return endpoint, model, registry.served_version(model)
+
+
+@app.before_request
+def start_request_metrics():
+    metrics.start_request()
+    # Each request sticks to the model versions it first uses, even if a reload swaps them
+    registry.pin()
+
+
+@app.after_request
+def finish_request_metrics(response):
+    endpoint, model, version = request_labels()
+    metrics.finish_request(endpoint, response.status_code, model, version)
+    if version:
+        response.headers["X-Model-Version"] = version
+    return response
+
+
+@app.teardown_request
+def finish_failed_request_metrics(exc):
+    # after_request is skipped when a route raises; this records it as a 500
+    # (and does nothing when after_request already finished the request)
+    endpoint, model, version = request_labels()
+    metrics.finish_request(endpoint, 500, model, version)
+    registry.unpin()
+
+
+# ================================
+# Admission Control
+# ================================
+# ADMISSION_CONTROL=1 gives each model ADMISSION_LIMITS concurrent requests
+# plus a bounded queue (see admission.py). Requests that find the queue full
+# get a 429, those still queued after ADMISSION_MAX_WAIT_MS a 503, both with
+# Retry-After. Queue waits and rejections are exported at /metrics.
+ADMISSION_CONTROL = os.environ.get("ADMISSION_CONTROL") == "1"
+ADMISSION_LIMITS = parse_limits(os.environ.get(
+    "ADMISSION_LIMITS", "diabetes=8:64,banknote=8:64,breastcancer=4:32,bitcoin=2:16"
+))
+ADMISSION_MAX_WAIT_MS = float(os.environ.get("ADMISSION_MAX_WAIT_MS", "500"))
+
+unknown_models = sorted(set(ADMISSION_LIMITS) - set(registry.loaders))
+if unknown_models:
+    raise ValueError(f"ADMISSION_LIMITS names unknown models: {unknown_models}")
+
+admission_gates = {
+    name: AdmissionGate(concurrency, queue_size, ADMISSION_MAX_WAIT_MS / 1000)
+    for name, (concurrency, queue_size) in ADMISSION_LIMITS.items()
+} if ADMISSION_CONTROL else {}
+
+
+@app.before_request
+def admit_request():
+    # Registered after the metrics hook, so queue time counts towards request
+    # latency. Only POSTs predict: the bitcoin event stream holds no slot.
+    gate = admission_gates.get(request_model()) if request.method == "POST" else None
+    if gate is None:
+        return None
+
+    try:
+        wait = gate.acquire()
+    except Rejected as e:
+        metrics.count_rejection(request_model(), e.reason)
+        response = jsonify({"error": "Server busy, retry later", "reason": e.reason})
+        response.status_code = e.status
+        response.headers["Retry-After"] = str(e.retry_after)
+        return response
+
+    g.admission = (gate, time.perf_counter())
+    metrics.observe_admission(request_model(), wait)
+    mark("admission")
+    return None
+
+
+@app.teardown_request
+def release_admission(exc):
+    admitted = g.pop("admission", None)
+    if admitted is not None:
+        gate, admitted_at = admitted
+        gate.release(time.perf_counter() - admitted_at)
+
 
 # ================================
-# Load Models (ONCE at startup)
+# Error and Batch Responses
 # ================================
-diabetes_model = joblib.load("best_diabetes_model.joblib")
+def error_response(e):
+    # Schema errors also list the offending fields
+    response = {"error": str(e)}
+    if isinstance(e, SchemaError):
+        response["fields"] = e.errors
+    return jsonify(response), 400
+
+
+def reject_rows(features, valid_rows, errors, mask, message):
+    # Move valid rows that fail a model-specific check into the error list
+    for i in valid_rows[mask].tolist():
+        errors[i] = message
+    return features[~mask], valid_rows[~mask]
 
-banknote_model = joblib.load("bank_note_authentication_model.joblib")
-banknote_transformer = joblib.load("power_transformer.joblib")
 
-# Load breast cancer model components
-breast_cancer_components = joblib.load("breast_cancer_model.joblib")
-breast_cancer_model = breast_cancer_components["model"]
-breast_cancer_transformer = breast_cancer_components["transformer"]
-breast_cancer_feature_names = breast_cancer_components["feature_names"]
-breast_cancer_feature_importance = breast_cancer_components["feature_importance"]
-breast_cancer_feature_info = breast_cancer_components["feature_info"]
+def batch_response(n_rows, valid_rows, errors, rows, **extra):
+    # Place per-row results back in input order, with errors in the gaps
+    results = [None] * n_rows
+    for i, row in zip(valid_rows.tolist(), rows):
+        results[i] = row
+    for i, message in errors.items():
+        results[i] = {"error": message}
+
+    return jsonify({
+        "count": n_rows,
+        "error_count": len(errors),
+        "results": results,
+        **extra
+    })
+
+
+# ================================
+# Binary Bulk Scoring
+# ================================
+# predict_batch routes also take .npy / Arrow IPC bodies (see binary_io.py).
+# The whole matrix goes through the vectorized predict in one call; results
+# come back as named columns in the negotiated format (JSON by default for
+# JSON clients, else the format of the request).
+def binary_batch_response(feature_names, predict_columns):
+    body = request.get_data()
+    declared = request.headers.get("X-Feature-Names")
+    declared = [name.strip() for name in declared.split(",")] if declared else None
+    features, fmt = read_matrix(body, request.content_type, feature_names, declared)
+    mark("parse_body")
+
+    if len(features) > MAX_BINARY_BATCH_SIZE:
+        raise ValueError(f"Batch too large: {len(features)} rows (max {MAX_BINARY_BATCH_SIZE})")
+    bad = ~np.isfinite(features).all(axis=1)
+    if bad.any():
+        raise ValueError(f"{int(bad.sum())} rows have non-finite features, first at row {int(np.argmax(bad))}")
+    mark("validate")
+
+    columns = predict_columns(features)
+    log_predictions(request_model(), features, columns, feature_names)
+    output = response_format(request.headers.get("Accept"), fmt)
+    if output is None:
+        return jsonify({"count": len(features), "columns": {name: values.tolist() for name, values in columns.items()}})
+
+    data, mimetype = write_table(columns, output)
+    return Response(data, mimetype=mimetype)
+
+
+def probability_columns(prediction, probability):
+    columns = {"prediction": prediction.astype(np.int64)}
+    for k in range(probability.shape[1]):
+        columns[f"probability_{k}"] = probability[:, k]
+    return columns
+
+
+def diabetes_columns(features):
+    return {"prediction": predict_diabetes_matrix(features)}
+
+
+def banknote_columns(features):
+    return probability_columns(*predict_banknote_matrix(features))
+
+
+def breast_cancer_columns(features, explain=False):
+    features_normalized = transform_breast_cancer(features)
+    prediction, probability = predict_breast_cancer_transformed(features_normalized)
+    columns = probability_columns(prediction, probability)
+    if explain:
+        _, contributions, base_values = breast_cancer_contributions(features_normalized, prediction)
+        columns["base_value"] = base_values
+        for j, name in enumerate(registry.get("breastcancer")["feature_names"]):
+            columns[f"contribution_{name}"] = contributions[:, j]
+    return columns
+
+
+def bitcoin_columns(features, horizons=None):
+    prices = features[:, 0]
+    if (prices <= 0).any():
+        raise ValueError(f"Price must be positive, first bad row {int(np.argmax(prices <= 0))}")
+    horizons, predictions = bitcoin_forecast(predict_bitcoin_matrix(prices, datetime.now(timezone.utc)), horizons)
+    prediction = predictions[:, headline_horizon(horizons)]
+    price_change = prediction - prices
+    columns = {
+        "current_price": prices,
+        "predicted_price": np.round(prediction, 2),
+        "price_change": np.round(price_change, 2),
+        "price_change_percent": np.round(price_change / prices * 100, 2),
+    }
+    for j, h in enumerate(horizons):
+        columns[f"predicted_price_{h}m"] = np.round(predictions[:, j], 2)
+    return columns
 
-# Load Bitcoin model
-bitcoin_model = joblib.load("bitcoin_model.joblib")
 
 # ================================
 # Health Check
@@ -43,27 +790,19 @@ def info():
 def predict_diabetes():
     try:
         data = request.get_json()
+        mark("parse_json")
 
-        features = np.array([[
-            float(data["age"]),
-            float(data["bmi"]),
-            float(data["bp"]),
-            float(data["s1"]),
-            float(data["s2"]),
-            float(data["s3"]),
-            float(data["s4"]),
-            float(data["s5"]),
-            float(data["s6"]),
-        ]])
+        features = DIABETES_SCHEMA.parse_row(data)
+        mark("validate")
 
-        prediction = diabetes_model.predict(features)[0]
+        prediction = cached_predict("diabetes", features, single_row_predictor("diabetes"))[0]
 
         return jsonify({
             "prediction": float(prediction)
         })
 
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        return error_response(e)
 
 
 # ================================
@@ -73,27 +812,20 @@ def predict_diabetes():
 def authenticate_banknote():
     try:
         data = request.get_json()
+        mark("parse_json")
 
-        features = np.array([[
-            float(data["var"]),
-            float(data["skew"]),
-            float(data["curt"]),
-            float(data["entr"]),
-        ]])
+        features = BANKNOTE_SCHEMA.parse_row(data)
+        mark("validate")
 
-        # Apply power transformer ONLY on curt & entr
-        features[:, 2:4] = banknote_transformer.transform(features[:, 2:4])
-
-        prediction = int(banknote_model.predict(features)[0])
-        probability = banknote_model.predict_proba(features).tolist()
+        prediction, probability = cached_predict("banknote", features, single_row_predictor("banknote"))[0]
 
         return jsonify({
-            "prediction": prediction,
-            "probability": probability
+            "prediction": int(prediction),
+            "probability": [probability]
         })
 
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        return error_response(e)
 
 
 # ================================
@@ -103,36 +835,43 @@ def authenticate_banknote():
 def predict_breast_cancer():
     try:
         data = request.get_json()
+        mark("parse_json")
+        breast_cancer = registry.get("breastcancer")
 
-        # Extract all 30 features in the correct order
-        features = np.array([[float(data[feature]) for feature in breast_cancer_feature_names]])
+        # All 30 features, in the order the model was trained on
+        features = breast_cancer_schema().parse_row(data)
+        mark("validate")
 
-        # Apply power transformer to normalize skewed features
-        features_normalized = breast_cancer_transformer.transform(features)
-
-        # Make prediction
-        prediction = int(breast_cancer_model.predict(features_normalized)[0])
-        probability = breast_cancer_model.predict_proba(features_normalized).tolist()
+        # Make prediction. With an explanation the row is transformed once, here,
+        # for both the model and the explainer (rather than micro-batched)
+        explain = explain_requested(data, default=True)
+        if explain:
+            features_normalized = transform_breast_cancer(features)
+            results = cached_predict("breastcancer", features, breast_cancer_transformed_rows, features_normalized)
+        else:
+            results = cached_predict("breastcancer", features, single_row_predictor("breastcancer"))
+        prediction, probability = results[0]
+        prediction = int(prediction)
+        probability = [probability]
 
         # Get prediction class name
-        prediction_label = breast_cancer_components["classes"][prediction]
-
-        # Format feature importance for response (top 10)
-        feature_importance_list = [
-            {"feature": k, "importance": float(v), "label": breast_cancer_feature_info.get(k, {}).get("label", k)}
-            for k, v in list(breast_cancer_feature_importance.items())[:10]
-        ]
+        prediction_label = breast_cancer["classes"][prediction]
 
-        return jsonify({
+        response = {
             "prediction": prediction,
             "prediction_label": prediction_label,
             "probability": probability,
             "confidence": float(max(probability[0])) * 100,
-            "feature_importance": feature_importance_list
-        })
+            "feature_importance": breast_cancer_importance_list()
+        }
+        # Why this prediction: decision path and per-feature contributions
+        if explain:
+            response["explanation"] = breast_cancer_explanations(features, features_normalized, [prediction])[0]
+
+        return jsonify(response)
 
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        return error_response(e)
 
 
 # ================================
@@ -143,39 +882,392 @@ def predict_breast_cancer():
 def predict_bitcoin():
     try:
         data = request.get_json()
-        
-        current_price = float(data["price"])
+        mark("parse_json")
+        horizons = requested_horizons(data)
+
+        if "price" not in data:
+            # No price given: use the lag/time features kept up to date by /api/bitcoin/ingest
+            symbol = data.get("symbol", BITCOIN_DEFAULT_SYMBOL)
+            features = price_streams.features(symbol)
+            if features is None:
+                return jsonify({"error": f"Not enough price history for {symbol}, ingest at least 3 bars"}), 400
+            mark("validate")
+
+            prediction = cached_predict("bitcoin", features[None, :], single_row_predictor("bitcoin"))[0]
+            return jsonify({
+                **bitcoin_response(float(features[2]), prediction, horizons),
+                "symbol": symbol,
+                "features_source": "stream"
+            })
+
+        current_price = float(BITCOIN_SCHEMA.parse_row(data)[0, 0])
         
         # Get current time features
-        now = pd.Timestamp.now()
+        now = datetime.now(timezone.utc)
         
-        # Prepare features: [lag1, lag2, price, hour, minute, dayofweek]
-        # For prediction, we use current_price as both lag1 and lag2
-        features = np.array([[
-            current_price,  # lag1
-            current_price,  # lag2
-            current_price,  # price
-            now.hour,
-            now.minute,
-            now.dayofweek
-        ]])
+        features = bitcoin_feature_matrix(np.array([current_price]), now)
+        mark("validate")
+        prediction = cached_predict("bitcoin", features, single_row_predictor("bitcoin"))[0]
         
-        prediction = float(bitcoin_model.predict(features)[0])
-        
-        # Calculate price change
-        price_change = prediction - current_price
-        price_change_percent = (price_change / current_price) * 100
-        
-        return jsonify({
-            "current_price": current_price,
-            "predicted_price": round(prediction, 2),
-            "price_change": round(price_change, 2),
-            "price_change_percent": round(price_change_percent, 2),
-            "prediction_timeframe": "2 minutes ahead"
-        })
+        return jsonify(bitcoin_response(current_price, prediction, horizons))
+
+    except Exception as e:
+        return error_response(e)
+
+
+def parse_ticks(data):
+    """
+    [(timestamp, price)] of an ingest body: one tick, or {"ticks": [...]}.
+    Every tick is checked before any is applied, so a SchemaError listing
+    the bad ones leaves the price stream untouched.
+    """
+    batch = "ticks" in data
+    ticks = data["ticks"] if batch else [data]
+    if not isinstance(ticks, list):
+        raise SchemaError([{"field": "ticks", "error": "Expected a list of ticks"}])
+
+    parsed, errors = [], []
+    for i, tick in enumerate(ticks):
+        where = f"ticks[{i}]." if batch else ""
+        if not isinstance(tick, dict):
+            errors.append({"field": f"ticks[{i}]", "error": "Expected an object"})
+            continue
+        try:
+            price = float(tick.get("price"))
+        except (TypeError, ValueError):
+            price = None
+        if price is None or not np.isfinite(price) or price <= 0:
+            errors.append({"field": where + "price",
+                           "error": f"Price must be a positive number, got {tick.get('price')!r}"})
+            continue
+        try:
+            # A tick without a timestamp is stored under now()
+            timestamp = parse_timestamp(tick.get("timestamp"))
+        except (TypeError, ValueError, OverflowError, OSError):
+            errors.append({"field": where + "timestamp",
+                           "error": f"Expected epoch seconds or an ISO 8601 time, got {tick.get('timestamp')!r}"})
+            continue
+        parsed.append((timestamp, price))
+    if errors:
+        raise SchemaError(errors)
+    return parsed
+
+
+@app.route("/api/bitcoin/ingest", methods=["POST"])
+def ingest_bitcoin_price():
+    try:
+        data = request.get_json()
+        symbol = data.get("symbol", BITCOIN_DEFAULT_SYMBOL)
+        ticks = parse_ticks(data)
+
+        features = timestamp = None
+        for timestamp, price in ticks:
+            features = price_streams.ingest(symbol, timestamp, price)
+
+        response = {"symbol": symbol, "ingested": len(ticks), "ready": features is not None}
+        if features is not None:
+            # Predict once from the latest feature row and push it to stream subscribers
+            prediction = cached_predict("bitcoin", features[None, :], bitcoin_rows)[0]
+            event = {
+                "symbol": symbol,
+                "timestamp": timestamp.isoformat(),
+                **bitcoin_response(float(features[2]), prediction),
+                "model_version": registry.version("bitcoin")
+            }
+            price_streams.publish(event)
+            response["prediction"] = event
+
+        return jsonify(response)
 
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        return error_response(e)
+
+
+@app.route("/api/bitcoin/stream", methods=["GET"])
+def stream_bitcoin_predictions():
+    # Server-sent events: one "data:" message per prediction made on ingest
+    symbol = request.args.get("symbol")
+
+    def events():
+        # Subscribed once the stream is read: a response closed before
+        # that (e.g. refused by the server) leaves no subscriber behind
+        subscriber = price_streams.subscribe()
+        try:
+            yield ": connected\n\n"
+            while True:
+                try:
+                    event = subscriber.get(timeout=15)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                if symbol is None or event["symbol"] == symbol:
+                    yield f"data: {json.dumps(event)}\n\n"
+        finally:
+            price_streams.unsubscribe(subscriber)
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# ================================
+# Batch Prediction APIs
+# ================================
+@app.route("/api/diabetes/predict_batch", methods=["POST"])
+def predict_diabetes_batch():
+    try:
+        if is_binary(request.content_type):
+            return binary_batch_response(DIABETES_FEATURES, diabetes_columns)
+
+        features, valid_rows, errors, n_rows = DIABETES_SCHEMA.parse_batch(request.get_json())
+        mark("validate")
+
+        predictions = cached_predict("diabetes", features, diabetes_rows) if len(valid_rows) else []
+        rows = [{"prediction": p} for p in predictions]
+
+        return batch_response(n_rows, valid_rows, errors, rows)
+
+    except Exception as e:
+        return error_response(e)
+
+
+@app.route("/api/banknote/predict_batch", methods=["POST"])
+def authenticate_banknote_batch():
+    try:
+        if is_binary(request.content_type):
+            return binary_batch_response(BANKNOTE_FEATURES, banknote_columns)
+
+        features, valid_rows, errors, n_rows = BANKNOTE_SCHEMA.parse_batch(request.get_json())
+        mark("validate")
+
+        rows = []
+        if len(valid_rows):
+            rows = [
+                {"prediction": p, "probability": [proba]}
+                for p, proba in cached_predict("banknote", features, banknote_rows)
+            ]
+
+        return batch_response(n_rows, valid_rows, errors, rows)
+
+    except Exception as e:
+        return error_response(e)
+
+
+@app.route("/api/breastcancer/predict_batch", methods=["POST"])
+def predict_breast_cancer_batch():
+    try:
+        breast_cancer = registry.get("breastcancer")
+        if is_binary(request.content_type):
+            explain = explain_requested(None, default=False)
+            return binary_batch_response(
+                breast_cancer["feature_names"], lambda features: breast_cancer_columns(features, explain)
+            )
+
+        data = request.get_json()
+        features, valid_rows, errors, n_rows = breast_cancer_schema().parse_batch(data)
+        mark("validate")
+
+        rows = []
+        if len(valid_rows):
+            # Explanations are opt-in for batches ("explain": true), computed for all
+            # rows at once from the matrix the model predicts on
+            explain = explain_requested(data, default=False)
+            features_normalized = transform_breast_cancer(features) if explain else None
+            classes = breast_cancer["classes"]
+            rows = [
+                {
+                    "prediction": p,
+                    "prediction_label": classes[p],
+                    "probability": [proba],
+                    "confidence": max(proba) * 100
+                }
+                for p, proba in cached_predict(
+                    "breastcancer", features,
+                    breast_cancer_transformed_rows if explain else breast_cancer_rows, features_normalized,
+                )
+            ]
+            if explain:
+                explanations = breast_cancer_explanations(
+                    features, features_normalized, [row["prediction"] for row in rows]
+                )
+                for row, explanation in zip(rows, explanations):
+                    row["explanation"] = explanation
+
+        # Global importance is the same for every row, so send it once
+        return batch_response(
+            n_rows, valid_rows, errors, rows,
+            feature_importance=breast_cancer_importance_list()
+        )
+
+    except Exception as e:
+        return error_response(e)
+
+
+@app.route("/api/bitcoin/predict_batch", methods=["POST"])
+def predict_bitcoin_batch():
+    try:
+        if is_binary(request.content_type):
+            horizons = requested_horizons()
+            return binary_batch_response(BITCOIN_FEATURES, lambda features: bitcoin_columns(features, horizons))
+
+        data = request.get_json()
+        horizons = requested_horizons(data)
+        features, valid_rows, errors, n_rows = BITCOIN_SCHEMA.parse_batch(data)
+        features, valid_rows = reject_rows(
+            features, valid_rows, errors, features[:, 0] <= 0, "Price must be positive"
+        )
+        mark("validate")
+
+        rows = []
+        if len(valid_rows):
+            prices = features[:, 0]
+            predictions = cached_predict("bitcoin", bitcoin_feature_matrix(prices, datetime.now(timezone.utc)), bitcoin_rows)
+            rows = [
+                bitcoin_response(price, prediction, horizons)
+                for price, prediction in zip(prices.tolist(), predictions)
+            ]
+
+        return batch_response(n_rows, valid_rows, errors, rows)
+
+    except Exception as e:
+        return error_response(e)
+
+
+# ================================
+# Prediction Cache Stats
+# ================================
+@app.route("/api/cache/stats", methods=["GET"])
+def cache_stats():
+    return jsonify({
+        "enabled": bool(prediction_caches),
+        "caches": {name: cache.stats() for name, cache in prediction_caches.items()}
+    })
+
+
+@app.route("/api/cache/clear", methods=["POST"])
+def cache_clear():
+    for cache in prediction_caches.values():
+        cache.clear()
+    return jsonify({"status": "cleared"})
+
+
+# ================================
+# Model Versions and Reload
+# ================================
+def model_status(name):
+    return {
+        "loaded": registry.is_loaded(name),
+        "version": registry.versions.get(name),
+        "sources": registry.sources[name],
+        "load_seconds": registry.load_times.get(name),
+        "last_reload": registry.reloads.get(name),
+    }
+
+
+@app.route("/api/models", methods=["GET"])
+def list_models():
+    return jsonify({
+        "reload_interval": MODEL_RELOAD_INTERVAL,
+        "models": {name: model_status(name) for name in registry.loaders}
+    })
+
+
+@app.route("/api/models/reload", methods=["POST"])
+def reload_models():
+    # Body (optional): {"models": [...], "force": true}. Defaults to every
+    # loaded model, each reloaded only if its artifacts changed.
+    try:
+        data = request.get_json(silent=True) or {}
+        names = data.get("models") or [name for name in registry.loaders if registry.is_loaded(name)]
+        unknown = [name for name in names if name not in registry.loaders]
+        if unknown:
+            raise SchemaError([{"field": "models", "error": f"Unknown models: {unknown}"}])
+        prepare_reload(names)
+
+        results = {}
+        for name in names:
+            try:
+                record = registry.reload(name, force=bool(data.get("force")))
+            except Exception:
+                record = registry.reloads[name]
+            results[name] = record or {"status": "unchanged", "version": registry.versions.get(name)}
+
+        failed = any(record["status"] == "failed" for record in results.values())
+        return jsonify({"results": results}), 500 if failed else 200
+
+    except Exception as e:
+        return error_response(e)
+
+
+# ================================
+# Admission Control Stats
+# ================================
+@app.route("/api/admission/stats", methods=["GET"])
+def admission_stats():
+    return jsonify({
+        "enabled": ADMISSION_CONTROL,
+        "gates": {name: gate.stats() for name, gate in admission_gates.items()}
+    })
+
+
+# ================================
+# Shadow Scoring Stats
+# ================================
+@app.route("/api/shadow/stats", methods=["GET"])
+def shadow_stats():
+    return jsonify({
+        "enabled": bool(shadow_scorers),
+        "models": {name: scorer.stats() for name, scorer in shadow_scorers.items()}
+    })
+
+
+# ================================
+# Prediction Log Stats
+# ================================
+@app.route("/api/prediction_log/stats", methods=["GET"])
+def prediction_log_stats():
+    return jsonify({
+        "enabled": PREDICTION_LOG,
+        "log": prediction_log.stats() if prediction_log is not None else None
+    })
+
+
+@app.route("/api/prediction_log/flush", methods=["POST"])
+def prediction_log_flush():
+    # Writes out the queue and closes the open files, so they can be read now
+    if prediction_log is None:
+        return jsonify({"error": "Prediction log is disabled, set PREDICTION_LOG=1"}), 400
+    flushed = prediction_log.flush(timeout=30)
+    return jsonify({"flushed": flushed, "log": prediction_log.stats()}), 200 if flushed else 503
+
+
+# ================================
+# Micro-Batching Stats
+# ================================
+@app.route("/api/batching/stats", methods=["GET"])
+def batching_stats():
+    return jsonify({
+        "enabled": MICRO_BATCHING,
+        "batchers": {name: batcher.stats() for name, batcher in micro_batchers.items()}
+    })
+
+
+# ================================
+# Metrics
+# ================================
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    return Response(
+        metrics.render(
+            dict(registry.versions),
+            admission={name: gate.stats() for name, gate in admission_gates.items()},
+            shadow={name: scorer.stats() for name, scorer in shadow_scorers.items()},
+            prediction_log=prediction_log.stats() if prediction_log is not None else None
+        ),
+        mimetype="text/plain; version=0.0.4"
+    )
 
 
 # ================================
@@ -0,0 +1,273 @@
+"""
+asyncio serving mode for app.py.
+
+An asyncio HTTP/1.1 front end holds the client connections (keep-alive,
+thousands of idle sockets cost almost nothing) and runs the existing Flask
+app, so routes and JSON contracts are exactly the same as under
+`python app.py`. Every request handler, and with it every predict call, runs
+on a bounded thread pool, so the event loop itself never blocks on CPU work.
+Streaming responses such as /api/bitcoin/stream are forwarded chunk by chunk
+from a separate pool so long-lived streams cannot starve predictions. An open
+stream holds one thread of that pool while it waits for its next chunk, so at
+most `stream_workers` streams are served at once and further ones get 503.
+
+Only the standard library is used. Request bodies must have a
+Content-Length (no chunked uploads), which every JSON client sends.
+
+    python async_server.py [--port 5000] [--workers 8] [--stream-workers 64]
+"""
+import argparse
+import asyncio
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote
+
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 64 * 1024 * 1024
+KEEPALIVE_TIMEOUT = 75.0
+
+REASONS = {
+    400: "Bad Request", 408: "Request Timeout", 411: "Length Required",
+    413: "Payload Too Large", 500: "Internal Server Error", 501: "Not Implemented",
+    503: "Service Unavailable",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status):
+        super().__init__(status)
+        self.status = status
+
+
+class AsyncServer:
+    def __init__(self, wsgi_app, host="127.0.0.1", port=5000, workers=None, stream_workers=64):
+        self.wsgi_app = wsgi_app
+        self.host = host
+        self.port = port
+        self.workers = workers or min(32, (os.cpu_count() or 1) * 2)
+        self.pool = ThreadPoolExecutor(self.workers, thread_name_prefix="predict")
+        self.stream_workers = stream_workers
+        self.stream_pool = ThreadPoolExecutor(stream_workers, thread_name_prefix="stream")
+        self.open_connections = 0
+        self.open_streams = 0
+
+    # ================================
+    # Connection Handling
+    # ================================
+    async def handle_connection(self, reader, writer):
+        self.open_connections += 1
+        peer = writer.get_extra_info("peername") or ("", 0)
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self.read_request(reader), KEEPALIVE_TIMEOUT)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except HTTPError as e:
+                    await self.write_simple(writer, e.status)
+                    break
+                if request is None:
+                    break
+
+                method, target, version, headers, body = request
+                environ = self.build_environ(method, target, version, headers, body, peer)
+                keep_alive = self.wants_keep_alive(version, headers)
+                keep_alive = await self.respond(writer, environ, keep_alive)
+                if not keep_alive:
+                    break
+        finally:
+            self.open_connections -= 1
+            writer.close()
+
+    async def read_request(self, reader):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError as e:
+            if not e.partial:
+                return None  # client closed an idle keep-alive connection
+            raise
+        except asyncio.LimitOverrunError:
+            raise HTTPError(400)
+
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ", 2)
+        except ValueError:
+            raise HTTPError(400)
+
+        headers = {}
+        for line in lines[1:]:
+            if not line:
+                continue
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise HTTPError(411)
+        try:
+            length = int(headers.get("content-length", "0") or 0)
+        except ValueError:
+            raise HTTPError(400)
+        if length < 0:
+            raise HTTPError(400)
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413)
+        body = await reader.readexactly(length) if length else b""
+        return method, target, version, headers, body
+
+    @staticmethod
+    def wants_keep_alive(version, headers):
+        connection = headers.get("connection", "").lower()
+        if version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+    def build_environ(self, method, target, version, headers, body, peer):
+        path, _, query = target.partition("?")
+        environ = {
+            "REQUEST_METHOD": method,
+            "SCRIPT_NAME": "",
+            "PATH_INFO": unquote(path, "latin-1"),
+            "QUERY_STRING": query,
+            "SERVER_NAME": self.host,
+            "SERVER_PORT": str(self.port),
+            "SERVER_PROTOCOL": version,
+            "REMOTE_ADDR": peer[0],
+            "CONTENT_LENGTH": str(len(body)),
+            "CONTENT_TYPE": headers.get("content-type", ""),
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": "http",
+            "wsgi.input": io.BytesIO(body),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        for name, value in headers.items():
+            if name in ("content-type", "content-length"):
+                continue
+            environ["HTTP_" + name.upper().replace("-", "_")] = value
+        return environ
+
+    # ================================
+    # Running the WSGI App
+    # ================================
+    def call_app(self, environ):
+        """Runs on the predict pool. Buffers sized responses, hands back streams."""
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response["status"] = status
+            response["headers"] = headers
+
+        result = self.wsgi_app(environ, start_response)
+        has_length = any(name.lower() == "content-length" for name, _ in response["headers"])
+        if not has_length:
+            return response["status"], response["headers"], None, result
+
+        try:
+            body = b"".join(result)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        return response["status"], response["headers"], body, None
+
+    async def respond(self, writer, environ, keep_alive):
+        loop = asyncio.get_running_loop()
+        try:
+            status, headers, body, stream = await loop.run_in_executor(self.pool, self.call_app, environ)
+        except Exception:
+            await self.write_simple(writer, 500)
+            return False
+
+        head = [f"HTTP/1.1 {status}"]
+        head += [f"{name}: {value}" for name, value in headers if name.lower() != "connection"]
+        head.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+
+        if stream is None:
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+            return await self.drain(writer) and keep_alive
+
+        if self.open_streams >= self.stream_workers:
+            # Every stream thread is held by an open stream: one more would
+            # wait on (and delay) the others
+            if hasattr(stream, "close"):
+                await loop.run_in_executor(self.pool, stream.close)
+            await self.write_simple(writer, 503)
+            return False
+
+        # Unknown length: forward the stream with chunked transfer encoding
+        self.open_streams += 1
+        head.append("Transfer-Encoding: chunked")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+        iterator = iter(stream)
+        try:
+            while True:
+                chunk = await loop.run_in_executor(self.stream_pool, next, iterator, None)
+                if chunk is None:
+                    break
+                if chunk:
+                    writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                    if not await self.drain(writer):
+                        return False
+            writer.write(b"0\r\n\r\n")
+            return await self.drain(writer) and keep_alive
+        finally:
+            if hasattr(stream, "close"):
+                await loop.run_in_executor(self.stream_pool, stream.close)
+            self.open_streams -= 1
+
+    @staticmethod
+    async def drain(writer):
+        """Flush the writer; False if the client has gone away."""
+        try:
+            await writer.drain()
+        except ConnectionError:  # reset, broken pipe, aborted
+            return False
+        return True
+
+    async def write_simple(self, writer, status):
+        reason = REASONS.get(status, "Error")
+        body = f'{{"error": "{reason}"}}'.encode()
+        writer.write(
+            f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+        )
+        await self.drain(writer)
+
+    # ================================
+    # Server Lifecycle
+    # ================================
+    async def serve(self, ready=None):
+        server = await asyncio.start_server(
+            self.handle_connection, self.host, self.port, limit=MAX_HEADER_BYTES, backlog=4096
+        )
+        if ready is not None:
+            ready.set()
+        async with server:
+            await server.serve_forever()
+
+    def run(self):
+        print(f"Serving app.py with asyncio on http://{self.host}:{self.port} ({self.workers} predict threads)")
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.stream_pool.shutdown(wait=False, cancel_futures=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve app.py from an asyncio HTTP server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=None, help="threads running request handlers")
+    parser.add_argument("--stream-workers", type=int, default=64, help="streaming responses served at once")
+    args = parser.parse_args()
+
+    from app import app
+
+    AsyncServer(app, args.host, args.port, args.workers, args.stream_workers).run()
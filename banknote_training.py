@@ -0,0 +1,107 @@
+"""Training shared by the banknote scripts (banknotemode.py, banknotewithdesciosntree.py).
+
+Both scripts read the same CSV, split and transform it the same way and
+publish to the same served paths; they differ only in the estimator.
+"""
+import argparse
+import pandas as pd
+from sklearn.preprocessing import PowerTransformer
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
+
+from training_cache import TrainingRun, stage
+
+DATA_PATH = "bank_note_authentication.csv"
+MODEL_PATH = "bank_note_authentication_model.joblib"
+TRANSFORMER_PATH = "power_transformer.joblib"
+
+
+def candidate_paths(run_name):
+    """Model and transformer paths a run publishes whether or not it is served,
+    so app.py can shadow score it (BANKNOTE_SHADOW_MODELS) next to the other script's model."""
+    return (f"candidates/{run_name}_model.joblib",
+            f"candidates/{run_name}_transformer.joblib")
+
+
+def load_data():
+    df = pd.read_csv(DATA_PATH)
+    print(f"Loaded {df.shape[0]} rows x {df.shape[1]} columns from {DATA_PATH}, "
+          f"{int(df.isnull().sum().sum())} missing values")
+
+    print("\nSkewness before transform:")
+    print(df.skew())
+
+    X = df.drop(columns=["auth"])
+    y = df["auth"]
+
+    return X, y
+
+
+def split_and_transform(X, y):
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+
+    # Apply PowerTransformer ONLY on training data
+    pt = PowerTransformer(method="yeo-johnson")
+    X_train[['curt', 'entr']] = pt.fit_transform(X_train[['curt', 'entr']])
+    X_test[['curt', 'entr']] = pt.transform(X_test[['curt', 'entr']])
+
+    return X_train, X_test, y_train, y_test, pt
+
+
+def train_and_test_data(run_name, script, estimator, params, label="", serve=True):
+    """Train (or reuse) `estimator(**params)` as run `run_name` and publish it.
+
+    `script` is the calling script's path; it is part of the cache key
+    together with this module.
+    """
+    run = TrainingRun(run_name, code=[script, __file__], data=[DATA_PATH], params=params)
+    if run.is_cached():
+        print(f"Data, code and parameters unchanged, reusing {run.version}")
+    else:
+        train(run, estimator, params, label)
+    candidate_model_path, candidate_transformer_path = candidate_paths(run_name)
+    run.publish({candidate_model_path: "model", candidate_transformer_path: "transformer"})
+    print(f"\n{candidate_model_path} holds {run.version}")
+    if serve:
+        # Each script keeps its own versioned artifacts in training_cache/;
+        # the one run last without --shadow is what app.py serves
+        run.publish({MODEL_PATH: "model", TRANSFORMER_PATH: "transformer"})
+        print(f"{MODEL_PATH} and {TRANSFORMER_PATH} now serve {run.version}")
+    return run
+
+
+def train(run, estimator, params, label=""):
+    X, y = load_data()
+
+    # Both scripts split the same way, so whichever runs second reuses this
+    X_train, X_test, y_train, y_test, pt = stage("banknote_split", split_and_transform, X, y)
+
+    print("\nSkewness after transform (train data):")
+    print(X_train.skew())
+
+    model = estimator(**params)
+    model.fit(X_train, y_train)
+
+    y_pred = model.predict(X_test)
+
+    accuracy = accuracy_score(y_test, y_pred)
+    print(f"\n{label}Accuracy:", accuracy)
+    print(f"\n{label}Confusion Matrix:")
+    print(confusion_matrix(y_test, y_pred))
+    print(f"\n{label}Classification Report:")
+    print(classification_report(y_test, y_pred))
+
+    # Save trained model
+    run.save({"model": model, "transformer": pt}, metrics={"accuracy": accuracy})
+
+    print("\nModel and transformer saved successfully!")
+
+
+def main(run_name, train_and_test_data):
+    parser = argparse.ArgumentParser(description=f"Train the {run_name} banknote model")
+    parser.add_argument("--shadow", action="store_true",
+                        help="only publish the candidate artifacts, leave the served model as it is")
+    args = parser.parse_args()
+    train_and_test_data(serve=not args.shadow)
@@ -0,0 +1,186 @@
+"""
+Local append-only store of 1-minute bars for the bitcoin model.
+
+Each symbol is one binary file of fixed-size records (epoch minute, close),
+in time order. New bars are only ever appended, so:
+- training reads just the tail it needs (a memory map, no parsing)
+- "what is new since the last update" is a record index
+- a crash mid-append leaves at most a partial last record, dropped on open
+
+Feeds fill the store:
+- YahooFeed downloads recent bars with yfinance (imported on first fetch,
+  never at import time)
+- CsvFeed reads a CSV of bars (timestamp/Datetime and price/Close columns,
+  as replayed by price_stream.py), a stand-in for offline use and tests
+
+    store = BarStore.open("BTC-USD")
+    store.sync(CsvFeed("bars.csv"))
+    minutes, prices = store.tail(1440)
+    X, y = bar_features(minutes, prices)
+"""
+import os
+import time
+
+import numpy as np
+
+from price_stream import read_bars
+
+BAR_STORE_DIR = os.environ.get("BAR_STORE_DIR", "bars")
+
+BAR_DTYPE = np.dtype([("minute", "<i8"), ("price", "<f8")])
+
+# Bars before each training row needed for its lags
+LAGS = 2
+
+# Minutes ahead predicted by the bitcoin model: the original single output,
+# 2 minutes ahead, or one output per minute from 1 to n for a multi-horizon model
+SINGLE_HORIZON = (2,)
+MAX_HORIZON = 15
+
+
+def horizons_for(n_outputs):
+    """Forecast horizons (minutes) of a bitcoin model with n_outputs outputs."""
+    return SINGLE_HORIZON if n_outputs == 1 else tuple(range(1, n_outputs + 1))
+
+
+class BarStore:
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if not os.path.exists(path):
+            open(path, "ab").close()
+        # Drop a partial record left by an interrupted append
+        size = os.path.getsize(path)
+        if size % BAR_DTYPE.itemsize:
+            os.truncate(path, size - size % BAR_DTYPE.itemsize)
+
+    @classmethod
+    def open(cls, symbol, directory=None):
+        return cls(os.path.join(directory or BAR_STORE_DIR, f"{symbol}.bars"))
+
+    def __len__(self):
+        return os.path.getsize(self.path) // BAR_DTYPE.itemsize
+
+    def _records(self, start=0, stop=None):
+        n = len(self)
+        stop = n if stop is None else min(stop, n)
+        start = max(0, min(start, stop))
+        if start == stop:
+            return np.empty(0, dtype=BAR_DTYPE)
+        return np.memmap(self.path, dtype=BAR_DTYPE, mode="r", offset=start * BAR_DTYPE.itemsize,
+                         shape=(stop - start,))
+
+    def last_minute(self):
+        """Epoch minute of the newest bar, or None when empty."""
+        n = len(self)
+        return int(self._records(n - 1)["minute"][0]) if n else None
+
+    def read(self, start=0, stop=None):
+        """(minutes, prices) of records start..stop, copied out of the file."""
+        records = self._records(start, stop)
+        return np.array(records["minute"]), np.array(records["price"])
+
+    def tail(self, n):
+        return self.read(len(self) - n)
+
+    def append(self, minutes, prices):
+        """Append bars newer than the last one stored; returns how many were added."""
+        minutes = np.asarray(minutes, dtype=np.int64)
+        prices = np.asarray(prices, dtype=np.float64)
+        order = np.argsort(minutes, kind="stable")
+        minutes, prices = minutes[order], prices[order]
+
+        last = self.last_minute()
+        keep = np.isfinite(prices)
+        if last is not None:
+            keep &= minutes > last
+        # One bar per minute: the last value seen for a minute wins
+        keep &= np.r_[minutes[1:] != minutes[:-1], True]
+        records = np.empty(int(keep.sum()), dtype=BAR_DTYPE)
+        records["minute"] = minutes[keep]
+        records["price"] = prices[keep]
+        if len(records):
+            with open(self.path, "ab") as f:
+                f.write(records.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+        return len(records)
+
+    def sync(self, feed):
+        """Append whatever `feed` has after the newest stored bar."""
+        minutes, prices = feed.fetch(self.last_minute())
+        return self.append(minutes, prices)
+
+
+# ================================
+# Feeds
+# ================================
+def _closed(minutes, prices, since):
+    """Bars after `since` whose minute has ended (the current one may still change)."""
+    minutes = np.asarray(minutes, dtype=np.int64)
+    prices = np.asarray(prices, dtype=np.float64)
+    keep = minutes < int(time.time() // 60)
+    if since is not None:
+        keep &= minutes > since
+    return minutes[keep], prices[keep]
+
+
+class YahooFeed:
+    def __init__(self, symbol="BTC-USD"):
+        self.symbol = symbol
+
+    def fetch(self, since=None):
+        import pandas as pd
+        import yfinance as yf
+
+        # Yahoo keeps 1-minute bars for the last 7 days
+        age_days = 1 if since is None else (time.time() / 60 - since) / 1440
+        period = "1d" if age_days < 1 else "7d"
+        df = yf.download(self.symbol, period=period, interval="1m", progress=False)
+        if df.empty:
+            raise Exception("No data retrieved.")
+        if isinstance(df.columns, pd.MultiIndex):
+            df.columns = df.columns.get_level_values(0)
+        minutes = df.index.as_unit("s").asi8 // 60
+        return _closed(minutes, df["Close"].to_numpy(), since)
+
+
+class CsvFeed:
+    def __init__(self, path):
+        self.path = path
+
+    def fetch(self, since=None):
+        bars = list(read_bars(self.path))
+        minutes = [int(timestamp.timestamp() // 60) for timestamp, _ in bars]
+        prices = [price for _, price in bars]
+        return _closed(minutes, prices, since)
+
+
+# ================================
+# Features
+# ================================
+def bar_features(minutes, prices, horizons=SINGLE_HORIZON):
+    """
+    Training rows of bitcoinmodel.py from consecutive bars:
+    X = [lag1, lag2, price, hour, minute, dayofweek] (UTC) and the close
+    h bars later for each h in horizons, as y of shape (n_rows,) for one
+    horizon or (n_rows, n_horizons). Rows without both lags or without every
+    target are left out.
+    """
+    horizons = np.asarray(horizons)
+    rows = np.arange(LAGS, len(prices) - horizons.max())
+    if not len(rows):
+        return np.empty((0, 6)), np.empty((0,) if len(horizons) == 1 else (0, len(horizons)))
+    row_minutes = minutes[rows]
+    X = np.column_stack([
+        prices[rows - 1],
+        prices[rows - 2],
+        prices[rows],
+        (row_minutes // 60) % 24,
+        row_minutes % 60,
+        # 1970-01-01 was a Thursday (weekday 3)
+        (row_minutes // 1440 + 3) % 7,
+    ]).astype(np.float64)
+    # Every horizon's target in one gather: row i, column j is prices[i + horizons[j]]
+    y = prices[rows[:, None] + horizons]
+    return X, y[:, 0] if len(horizons) == 1 else y
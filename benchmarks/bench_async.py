@@ -0,0 +1,186 @@
+"""
+Serving benchmark: Flask's threaded server vs the asyncio server.
+
+Starts each server as a subprocess on the same app.py, then drives it with N
+concurrent keep-alive connections sending single-row diabetes and banknote
+predictions for a fixed duration, optionally while holding extra idle
+connections open (slow clients, open dashboards). Reports throughput,
+p50/p99/max latency and errors per concurrency level. Feature rows are random
+so the prediction cache does not hide the predict cost.
+Run from the repository root:
+    python benchmarks/bench_async.py [--connections 1 16 64 256] [--idle 500]
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+
+SERVERS = {
+    "flask": [sys.executable, "-c", "import app; app.app.run(port=int(__import__('sys').argv[1]), threaded=True)"],
+    "asyncio": [sys.executable, "async_server.py", "--port"],
+}
+
+DIABETES_FEATURES = ["age", "bmi", "bp", "s1", "s2", "s3", "s4", "s5", "s6"]
+BANKNOTE_FEATURES = ["var", "skew", "curt", "entr"]
+
+
+def post_request(path, payload):
+    """Raw HTTP/1.1 bytes of a JSON POST, prepared up front to keep the client cheap."""
+    body = json.dumps(payload).encode()
+    return (
+        f"POST {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+
+
+def request_bodies(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    bodies = []
+    for i in range(n):
+        if i % 2:
+            path, row = "/api/banknote/authenticate", zip(BANKNOTE_FEATURES, rng.normal(0, 3, 4))
+        else:
+            path, row = "/api/diabetes/predict", zip(DIABETES_FEATURES, rng.normal(0, 0.05, 9))
+        bodies.append(post_request(path, {key: float(value) for key, value in row}))
+    return bodies
+
+
+# ================================
+# Load Generator
+# ================================
+async def read_response(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ", 2)[1])
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    await reader.readexactly(int(headers.get("content-length", "0")))
+    keep_alive = lines[0].startswith("HTTP/1.1") and headers.get("connection", "").lower() != "close"
+    return status, keep_alive
+
+
+async def client(port, bodies, offset, deadline, latencies, errors):
+    connection = None
+    i = offset
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            if connection is None:
+                connection = await asyncio.open_connection("127.0.0.1", port)
+            reader, writer = connection
+            writer.write(bodies[i % len(bodies)])
+            await writer.drain()
+            status, keep_alive = await read_response(reader)
+        except (OSError, asyncio.IncompleteReadError):
+            errors.append("connection")
+            connection = None
+            await asyncio.sleep(0.01)
+            continue
+
+        latencies.append(time.perf_counter() - start)
+        if status != 200:
+            errors.append(status)
+        if not keep_alive:
+            writer.close()
+            connection = None
+        i += 1
+    if connection is not None:
+        connection[1].close()
+
+
+async def run_load(port, bodies, connections, duration, idle):
+    idle_connections = []
+    for _ in range(idle):
+        try:
+            idle_connections.append(await asyncio.open_connection("127.0.0.1", port))
+        except OSError:
+            break
+
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        client(port, bodies, k * 37, deadline, latencies, errors) for k in range(connections)
+    ])
+    elapsed = time.perf_counter() - start
+
+    for _, writer in idle_connections:
+        writer.close()
+
+    latencies = np.array(latencies) * 1e3
+    return {
+        "connections": connections,
+        "idle_connections": len(idle_connections),
+        "requests": int(latencies.size),
+        "throughput_rps": latencies.size / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)) if latencies.size else None,
+        "p95_ms": float(np.percentile(latencies, 95)) if latencies.size else None,
+        "p99_ms": float(np.percentile(latencies, 99)) if latencies.size else None,
+        "max_ms": float(latencies.max()) if latencies.size else None,
+        "errors": len(errors),
+    }
+
+
+# ================================
+# Server Processes
+# ================================
+def start_server(name, port, env):
+    process = subprocess.Popen(
+        SERVERS[name] + [str(port)], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    for _ in range(300):
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/info", timeout=1):
+                return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"{name} server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--servers", nargs="+", default=list(SERVERS), choices=list(SERVERS))
+    parser.add_argument("--connections", type=int, nargs="+", default=[1, 16, 64, 256])
+    parser.add_argument("--idle", type=int, default=0, help="extra idle connections held open during the run")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per concurrency level")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    bodies = request_bodies()
+    env = dict(os.environ, MODEL_LOADING="eager")
+    results = {}
+    print(f"{'server':8s} {'conns':>6s} {'idle':>5s} {'req/s':>9s} {'p50 (ms)':>9s} {'p99 (ms)':>9s} {'max (ms)':>9s} {'errors':>7s}")
+    for name in args.servers:
+        process = start_server(name, args.port, env)
+        try:
+            # Warm up the models and the first connections
+            asyncio.run(run_load(args.port, bodies, 4, 0.5, 0))
+            for connections in args.connections:
+                result = asyncio.run(run_load(args.port, bodies, connections, args.duration, args.idle))
+                results[f"{name}/{connections}"] = result
+                print(
+                    f"{name:8s} {connections:6d} {result['idle_connections']:5d} {result['throughput_rps']:9.0f} "
+                    f"{result['p50_ms'] or 0:9.2f} {result['p99_ms'] or 0:9.2f} {result['max_ms'] or 0:9.2f} "
+                    f"{result['errors']:7d}"
+                )
+        finally:
+            process.terminate()
+            process.wait()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Latency benchmark: sklearn artifacts vs the compiled NumPy kernels.
+
+Run from the repository root:
+    python benchmarks/bench_inference.py [--repeat 200]
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import joblib
+import numpy as np
+
+sys.path.append(os.getcwd())
+
+from inference import compile_model
+
+warnings.filterwarnings("ignore")
+
+
+def time_call(fn, X, repeat):
+    fn(X)  # warm up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(X)
+        samples.append(time.perf_counter() - start)
+    return np.percentile(samples, 50) * 1e6, np.percentile(samples, 99) * 1e6
+
+
+def load_cases():
+    rng = np.random.default_rng(0)
+    components = joblib.load("breast_cancer_model.joblib")
+    cases = [
+        ("diabetes pipeline", joblib.load("best_diabetes_model.joblib"), "predict", rng.normal(0, 0.05, (10000, 9))),
+        ("banknote transformer", joblib.load("power_transformer.joblib"), "transform", rng.normal(0, 5, (10000, 2))),
+        ("banknote model", joblib.load("bank_note_authentication_model.joblib"), "predict_proba", rng.normal(0, 3, (10000, 4))),
+        ("breast cancer transformer", components["transformer"], "transform", np.abs(rng.normal(10, 5, (10000, 30)))),
+        ("breast cancer tree", components["model"], "predict_proba", rng.normal(0, 1, (10000, 30))),
+    ]
+    if os.path.exists("bitcoin_model.joblib"):
+        prices = rng.normal(60000, 300, (10000, 3))
+        clock = np.c_[rng.integers(0, 24, 10000), rng.integers(0, 60, 10000), rng.integers(0, 7, 10000)]
+        cases.append(("bitcoin forest", joblib.load("bitcoin_model.joblib"), "predict", np.c_[prices, clock]))
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 100, 10000])
+    args = parser.parse_args()
+
+    print(f"{'model':26s} {'rows':>6s} {'sklearn p50/p99 (us)':>22s} {'compiled p50/p99 (us)':>23s} {'speedup':>8s}")
+    for name, model, method, X in load_cases():
+        kernel = compile_model(model)
+        for rows in args.rows:
+            batch = X[:rows]
+            repeat = max(5, args.repeat * 100 // max(rows, 100))
+            sk50, sk99 = time_call(getattr(model, method), batch, repeat)
+            ck50, ck99 = time_call(getattr(kernel, method), batch, repeat)
+            print(f"{name:26s} {rows:6d} {sk50:10.1f} /{sk99:10.1f} {ck50:11.1f} /{ck99:10.1f} {sk50 / ck50:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
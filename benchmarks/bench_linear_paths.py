@@ -0,0 +1,109 @@
+"""
+Regularization grid benchmark: one fit per alpha vs the path solvers.
+
+Fits Ridge and Lasso for a log-spaced grid of alphas on the diabetes data
+expanded with PolynomialFeatures + StandardScaler (as in model.py), once with
+a separate fit() per alpha and once with linear_paths.fit_candidates. Reports
+both timings and how far apart the solutions are: the largest coefficient
+difference for Ridge, and for Lasso the worst relative objective of the path
+solution vs fit() (positive: the path stopped higher; higher degrees have
+collinear features, so Lasso coefficients need not be unique while the
+objective is). Then times model.py's full grid with
+GridSearchCV and with hyperparameter_search.search.
+Run from the repository root:
+    python benchmarks/bench_linear_paths.py [--alphas 3 10 30 100] [--degrees 1 2 3]
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+from sklearn.datasets import load_diabetes
+from sklearn.linear_model import Lasso, LinearRegression, Ridge
+from sklearn.model_selection import GridSearchCV, KFold
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import PolynomialFeatures, StandardScaler
+
+sys.path.append(os.getcwd())
+
+from hyperparameter_search import search
+from linear_paths import fit_candidates
+
+warnings.filterwarnings("ignore")
+
+
+def lasso_objective(model, X, y):
+    residual = y - X @ model.coef_ - model.intercept_
+    return residual @ residual / (2 * len(y)) + model.alpha * np.abs(model.coef_).sum()
+
+
+def best_time(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return min(samples) * 1000, result
+
+
+def bench_alphas(X, y, degrees, alpha_counts, repeat):
+    print(f"{'model':6s} {'degree':>6s} {'features':>8s} {'alphas':>6s} {'per-alpha ms':>12s} "
+          f"{'path ms':>8s} {'speedup':>7s} {'max diff':>9s}")
+    for degree in degrees:
+        Xt = StandardScaler().fit_transform(PolynomialFeatures(degree, include_bias=False).fit_transform(X))
+        for name, make in (("ridge", lambda a: Ridge(alpha=a)), ("lasso", lambda a: Lasso(alpha=a, max_iter=5000))):
+            for n_alphas in alpha_counts:
+                alphas = np.logspace(-2, 2, n_alphas)
+                single_ms, single = best_time(lambda: [make(a).fit(Xt, y) for a in alphas], repeat)
+                path_ms, path = best_time(lambda: fit_candidates([make(a) for a in alphas], Xt, y), repeat)
+                if name == "ridge":
+                    diff = max(np.abs(a.coef_ - b.coef_).max() for a, b in zip(single, path))
+                else:
+                    diff = max(lasso_objective(b, Xt, y) / lasso_objective(a, Xt, y) - 1
+                               for a, b in zip(single, path))
+                print(f"{name:6s} {degree:6d} {Xt.shape[1]:8d} {n_alphas:6d} {single_ms:12.1f} "
+                      f"{path_ms:8.1f} {single_ms / path_ms:6.1f}x {diff:+9.1e}")
+
+
+def bench_search(X, y, alpha_counts):
+    """model.py's pipeline and grid, with n alphas per regularized model."""
+    pipeline = Pipeline([
+        ("poly", PolynomialFeatures(include_bias=False)),
+        ("scaler", StandardScaler()),
+        ("model", LinearRegression()),
+    ])
+    kfold = KFold(n_splits=5, shuffle=True, random_state=42)
+    print(f"\n{'alphas':>6s} {'GridSearchCV s':>14s} {'search s':>9s} {'speedup':>7s} {'same best':>9s}")
+    for n_alphas in alpha_counts:
+        alphas = list(np.logspace(-2, 2, n_alphas))
+        param_grid = [
+            {"poly__degree": [1, 2], "model": [LinearRegression()], "model__fit_intercept": [True, False]},
+            {"poly__degree": [1, 2], "model": [Ridge()], "model__alpha": alphas},
+            {"poly__degree": [1, 2], "model": [Lasso(max_iter=5000)], "model__alpha": alphas},
+        ]
+        start = time.perf_counter()
+        grid = GridSearchCV(pipeline, param_grid, cv=kfold, scoring="r2").fit(X, y)
+        grid_s = time.perf_counter() - start
+        result = search(pipeline, param_grid, X, y, cv=kfold, scoring="r2")
+        same = repr(grid.best_params_) == repr(result.best_params)
+        print(f"{n_alphas:6d} {grid_s:14.2f} {result.wall_time:9.2f} {grid_s / result.wall_time:6.1f}x {str(same):>9s}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--alphas", type=int, nargs="+", default=[3, 10, 30, 100], help="grid sizes")
+    parser.add_argument("--degrees", type=int, nargs="+", default=[1, 2, 3], help="polynomial degrees")
+    parser.add_argument("--repeat", type=int, default=3, help="timing repeats (best is reported)")
+    parser.add_argument("--skip-search", action="store_true", help="only time the per-fold fits")
+    args = parser.parse_args()
+
+    X, y = load_diabetes(return_X_y=True)
+    bench_alphas(X, y, args.degrees, args.alphas, args.repeat)
+    if not args.skip_search:
+        bench_search(X, y, args.alphas[:3])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Prediction log benchmark: what the audit trail costs a request.
+
+- log(): time of one PredictionLogger.log() call (what a request pays) for
+  single-row and 64-row records, next to a single-row banknote predict, and
+  the rows/s the writer thread sustains
+- full queue: a burst larger than the queue under each full-queue policy,
+  with the rows dropped and the p99 of log() (the block policy waits)
+- HTTP: the Flask server under load with PREDICTION_LOG off and on, single-row
+  diabetes and banknote predictions (random rows, so the cache does not hide
+  the predict cost)
+
+Run from the repository root:
+    python benchmarks/bench_prediction_log.py [--connections 1 16] [--duration 5]
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+
+sys.path.append(os.getcwd())
+
+from bench_async import request_bodies, run_load, start_server
+from prediction_log import FULL_POLICIES, PredictionLogger
+
+warnings.filterwarnings("ignore")
+
+BANKNOTE_FEATURES = ["var", "skew", "curt", "entr"]
+
+
+def percentiles_us(seconds):
+    seconds = np.array(seconds) * 1e6
+    return float(np.percentile(seconds, 50)), float(np.percentile(seconds, 99))
+
+
+def bench_log_calls(directory, n_calls=20000):
+    import app
+
+    rng = np.random.default_rng(0)
+    results = {}
+
+    # The request-path work the log is added to: one single-row banknote predict
+    rows = rng.normal(0, 3, (n_calls, 4))
+    times = []
+    for i in range(2000):
+        start = time.perf_counter()
+        app.banknote_rows(rows[i:i + 1])
+        times.append(time.perf_counter() - start)
+    results["banknote_predict_1_row"] = percentiles_us(times)
+
+    for batch_rows in (1, 64):
+        logger = PredictionLogger(os.path.join(directory, f"rows{batch_rows}"), max_queue_rows=10 ** 7)
+        features = rng.normal(0, 3, (batch_rows, 4))
+        outputs = app.banknote_rows(features)
+        times = []
+        start_all = time.perf_counter()
+        for _ in range(n_calls):
+            start = time.perf_counter()
+            logger.log("banknote", "v1", features, BANKNOTE_FEATURES, outputs, "/api/banknote/authenticate")
+            times.append(time.perf_counter() - start)
+        logger.flush()
+        elapsed = time.perf_counter() - start_all
+        stats = logger.stats()
+        logger.close()
+        results[f"log_{batch_rows}_rows"] = percentiles_us(times)
+        results[f"writer_rows_per_second_{batch_rows}"] = stats["written_rows"] / elapsed
+    return results
+
+
+def bench_full_queue(directory, n_calls=20000, max_queue_rows=1000):
+    rng = np.random.default_rng(1)
+    features = rng.normal(0, 3, (1, 4))
+    outputs = [(1, [0.1, 0.9])]
+    results = {}
+    for policy in FULL_POLICIES:
+        logger = PredictionLogger(os.path.join(directory, policy), max_queue_rows=max_queue_rows,
+                                  flush_rows=max_queue_rows * 10, flush_interval=0.05,
+                                  full_policy=policy, block_timeout=0.005)
+        times = []
+        for _ in range(n_calls):
+            start = time.perf_counter()
+            logger.log("banknote", "v1", features, BANKNOTE_FEATURES, outputs)
+            times.append(time.perf_counter() - start)
+        logger.flush()
+        stats = logger.stats()
+        logger.close()
+        results[policy] = {
+            "p99_us": percentiles_us(times)[1],
+            "written_rows": stats["written_rows"],
+            "dropped_rows": sum(stats["dropped_rows"].values()),
+        }
+    return results
+
+
+def bench_http(directory, connections, duration, port):
+    bodies = request_bodies()
+    results = {}
+    for enabled in ("0", "1"):
+        env = dict(os.environ, MODEL_LOADING="eager", PREDICTION_LOG=enabled,
+                   PREDICTION_LOG_DIR=os.path.join(directory, "http"))
+        process = start_server("flask", port, env)
+        try:
+            asyncio.run(run_load(port, bodies, 4, 0.5, 0))  # warm up
+            for n in connections:
+                results[f"log={enabled}/{n}"] = asyncio.run(run_load(port, bodies, n, duration, 0))
+        finally:
+            process.terminate()
+            process.wait()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", type=int, nargs="+", default=[1, 16])
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per HTTP load level")
+    parser.add_argument("--port", type=int, default=5056)
+    parser.add_argument("--skip-http", action="store_true")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="prediction_log_bench_")
+    try:
+        results = {"log_calls": bench_log_calls(directory), "full_queue": bench_full_queue(directory)}
+        print(f"{'in process':28s} {'p50 (us)':>9s} {'p99 (us)':>9s}")
+        for name in ("banknote_predict_1_row", "log_1_rows", "log_64_rows"):
+            p50, p99 = results["log_calls"][name]
+            print(f"{name:28s} {p50:9.2f} {p99:9.2f}")
+        for batch_rows in (1, 64):
+            print(f"writer, {batch_rows:2d}-row records: {results['log_calls'][f'writer_rows_per_second_{batch_rows}']:,.0f} rows/s")
+
+        print(f"\n{'full queue policy':18s} {'p99 (us)':>9s} {'written':>8s} {'dropped':>8s}")
+        for policy, result in results["full_queue"].items():
+            print(f"{policy:18s} {result['p99_us']:9.2f} {result['written_rows']:8d} {result['dropped_rows']:8d}")
+
+        if not args.skip_http:
+            results["http"] = bench_http(directory, args.connections, args.duration, args.port)
+            print(f"\n{'server':14s} {'req/s':>9s} {'p50 (ms)':>9s} {'p99 (ms)':>9s} {'errors':>7s}")
+            for name, result in results["http"].items():
+                print(f"{name:14s} {result['throughput_rps']:9.0f} {result['p50_ms'] or 0:9.2f} "
+                      f"{result['p99_ms'] or 0:9.2f} {result['errors']:7d}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
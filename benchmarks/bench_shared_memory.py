@@ -0,0 +1,111 @@
+"""
+Memory benchmark for multi-process serving: per-worker RSS / PSS / USS.
+
+Starts N worker processes that each import app.py, load every model and run
+a few predictions, then reads /proc/<pid>/smaps_rollup while they are alive.
+PSS splits shared pages evenly between the processes mapping them, so with
+SHARED_MODELS=1 the per-worker PSS should drop as workers are added, while
+with private copies it stays flat. Linux only. Run from the repository root:
+    python benchmarks/bench_shared_memory.py [--workers 1 2 4 8]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+MODES = {
+    "sklearn": {"USE_COMPILED_MODELS": "0", "SHARED_MODELS": ""},
+    "private": {"USE_COMPILED_MODELS": "1", "SHARED_MODELS": ""},
+    "shared": {"USE_COMPILED_MODELS": "1", "SHARED_MODELS": "1"},
+}
+
+WORKER = """
+import sys, warnings
+warnings.filterwarnings("ignore")
+import numpy as np
+if sys.argv[1] == "models":
+    import app
+    app.registry.load_all()
+    rng = np.random.default_rng(0)
+    app.predict_diabetes_matrix(rng.normal(0, 0.05, (200, 9)))
+    app.predict_banknote_matrix(rng.normal(0, 3, (200, 4)))
+    app.predict_breast_cancer_matrix(np.abs(rng.normal(10, 5, (200, 30))))
+    if app.os.path.exists("bitcoin_model.joblib"):
+        app.predict_bitcoin_matrix(rng.normal(60000, 300, 200), app.datetime.now(app.timezone.utc))
+else:
+    import flask, flask_cors, inference
+print("ready", flush=True)
+sys.stdin.readline()
+"""
+
+
+def memory_kb(pid):
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "rss": fields["Rss"],
+        "pss": fields["Pss"],
+        "uss": fields["Private_Clean"] + fields["Private_Dirty"],
+    }
+
+
+def measure(n_workers, env, what="models"):
+    workers = [
+        subprocess.Popen(
+            [sys.executable, "-c", WORKER, what],
+            env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+        )
+        for _ in range(n_workers)
+    ]
+    try:
+        for worker in workers:
+            if worker.stdout.readline().strip() != "ready":
+                raise RuntimeError("worker failed to start")
+        samples = [memory_kb(worker.pid) for worker in workers]
+    finally:
+        for worker in workers:
+            worker.stdin.close()
+            worker.wait()
+
+    return {key: sum(sample[key] for sample in samples) / n_workers for key in ("rss", "pss", "uss")}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    # Interpreter + flask + numpy without any model, measured at the same worker
+    # count (shared libraries are split the same way) and subtracted from PSS
+    baselines = {n_workers: measure(n_workers, dict(os.environ), what="baseline") for n_workers in args.workers}
+    for n_workers, baseline in baselines.items():
+        print(f"baseline, {n_workers} workers (no models): PSS/worker {baseline['pss'] / 1024:.1f} MB")
+    print()
+
+    results = {f"baseline/{n}": baseline for n, baseline in baselines.items()}
+    print(f"{'mode':8s} {'workers':>7s} {'RSS/worker':>11s} {'PSS/worker':>11s} {'USS/worker':>11s} {'model PSS/worker':>17s}")
+    for mode in args.modes:
+        env = dict(os.environ, **MODES[mode])
+        for n_workers in args.workers:
+            result = measure(n_workers, env)
+            result["model_pss"] = result["pss"] - baselines[n_workers]["pss"]
+            results[f"{mode}/{n_workers}"] = result
+            print(
+                f"{mode:8s} {n_workers:7d} {result['rss'] / 1024:9.1f}MB {result['pss'] / 1024:9.1f}MB "
+                f"{result['uss'] / 1024:9.1f}MB {result['model_pss'] / 1024:15.1f}MB"
+            )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
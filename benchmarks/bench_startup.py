@@ -0,0 +1,87 @@
+"""
+Startup benchmark: import time of app.py and per-model load time.
+
+Each loading mode is measured in a fresh interpreter so module caches do not
+hide the cold-start cost. Run from the repository root:
+    python benchmarks/bench_startup.py [--modes lazy parallel] [--budget 2.0]
+
+With --budget the script exits with status 1 when importing app.py takes
+longer than the budget (in seconds) in any mode, so it can gate CI.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+PROBE = """
+import json, time, warnings
+warnings.filterwarnings("ignore")
+start = time.perf_counter()
+import app
+import_time = time.perf_counter() - start
+start = time.perf_counter()
+app.registry.load_all()
+first_use = time.perf_counter() - start
+print(json.dumps({
+    "import_time": import_time,
+    "ready_time": import_time + first_use,
+    "load_times": app.registry.load_times,
+}))
+"""
+
+
+def run_probe(mode, mmap_mode, importtime):
+    env = dict(os.environ, MODEL_LOADING=mode, MODEL_MMAP_MODE=mmap_mode or "")
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", PROBE]
+    result = subprocess.run(command, env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def slowest_imports(stderr, top=10):
+    # Lines look like: "import time:   self [us] | cumulative | imported package"
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", default=["eager", "parallel", "lazy"])
+    parser.add_argument("--mmap-mode", default=None, help="e.g. 'r' to memory-map numpy arrays")
+    parser.add_argument("--budget", type=float, default=None, help="max seconds for 'import app'")
+    parser.add_argument("--importtime", action="store_true", help="list the slowest module imports")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = {}
+    over_budget = False
+    for mode in args.modes:
+        result, stderr = run_probe(mode, args.mmap_mode, args.importtime)
+        results[mode] = result
+
+        print(f"\n[{mode}] import app: {result['import_time']:.3f}s, all models ready: {result['ready_time']:.3f}s")
+        for name, seconds in sorted(result["load_times"].items(), key=lambda item: -item[1]):
+            print(f"    {name:14s} {seconds:.3f}s")
+        if args.importtime:
+            print("    slowest imports (cumulative):")
+            for micros, name in slowest_imports(stderr):
+                print(f"    {micros / 1000:9.1f} ms  {name}")
+
+        if args.budget is not None and result["import_time"] > args.budget:
+            print(f"    !! import time exceeds budget of {args.budget:.3f}s")
+            over_budget = True
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
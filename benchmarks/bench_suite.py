@@ -0,0 +1,234 @@
+"""
+Benchmark suite for the prediction API: HTTP load tests plus in-process
+microbenchmarks, saved as JSON so runs can be compared across commits.
+
+Load tests start the server (Flask or asyncio, see bench_async.py) in a
+subprocess and drive each single-row endpoint on its own with concurrent
+keep-alive connections. They report requests/s, p50/p95/p99 latency and the
+server's resident and peak memory. Microbenchmarks time each model's
+transform and predict steps in this process, with the Python heap
+allocated per call (tracemalloc). Run from the repository root:
+    python benchmarks/bench_suite.py [--output results.json] [--compare previous.json]
+
+The output defaults to benchmarks/results/<git commit>.json.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import warnings
+from datetime import datetime, timezone
+
+import numpy as np
+
+sys.path.append(os.getcwd())
+
+from bench_async import post_request, run_load, start_server
+
+warnings.filterwarnings("ignore")
+
+ENDPOINTS = {
+    "diabetes": "/api/diabetes/predict",
+    "banknote": "/api/banknote/authenticate",
+    "breastcancer": "/api/breastcancer/predict",
+    "bitcoin": "/api/bitcoin/predict",
+}
+
+
+def sample_rows(name, n, rng, feature_names=None):
+    if name == "diabetes":
+        return rng.normal(0, 0.05, (n, 9))
+    if name == "banknote":
+        return rng.normal(0, 3, (n, 4))
+    if name == "breastcancer":
+        return np.abs(rng.normal(10, 5, (n, len(feature_names))))
+    return rng.normal(60000, 300, (n, 1))
+
+
+def endpoint_bodies(name, feature_names, n=2000, seed=0):
+    # Random rows so the prediction cache does not hide the predict cost
+    rows = sample_rows(name, n, np.random.default_rng(seed), feature_names)
+    return [post_request(ENDPOINTS[name], dict(zip(feature_names, map(float, row)))) for row in rows]
+
+
+def server_memory_kb(pid):
+    fields = {}
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            fields[name] = value.split()
+    return {"rss_kb": int(fields["VmRSS"][0]), "peak_rss_kb": int(fields["VmHWM"][0])}
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+# ================================
+# HTTP Load Tests
+# ================================
+def load_tests(server, feature_names, connections, duration, port):
+    env = dict(os.environ, MODEL_LOADING="eager")
+    process = start_server(server, port, env)
+    results = {}
+    try:
+        for name, path in ENDPOINTS.items():
+            bodies = endpoint_bodies(name, feature_names[name])
+            asyncio.run(run_load(port, bodies, 4, 0.5, 0))  # warm up
+            for n_connections in connections:
+                result = asyncio.run(run_load(port, bodies, n_connections, duration, 0))
+                result.update(server_memory_kb(process.pid))
+                results[f"{name}/{n_connections}"] = result
+                print(
+                    f"{path:30s} {n_connections:6d} {result['throughput_rps']:9.0f} {result['p50_ms']:9.2f} "
+                    f"{result['p95_ms']:9.2f} {result['p99_ms']:9.2f} {result['rss_kb'] / 1024:8.1f} {result['errors']:7d}"
+                )
+    finally:
+        process.terminate()
+        process.wait()
+    return results
+
+
+# ================================
+# Model Microbenchmarks
+# ================================
+def model_steps(app, feature_names, rows, rng):
+    """(model, step, fn, X) for the transform and predict step of every model."""
+    banknote = app.registry.get("banknote")
+    breast_cancer = app.registry.get("breastcancer")
+    banknote_X = sample_rows("banknote", rows, rng)
+    breast_cancer_X = sample_rows("breastcancer", rows, rng, feature_names["breastcancer"])
+    prices = sample_rows("bitcoin", rows, rng)[:, 0]
+
+    steps = [
+        ("diabetes", "predict", app.registry.get("diabetes").predict, sample_rows("diabetes", rows, rng)),
+        ("banknote", "transform", banknote["transformer"].transform, banknote_X[:, 2:4]),
+        ("banknote", "predict_proba", banknote["model"].predict_proba, banknote_X),
+        ("breastcancer", "transform", breast_cancer["transformer"].transform, breast_cancer_X),
+        ("breastcancer", "predict_proba", breast_cancer["model"].predict_proba,
+         breast_cancer["transformer"].transform(breast_cancer_X)),
+    ]
+    if "bitcoin" in feature_names:
+        steps.append(("bitcoin", "predict", app.registry.get("bitcoin").predict,
+                      app.bitcoin_feature_matrix(prices, datetime.now(timezone.utc))))
+    return steps
+
+
+def time_step(fn, X, repeat):
+    fn(X)  # warm up
+    samples = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn(X)
+        samples[i] = time.perf_counter() - start
+
+    tracemalloc.start()
+    fn(X)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99]) * 1e6
+    return {
+        "p50_us": p50,
+        "p95_us": p95,
+        "p99_us": p99,
+        "rows_per_second": len(X) / np.median(samples),
+        "peak_alloc_kb": peak / 1024,
+    }
+
+
+def microbenchmarks(app, feature_names, row_counts, repeat):
+    rng = np.random.default_rng(0)
+    results = {}
+    for rows in row_counts:
+        for name, step, fn, X in model_steps(app, feature_names, rows, rng):
+            result = time_step(fn, X, max(5, repeat * 100 // max(rows, 100)))
+            results[f"{name}/{step}/{rows}"] = result
+            print(
+                f"{name:14s} {step:14s} {rows:6d} {result['p50_us']:10.1f} {result['p95_us']:10.1f} "
+                f"{result['p99_us']:10.1f} {result['rows_per_second']:12.0f} {result['peak_alloc_kb']:10.1f}"
+            )
+    return results
+
+
+# ================================
+# Comparison
+# ================================
+def compare(current, previous):
+    print(f"\nChange vs {previous['commit']} (ratio current / previous, < 1 is faster):")
+    for section, metric in [("load", "p50_ms"), ("load", "p99_ms"), ("load", "throughput_rps"),
+                            ("micro", "p50_us"), ("micro", "p99_us")]:
+        for key, result in current.get(section, {}).items():
+            before = previous.get(section, {}).get(key, {}).get(metric)
+            if before:
+                print(f"  {section:5s} {key:32s} {metric:15s} {result[metric] / before:6.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--server", default="flask", choices=["flask", "asyncio"])
+    parser.add_argument("--connections", type=int, nargs="+", default=[1, 16])
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds per load test")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 1000], help="batch sizes for microbenchmarks")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--skip-load", action="store_true", help="only run the microbenchmarks")
+    parser.add_argument("--port", type=int, default=5056)
+    parser.add_argument("--output", help="JSON file for the results")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    args = parser.parse_args()
+
+    import app
+
+    app.registry.load_all()
+    feature_names = {
+        "diabetes": app.DIABETES_FEATURES,
+        "banknote": app.BANKNOTE_FEATURES,
+        "breastcancer": app.registry.get("breastcancer")["feature_names"],
+        "bitcoin": app.BITCOIN_FEATURES,
+    }
+    if "bitcoin" not in app.registry.models:
+        del feature_names["bitcoin"]
+        del ENDPOINTS["bitcoin"]
+
+    commit = git_commit()
+    results = {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "server": args.server,
+    }
+
+    if not args.skip_load:
+        print(f"{'endpoint':30s} {'conns':>6s} {'req/s':>9s} {'p50 (ms)':>9s} {'p95 (ms)':>9s} {'p99 (ms)':>9s} {'RSS (MB)':>8s} {'errors':>7s}")
+        results["load"] = load_tests(args.server, feature_names, args.connections, args.duration, args.port)
+        print()
+
+    print(f"{'model':14s} {'step':14s} {'rows':>6s} {'p50 (us)':>10s} {'p95 (us)':>10s} {'p99 (us)':>10s} {'rows/s':>12s} {'alloc (KB)':>10s}")
+    results["micro"] = microbenchmarks(app, feature_names, args.rows, args.repeat)
+
+    output = args.output or os.path.join("benchmarks", "results", f"{commit}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
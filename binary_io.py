@@ -0,0 +1,168 @@
+"""
+Binary request and response bodies for bulk scoring.
+
+The predict_batch routes accept a feature matrix as a .npy file or an Arrow
+IPC stream/file instead of JSON, and can answer in the same format:
+
+- .npy: a 2-D numeric array. The column order is the model's feature order
+  unless the client declares its own with an X-Feature-Names header
+  (comma separated). The array is read straight out of the request bytes
+  with np.frombuffer, so a C-ordered float64 matrix is never copied.
+- Arrow IPC: one column per feature, matched by name. pyarrow is only
+  imported when an Arrow body arrives or is requested.
+
+Responses are a structured .npy array or an Arrow table with one named
+field per output column (prediction, probability_0, ...).
+"""
+import io
+
+import numpy as np
+
+NPY_TYPE = "application/x-npy"
+ARROW_STREAM_TYPE = "application/vnd.apache.arrow.stream"
+ARROW_FILE_TYPE = "application/vnd.apache.arrow.file"
+OCTET_STREAM_TYPE = "application/octet-stream"
+
+BINARY_TYPES = (NPY_TYPE, ARROW_STREAM_TYPE, ARROW_FILE_TYPE, OCTET_STREAM_TYPE)
+
+NPY_MAGIC = b"\x93NUMPY"
+ARROW_FILE_MAGIC = b"ARROW1"
+ARROW_CONTINUATION = b"\xff\xff\xff\xff"
+
+
+class BinaryFormatError(ValueError):
+    pass
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise BinaryFormatError("Arrow IPC bodies need pyarrow installed, send a .npy file instead")
+    return pa
+
+
+def is_binary(content_type):
+    return (content_type or "").split(";")[0].strip().lower() in BINARY_TYPES
+
+
+def sniff_format(body, content_type=None):
+    """'npy' or 'arrow' from the content type, or from the magic bytes for octet-stream."""
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type == NPY_TYPE or body.startswith(NPY_MAGIC):
+        return "npy"
+    if content_type in (ARROW_STREAM_TYPE, ARROW_FILE_TYPE) or body[:6] == ARROW_FILE_MAGIC \
+            or body[:4] == ARROW_CONTINUATION:
+        return "arrow"
+    raise BinaryFormatError("Unrecognized binary body, expected a .npy file or an Arrow IPC stream")
+
+
+# ================================
+# Reading Feature Matrices
+# ================================
+def read_npy(body):
+    """Array view over the bytes of a .npy file (no copy of the data)."""
+    stream = io.BytesIO(body)
+    try:
+        version = np.lib.format.read_magic(stream)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(stream)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(stream)
+    except ValueError as e:
+        raise BinaryFormatError(f"Invalid .npy body: {e}")
+    if dtype.hasobject:
+        raise BinaryFormatError("Object arrays are not accepted")
+
+    count = int(np.prod(shape))
+    if len(body) - stream.tell() < count * dtype.itemsize:
+        raise BinaryFormatError("Truncated .npy body")
+    array = np.frombuffer(body, dtype=dtype, count=count, offset=stream.tell())
+    return array.reshape(shape, order="F" if fortran_order else "C")
+
+
+def read_arrow(body):
+    """(column names, list of 1-D arrays) of an Arrow IPC stream or file."""
+    pa = _pyarrow()
+
+    try:
+        if body[:6] == ARROW_FILE_MAGIC:
+            table = pa.ipc.open_file(pa.py_buffer(body)).read_all()
+        else:
+            table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+    except pa.ArrowInvalid as e:
+        raise BinaryFormatError(f"Invalid Arrow body: {e}")
+    # Single-chunk, null-free numeric columns come back without a copy
+    return table.column_names, [column.to_numpy() for column in table.columns]
+
+
+def read_matrix(body, content_type, feature_names, declared_names=None):
+    """
+    Decode a binary body into an (n_rows, n_features) float64 matrix in the
+    model's feature order. Returns (matrix, format).
+    """
+    fmt = sniff_format(body, content_type)
+
+    if fmt == "npy":
+        array = read_npy(body)
+        if array.ndim != 2:
+            raise BinaryFormatError(f"Expected a 2-D array, got shape {array.shape}")
+        names = declared_names or feature_names
+        if len(names) != array.shape[1]:
+            raise BinaryFormatError(f"Array has {array.shape[1]} columns but {len(names)} feature names")
+        columns = None
+    else:
+        names, columns = read_arrow(body)
+        array = None
+
+    index = {name: j for j, name in enumerate(names)}
+    missing = [name for name in feature_names if name not in index]
+    if missing:
+        raise BinaryFormatError(f"Missing features: {missing}")
+    order = [index[name] for name in feature_names]
+
+    if columns is not None:
+        matrix = np.empty((len(columns[0]) if columns else 0, len(feature_names)))
+        for j, k in enumerate(order):
+            matrix[:, j] = columns[k]
+        return matrix, fmt
+
+    if order != list(range(array.shape[1])):
+        array = array[:, order]
+    # No-op for a float64 array already in the model's order
+    return np.asarray(array, dtype=np.float64), fmt
+
+
+# ================================
+# Writing Results
+# ================================
+def response_format(accept, request_format):
+    """Binary format for the response, or None for JSON."""
+    accept = (accept or "").lower()
+    if NPY_TYPE in accept:
+        return "npy"
+    if ARROW_STREAM_TYPE in accept or ARROW_FILE_TYPE in accept:
+        return "arrow"
+    if "application/json" in accept:
+        return None
+    # No preference (or octet-stream): answer in the format the client sent
+    return request_format
+
+
+def write_table(columns, fmt):
+    """Encode {name: 1-D array} as .npy (structured) or Arrow IPC; returns (bytes, mimetype)."""
+    if fmt == "npy":
+        n_rows = len(next(iter(columns.values()))) if columns else 0
+        table = np.empty(n_rows, dtype=[(name, values.dtype) for name, values in columns.items()])
+        for name, values in columns.items():
+            table[name] = values
+        buffer = io.BytesIO()
+        np.save(buffer, table, allow_pickle=False)
+        return buffer.getvalue(), NPY_TYPE
+
+    pa = _pyarrow()
+    table = pa.table({name: pa.array(values) for name, values in columns.items()})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes(), ARROW_STREAM_TYPE
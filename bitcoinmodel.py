@@ -1,57 +1,131 @@
-import yfinance as yf
-import pandas as pd
-import numpy as np
-from sklearn.ensemble import RandomForestRegressor
-import joblib
+import argparse
+import os
 import time
+from datetime import datetime, timezone
 
-df = yf.download("BTC-USD", period="1d", interval="1m", progress=False)
-
-if df.empty:
-    raise Exception("No data retrieved.")
-
-if isinstance(df.columns, pd.MultiIndex):
-    df.columns = df.columns.get_level_values(0)
-
-df.head()
-
-df = df.reset_index()
-
-df.head()
-
-
-df = df.rename(columns={"Datetime": "timestamp"})
-df = df.rename(columns={"Close": "price"})
-df = df[["timestamp", "price"]]
-df.head(10)
-
-# Feature Engineering
-df["hour"] = df["timestamp"].dt.hour
-df["minute"] = df["timestamp"].dt.minute
-df["dayofweek"] = df["timestamp"].dt.dayofweek
-
-df["lag1"] = df["price"].shift(1)
-df["lag2"] = df["price"].shift(2)
-
-#predict 2 minutes ahead
-df["target"] = df["price"].shift(-2)
-
-df = df.dropna()
-
-print (df)
-
-X = df[["lag1", "lag2", "price", "hour", "minute", "dayofweek"]]
-y = df["target"]
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
 
-model = RandomForestRegressor(n_estimators=200, random_state=42)
-model.fit(X, y)
+from bar_store import MAX_HORIZON, SINGLE_HORIZON, BarStore, CsvFeed, YahooFeed, bar_features
+from training_cache import TrainingRun, prune_runs
+
+RUN_NAME = "bitcoin_forest"
+MODEL_PATH = "bitcoin_model.joblib"
+SYMBOL = "BTC-USD"
+MODEL_PARAMS = {"n_estimators": 200, "random_state": 42}
+# One output per minute ahead; the trees' splits are shared by all horizons,
+# so one predict call returns the whole curve. --single trains the original
+# 2-minute model.
+HORIZONS = tuple(range(1, MAX_HORIZON + 1))
+
+# A full fit trains on the last WINDOW bars (one day, as the old daily download).
+# An update adds TREES_PER_UPDATE warm-started trees fitted on the current
+# window, then drops trees whose window ended more than MAX_TREE_AGE minutes
+# ago and the oldest ones beyond MODEL_PARAMS["n_estimators"].
+WINDOW = 1440
+TREES_PER_UPDATE = 20
+MAX_TREE_AGE = 1440
+# Versions of the run kept in training_cache/ (one is written per update)
+KEEP_VERSIONS = 5
+
+
+def window_features(store, horizons):
+    minutes, prices = store.tail(WINDOW)
+    X, y = bar_features(minutes, prices, horizons)
+    if not len(X):
+        raise Exception("Not enough bars in the store to train on.")
+    return X, y
+
+
+def full_fit(store, horizons):
+    X, y = window_features(store, horizons)
+    print(f"Full fit of {MODEL_PARAMS['n_estimators']} trees on {len(X)} rows, horizons {list(horizons)}")
+
+    model = RandomForestRegressor(**MODEL_PARAMS)
+    model.fit(X, y)
+    # Last bar (epoch minute) of the window each tree was fitted on, in estimators_ order
+    through = store.last_minute()
+    model.bar_state_ = {"through": through, "tree_minutes": [through] * len(model.estimators_)}
+    return model
+
+
+def update(model, store, horizons):
+    """Add trees fitted on the current window and drop the stale ones."""
+    through = store.last_minute()
+    X, y = window_features(store, horizons)
+    print(f"Adding {TREES_PER_UPDATE} trees on {len(X)} rows, "
+          f"{through - model.bar_state_['through']} minutes after the last update")
+
+    n_trees = len(model.estimators_)
+    # A new seed per update: once trees are dropped, warm start would
+    # otherwise give the new trees seeds that were already used
+    model.set_params(warm_start=True, n_estimators=n_trees + TREES_PER_UPDATE, random_state=through % 2**31)
+    model.fit(X, y)
+    tree_minutes = model.bar_state_["tree_minutes"] + [through] * TREES_PER_UPDATE
+
+    keep = [i for i, minute in enumerate(tree_minutes) if through - minute <= MAX_TREE_AGE]
+    keep = keep[-MODEL_PARAMS["n_estimators"]:]
+    model.estimators_ = [model.estimators_[i] for i in keep]
+    model.set_params(n_estimators=len(keep), warm_start=False)
+    model.bar_state_ = {"through": through, "tree_minutes": [tree_minutes[i] for i in keep]}
+    print(f"Model has {len(keep)} trees, {len(tree_minutes) - len(keep)} dropped")
+    return model
+
+
+def current_model():
+    """The served model if it can be updated incrementally, else None."""
+    if not os.path.exists(MODEL_PATH):
+        return None
+    model = joblib.load(MODEL_PATH)
+    return model if hasattr(model, "bar_state_") else None
+
+
+def train(feed=None, full=False, horizons=HORIZONS):
+    store = BarStore.open(SYMBOL)
+    added = store.sync(feed or YahooFeed(SYMBOL))
+    print(f"{added} new bars, {len(store)} in {store.path}")
+
+    base = None if full else current_model()
+    if base is not None and base.n_outputs_ != len(horizons):
+        print("Horizons changed, refitting every tree")
+        base = None
+    if base is not None and base.bar_state_["through"] == store.last_minute():
+        print("No new bars since the last update")
+        return None
+
+    # The key holds the base model and the last bar, so rerunning on an
+    # unchanged store and model is a cache hit
+    params = {
+        "model": MODEL_PARAMS,
+        "window": WINDOW,
+        "trees_per_update": TREES_PER_UPDATE,
+        "max_tree_age": MAX_TREE_AGE,
+        "horizons": list(horizons),
+        "through": store.last_minute(),
+        "base": joblib.hash(base) if base is not None else None,
+    }
+    run = TrainingRun(RUN_NAME, code=[__file__, "bar_store.py"], params=params)
+    if run.is_cached():
+        print(f"Bars, code and parameters unchanged, reusing {run.version}")
+    else:
+        start = time.perf_counter()
+        model = full_fit(store, horizons) if base is None else update(base, store, horizons)
+        elapsed = time.perf_counter() - start
+        run.save({"model": model}, metrics={"fit_seconds": round(elapsed, 3), "trees": len(model.estimators_)})
+        print(f"Trained in {elapsed:.2f}s")
+
+    # Save model to joblib file
+    run.publish({MODEL_PATH: "model"})
+    prune_runs(RUN_NAME, KEEP_VERSIONS)
+    print(f"Model saved to {MODEL_PATH} ({run.version})")
+    return run
 
-# Save model to joblib file
-joblib.dump(model, "bitcoin_model.joblib")
-print("Model saved to bitcoin_model.joblib")
 
 def predict_next_two_minutes(model, current_price):
-    now = pd.Timestamp.now()
+    # The 2-minute output of either model: column 1 of the 1..15 minute curve
+    # UTC, like the bar times the model is trained on
+    now = datetime.now(timezone.utc)
 
     X = np.array([[
         current_price,
@@ -59,19 +133,35 @@ def predict_next_two_minutes(model, current_price):
         current_price,
         now.hour,
         now.minute,
-        now.dayofweek
+        now.weekday()
     ]])
 
-    return model.predict(X)[0]
+    prediction = model.predict(X)[0]
+    return prediction[SINGLE_HORIZON[0] - 1] if np.ndim(prediction) else prediction
 
 # Only run prediction if this script is executed directly
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train or update the bitcoin model from the local bar store")
+    parser.add_argument("--feed", help="CSV of bars to read instead of downloading from Yahoo")
+    parser.add_argument("--full", action="store_true", help="refit every tree instead of updating")
+    parser.add_argument("--every", type=float, default=None, help="keep updating every N seconds")
+    parser.add_argument("--single", action="store_true", help="train only the 2-minute output")
+    args = parser.parse_args()
+    feed = CsvFeed(args.feed) if args.feed else YahooFeed(SYMBOL)
+    horizons = SINGLE_HORIZON if args.single else HORIZONS
+
+    if args.every:
+        while True:
+            train(feed, args.full, horizons)
+            time.sleep(args.every)
+
+    train(feed, args.full, horizons)
+
     # Load the model from joblib file
     model = joblib.load("bitcoin_model.joblib")
     print("Model loaded from bitcoin_model.joblib")
-    
+
     user_price = float(input("Enter current Bitcoin price: "))
     prediction = predict_next_two_minutes(model, user_price)
 
     print("\nPredicted price in next 2 minutes:", round(prediction, 2))
-
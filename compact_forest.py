@@ -0,0 +1,133 @@
+"""
+Compact the bitcoin RandomForestRegressor for serving.
+
+Converts bitcoin_model.joblib into contiguous int32 / float32 node arrays
+(see inference.compact_trees), optionally keeping fewer trees or capping the
+depth, writes it where app.py looks for it, and reports artifact size, load
+time, single-row p50/p99 latency and the accuracy difference to the original.
+
+    python compact_forest.py [--trees 100] [--max-depth 12] [--bars bars.csv]
+
+--bars takes a CSV of minute bars (timestamp, price) to evaluate on real
+features and the targets of each forecast horizon, as built in bitcoinmodel.py.
+Without it, evaluation rows are sampled inside the range of each feature's
+split thresholds. Serve the result with BITCOIN_COMPACT=1.
+"""
+import argparse
+import os
+import time
+import warnings
+from contextlib import contextmanager
+
+import joblib
+import numpy as np
+import sklearn.ensemble  # noqa: F401  (imported up front so load times measure unpickling only)
+
+from bar_store import horizons_for
+from inference import compact_trees, compile_model, load_kernel, save_kernel
+from price_stream import read_bars
+
+
+@contextmanager
+def array_input():
+    # The forest was fitted on a DataFrame and is scored on arrays here, which
+    # sklearn warns about on every predict (and would be timed with it)
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", "X does not have valid feature names", UserWarning)
+        yield
+
+
+def bar_features(path, horizons):
+    # Same feature engineering as bitcoinmodel.py: rows i with both lags and
+    # the target of every horizon available
+    bars = list(read_bars(path))
+    prices = np.array([price for _, price in bars])
+    horizons = np.asarray(horizons)
+    rows = np.arange(2, len(bars) - horizons.max())
+    X = np.c_[
+        prices[rows - 1],  # lag1
+        prices[rows - 2],  # lag2
+        prices[rows],  # price
+        [bars[i][0].hour for i in rows],
+        [bars[i][0].minute for i in rows],
+        [bars[i][0].weekday() for i in rows],
+    ]
+    y = prices[rows[:, None] + horizons]
+    return X, y[:, 0] if len(horizons) == 1 else y
+
+
+def sampled_features(kernel, n_rows=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    is_split = kernel.left != np.arange(len(kernel.left))
+    columns = []
+    for j in range(6):
+        thresholds = kernel.threshold[is_split & (kernel.feature == j)]
+        low, high = (thresholds.min(), thresholds.max()) if thresholds.size else (0.0, 1.0)
+        columns.append(rng.uniform(low, high, n_rows))
+    return np.column_stack(columns)
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def single_row_latency(model, X, repeat=300):
+    samples = []
+    with array_input():
+        for i in range(repeat):
+            row = X[i % len(X)][None, :]
+            start = time.perf_counter()
+            model.predict(row)
+            samples.append(time.perf_counter() - start)
+    return np.percentile(samples, 50) * 1e3, np.percentile(samples, 99) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="bitcoin_model.joblib")
+    parser.add_argument("--output", default=os.path.join("compiled_models", "bitcoin_compact"))
+    parser.add_argument("--trees", type=int, default=None, help="keep only the first N trees")
+    parser.add_argument("--max-depth", type=int, default=None, help="collapse nodes below this depth")
+    parser.add_argument("--bars", help="CSV of minute bars to evaluate on")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    forest = joblib.load(args.model)
+    forest_load_time = time.perf_counter() - start
+
+    compact = compact_trees(compile_model(forest), args.trees, args.max_depth)
+    save_kernel(compact, args.output)
+
+    start = time.perf_counter()
+    compact = load_kernel(args.output)
+    compact_load_time = time.perf_counter() - start
+
+    if args.bars:
+        X, y = bar_features(args.bars, horizons_for(forest.n_outputs_))
+    else:
+        X, y = sampled_features(compact), None
+
+    with array_input():
+        original = forest.predict(X)
+    compacted = compact.predict(X)
+    diff = np.abs(compacted - original)
+
+    print(f"trees: {len(forest.estimators_)} -> {len(compact.roots)}, "
+          f"max depth: {max(e.tree_.max_depth for e in forest.estimators_)} -> {compact.max_depth}, "
+          f"nodes: {sum(e.tree_.node_count for e in forest.estimators_)} -> {len(compact.left)}")
+    print(f"{'':10s} {'size (MB)':>10s} {'load (ms)':>10s} {'p50 (ms)':>9s} {'p99 (ms)':>9s}")
+    for name, size, load_time, model in [
+        ("original", os.path.getsize(args.model), forest_load_time, forest),
+        ("compact", directory_size(args.output), compact_load_time, compact),
+    ]:
+        p50, p99 = single_row_latency(model, X)
+        print(f"{name:10s} {size / 1e6:10.2f} {load_time * 1e3:10.1f} {p50:9.3f} {p99:9.3f}")
+
+    print(f"\nprediction difference on {len(X)} rows: mean {diff.mean():.4f}, max {diff.max():.4f}")
+    if y is not None:
+        print(f"MAE vs target: original {np.abs(original - y).mean():.4f}, compact {np.abs(compacted - y).mean():.4f}")
+    print(f"\nCompacted forest written to {args.output}/")
+
+
+if __name__ == "__main__":
+    main()
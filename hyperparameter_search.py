@@ -0,0 +1,188 @@
+"""
+Hyperparameter search shared by the training scripts (model.py,
+Breastcanacerwithdescisiontree.py).
+
+GridSearchCV refits the whole pipeline for every candidate in every fold,
+so PolynomialFeatures + StandardScaler were fitted again for each
+model/alpha combination although they only depend on the degree. `search`
+splits a Pipeline into its transformer steps and its final estimator, fits
+the transformer steps once per (fold, transformer parameters) and fits every
+candidate model on the cached output. Ridge and Lasso candidates that only
+differ in alpha are solved on one regularization path (see linear_paths.py).
+
+Two strategies:
+- "grid": every candidate on all the training data of every fold
+- "halving": successive halving. All candidates start on a small share of
+  each training fold, and each round keeps the best 1/factor of them and
+  multiplies the training rows by factor. Validation folds stay whole.
+
+The best parameters are refit on all of X, so `best_estimator` is a regular
+Pipeline (or estimator) that can be saved with joblib as before.
+
+    result = search(pipeline, param_grid, X, y, cv=KFold(5), scoring="r2", strategy="halving")
+    print(result.summary())
+"""
+import math
+import time
+from collections import defaultdict
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone, is_classifier
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import ParameterGrid, check_cv
+from sklearn.pipeline import Pipeline
+
+from linear_paths import fit_candidates
+
+STRATEGIES = ("grid", "halving")
+
+
+class SearchResult:
+    def __init__(self, strategy, best_params, best_score, best_estimator, scores, n_fits, n_transformer_fits, wall_time):
+        self.strategy = strategy
+        self.best_params = best_params
+        self.best_score = best_score
+        self.best_estimator = best_estimator
+        self.scores = scores  # [(params, mean score)] of the candidates in the last round
+        self.n_fits = n_fits
+        self.n_transformer_fits = n_transformer_fits
+        self.wall_time = wall_time
+
+    def summary(self):
+        return (f"{self.strategy:8s} best score {self.best_score:.4f} in {self.wall_time:.2f}s "
+                f"({self.n_fits} model fits, {self.n_transformer_fits} transformer fits)")
+
+
+# ================================
+# Splitting a Pipeline
+# ================================
+def _split_params(estimator, params):
+    """(transformer params, final estimator) for one candidate."""
+    if not isinstance(estimator, Pipeline):
+        return {}, clone(estimator).set_params(**params)
+
+    final_name, final = estimator.steps[-1]
+    final = params.get(final_name, final)
+    prefix = final_name + "__"
+    transformer_params = {}
+    model_params = {}
+    for key, value in params.items():
+        if key == final_name:
+            continue
+        if key.startswith(prefix):
+            model_params[key[len(prefix):]] = value
+        else:
+            transformer_params[key] = value
+    return transformer_params, clone(final).set_params(**model_params)
+
+
+def _transformer_key(transformer_params):
+    return tuple(sorted((key, repr(value)) for key, value in transformer_params.items()))
+
+
+def _fit_transformers(estimator, transformer_params, X_train, X_val):
+    if not isinstance(estimator, Pipeline) or len(estimator.steps) == 1:
+        return X_train, X_val
+    steps = Pipeline([(name, clone(step)) for name, step in estimator.steps[:-1]])
+    steps.set_params(**transformer_params)
+    return steps.fit_transform(X_train), steps.transform(X_val)
+
+
+def _score_group(estimator, transformer_params, candidates, X, y, train, val, scorer):
+    """Fit the transformer steps once, then every candidate model on their output."""
+    Xt_train, Xt_val = _fit_transformers(estimator, transformer_params, X[train], X[val])
+    # Ridge / Lasso candidates that only differ in alpha share one path solve
+    models = fit_candidates([model for _, model in candidates], Xt_train, y[train])
+    return [(index, scorer(model, Xt_val, y[val])) for (index, _), model in zip(candidates, models)]
+
+
+# ================================
+# Search
+# ================================
+def _evaluate(estimator, candidates, X, y, folds, scorer, n_train, n_jobs):
+    """Mean validation score of each candidate index, training on the first n_train rows of each fold."""
+    jobs = []
+    for train, val in folds:
+        groups = defaultdict(list)
+        for index, params in candidates:
+            transformer_params, model = _split_params(estimator, params)
+            groups[_transformer_key(transformer_params)].append((index, model, transformer_params))
+        for group in groups.values():
+            transformer_params = group[0][2]
+            models = [(index, model) for index, model, _ in group]
+            jobs.append(delayed(_score_group)(estimator, transformer_params, models, X, y, train[:n_train], val, scorer))
+
+    fold_scores = defaultdict(list)
+    for scores in Parallel(n_jobs=n_jobs)(jobs):
+        for index, score in scores:
+            fold_scores[index].append(score)
+    n_transformer_fits = len(jobs) if isinstance(estimator, Pipeline) and len(estimator.steps) > 1 else 0
+    return {index: float(np.mean(scores)) for index, scores in fold_scores.items()}, n_transformer_fits
+
+
+def search(estimator, param_grid, X, y, cv=5, scoring=None, strategy="grid", factor=3,
+           min_resources=None, n_jobs=None, random_state=0):
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy {strategy!r}, expected one of {STRATEGIES}")
+    start = time.perf_counter()
+    X_input, y_input = X, y  # the final refit keeps DataFrame feature names
+    X = np.asarray(X)
+    y = np.asarray(y)
+    scorer = get_scorer(scoring) if scoring else (lambda model, X, y: model.score(X, y))
+
+    cv = check_cv(cv, y, classifier=is_classifier(estimator))
+    folds = list(cv.split(X, y))
+    if strategy == "halving":
+        # Shuffled so each halving round trains on a random subset of the fold
+        rng = np.random.default_rng(random_state)
+        folds = [(rng.permutation(train), val) for train, val in folds]
+    n_train = min(len(train) for train, _ in folds)
+
+    params = list(ParameterGrid(param_grid))
+    candidates = list(enumerate(params))
+    n_fits = 0
+    n_transformer_fits = 0
+
+    # Training rows per fold in each round; None is the whole training fold
+    if strategy == "grid":
+        rounds = [None]
+    else:
+        n_rounds = max(1, math.ceil(math.log(len(candidates), factor)))
+        smallest = min_resources or max(n_train // factor ** (n_rounds - 1), 20)
+        rounds = [min(n_train, smallest * factor ** i) for i in range(n_rounds)]
+        rounds[-1] = None
+
+    for round_index, rows in enumerate(rounds):
+        scores, transformer_fits = _evaluate(estimator, candidates, X, y, folds, scorer, rows, n_jobs)
+        n_fits += len(candidates) * len(folds)
+        n_transformer_fits += transformer_fits
+        ranked = sorted(candidates, key=lambda candidate: scores[candidate[0]], reverse=True)
+        if round_index < len(rounds) - 1:
+            candidates = ranked[:max(1, math.ceil(len(ranked) / factor))]
+        else:
+            candidates = ranked
+
+    best_index, best_params = candidates[0]
+    # Cloned so estimators given as grid values are not modified by the refit
+    best_estimator = clone(estimator).set_params(**clone(best_params, safe=False)).fit(X_input, y_input)
+    return SearchResult(
+        strategy,
+        best_params,
+        scores[best_index],
+        best_estimator,
+        [(candidate_params, scores[index]) for index, candidate_params in candidates],
+        n_fits,
+        n_transformer_fits,
+        time.perf_counter() - start,
+    )
+
+
+def compare_strategies(estimator, param_grid, X, y, strategies=STRATEGIES, **kwargs):
+    """Run `search` once per strategy and print wall time and best score of each."""
+    results = {}
+    for strategy in strategies:
+        results[strategy] = search(estimator, param_grid, X, y, strategy=strategy, **kwargs)
+        print(results[strategy].summary())
+        print(f"{'':8s} best params {results[strategy].best_params}")
+    return results
@@ -0,0 +1,556 @@
+"""
+Compiled NumPy inference kernels for the served models.
+
+Every fitted sklearn artifact used by app.py is flattened into a handful of
+plain arrays and evaluated with vectorized NumPy code, skipping sklearn's
+per-call input validation:
+
+- Pipeline(PolynomialFeatures, StandardScaler, linear model) becomes a fused
+  quadratic form: intercept + x @ linear + x @ quadratic @ x
+- PowerTransformer(yeo-johnson) becomes its lambdas plus the scaler stats
+- LogisticRegression becomes its coefficient matrix
+- DecisionTree / RandomForest become one concatenated node array that is
+  walked level by level for all rows and all trees at once
+
+The kernels expose the same predict / predict_proba / transform methods as
+the sklearn objects they replace, so app.py can swap them in directly.
+
+Run this file to export the compiled kernels to disk:
+    python inference.py --output compiled_models
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+
+
+class LinearKernel:
+    kind = "linear"
+
+    def __init__(self, intercept, linear, quadratic=None):
+        self.intercept = float(intercept)
+        self.linear = linear
+        self.quadratic = quadratic
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        y = X @ self.linear + self.intercept
+        if self.quadratic is not None:
+            y += np.einsum("ij,jk,ik->i", X, self.quadratic, X)
+        return y
+
+    def arrays(self):
+        arrays = {"linear": self.linear}
+        if self.quadratic is not None:
+            arrays["quadratic"] = self.quadratic
+        return arrays
+
+    def meta(self):
+        return {"intercept": self.intercept}
+
+    @classmethod
+    def from_arrays(cls, arrays, meta):
+        return cls(meta["intercept"], arrays["linear"], arrays.get("quadratic"))
+
+
+class LogisticKernel:
+    kind = "logistic"
+
+    def __init__(self, coef, intercept, classes):
+        self.coef = coef
+        self.intercept = intercept
+        self.classes_ = classes
+
+    def decision_function(self, X):
+        scores = np.asarray(X, dtype=np.float64) @ self.coef.T + self.intercept
+        return scores.ravel() if scores.shape[1] == 1 else scores
+
+    def predict_proba(self, X):
+        scores = self.decision_function(X)
+        if scores.ndim == 1:
+            positive = 1.0 / (1.0 + np.exp(-scores))
+            return np.stack([1 - positive, positive], axis=1)
+
+        # Multinomial: softmax over classes
+        scores = scores - scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        scores /= scores.sum(axis=1, keepdims=True)
+        return scores
+
+    def predict(self, X):
+        scores = self.decision_function(X)
+        if scores.ndim == 1:
+            return self.classes_[(scores > 0).astype(np.intp)]
+        return self.classes_[scores.argmax(axis=1)]
+
+    def arrays(self):
+        return {"coef": self.coef, "intercept": self.intercept, "classes": self.classes_}
+
+    def meta(self):
+        return {}
+
+    @classmethod
+    def from_arrays(cls, arrays, meta):
+        return cls(arrays["coef"], arrays["intercept"], arrays["classes"])
+
+
+class TreeEnsembleKernel:
+    """
+    One or more decision trees stored as a single flat node array.
+
+    Leaves point back at themselves, so a leaf is recognised by its left
+    child being itself. All (row, tree) pairs are advanced one level per
+    step, dropping the pairs that have reached a leaf.
+    Regression trees store the leaf value (one per output); classification
+    trees store the class probabilities. The ensemble output is the mean over trees.
+    """
+
+    kind = "trees"
+
+    def __init__(self, feature, threshold, left, right, values, roots, max_depth, classes=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.values = values
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes_ = classes
+
+    def apply(self, X):
+        # Trees are fitted on float32 inputs, so compare in float32 too
+        X = np.asarray(X, dtype=np.float32)
+        n_rows, n_trees = X.shape[0], len(self.roots)
+        flat_X = X.ravel()
+        nodes = np.tile(self.roots, n_rows)
+        row_offsets = np.repeat(np.arange(0, X.size, X.shape[1]), n_trees)
+
+        # Only (row, tree) pairs that have not reached a leaf are advanced
+        active = np.arange(nodes.size)
+        for _ in range(self.max_depth):
+            current = nodes[active]
+            go_left = flat_X[row_offsets[active] + self.feature[current]] <= self.threshold[current]
+            current = np.where(go_left, self.left[current], self.right[current])
+            nodes[active] = current
+            active = active[self.left[current] != current]
+            if not active.size:
+                break
+        return nodes.reshape(n_rows, n_trees)
+
+    def _leaf_values(self, X):
+        leaf_values = self.values[self.apply(X)]
+        if len(self.roots) == 1:
+            return leaf_values[:, 0].astype(np.float64)
+        # Accumulate in float64 even when the leaves are stored as float32
+        return leaf_values.mean(axis=1, dtype=np.float64)
+
+    def predict_proba(self, X):
+        return self._leaf_values(X)
+
+    def predict(self, X):
+        values = self._leaf_values(X)
+        if self.classes_ is None:
+            # 1-D for a single output, (n_rows, n_outputs) otherwise, as sklearn
+            return values[:, 0] if values.shape[1] == 1 else values
+        return self.classes_[values.argmax(axis=1)]
+
+    def arrays(self):
+        arrays = {
+            "feature": self.feature,
+            "threshold": self.threshold,
+            "left": self.left,
+            "right": self.right,
+            "values": self.values,
+            "roots": self.roots,
+        }
+        if self.classes_ is not None:
+            arrays["classes"] = self.classes_
+        return arrays
+
+    def meta(self):
+        return {"max_depth": self.max_depth}
+
+    @classmethod
+    def from_arrays(cls, arrays, meta):
+        return cls(
+            arrays["feature"], arrays["threshold"], arrays["left"], arrays["right"],
+            arrays["values"], arrays["roots"], meta["max_depth"], arrays.get("classes"),
+        )
+
+
+class YeoJohnsonKernel:
+    kind = "yeo_johnson"
+
+    def __init__(self, lambdas, mean=None, scale=None):
+        self.lambdas = lambdas
+        self.mean = mean
+        self.scale = scale
+
+    def transform(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        positive = X >= 0
+
+        # Same branches as scipy.stats.yeojohnson, folded into one expm1 call:
+        # negative inputs use lambda' = 2 - lambda on |x| and flip the sign
+        log_abs = np.log1p(np.abs(X))
+        lambdas = np.where(positive, self.lambdas, 2 - self.lambdas)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out = np.expm1(lambdas * log_abs)
+            out /= lambdas
+        out = np.where(lambdas == 0, log_abs, out)
+        np.negative(out, out=out, where=~positive)
+
+        if self.mean is not None:
+            out -= self.mean
+            out /= self.scale
+        return out
+
+    def inverse_transform(self, X):
+        X = np.array(X, dtype=np.float64)
+        if self.mean is not None:
+            X *= self.scale
+            X += self.mean
+        positive = X >= 0
+
+        # Inverse of each branch of transform: x = sign * expm1(log1p(lambda' * |y|) / lambda')
+        lambdas = np.where(positive, self.lambdas, 2 - self.lambdas)
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            out = np.expm1(np.log1p(lambdas * np.abs(X)) / lambdas)
+            out = np.where(lambdas == 0, np.expm1(np.abs(X)), out)
+        np.negative(out, out=out, where=~positive)
+        return out
+
+    def arrays(self):
+        arrays = {"lambdas": self.lambdas}
+        if self.mean is not None:
+            arrays["mean"] = self.mean
+            arrays["scale"] = self.scale
+        return arrays
+
+    def meta(self):
+        return {}
+
+    @classmethod
+    def from_arrays(cls, arrays, meta):
+        return cls(arrays["lambdas"], arrays.get("mean"), arrays.get("scale"))
+
+
+class CompiledModel:
+    """
+    Use a compiled kernel for small inputs and the sklearn object otherwise.
+
+    The level-by-level walk of a large forest is gather-bound, so past a few
+    hundred rows sklearn's Cython traversal wins again. `model` may also be a
+    zero-argument callable, in which case the sklearn object is only loaded
+    the first time a large batch needs it.
+    """
+
+    def __init__(self, model, kernel, max_rows):
+        self.model = model
+        self.kernel = kernel
+        self.max_rows = max_rows
+
+    def _pick(self, X):
+        if len(X) <= self.max_rows:
+            return self.kernel
+        if callable(self.model):
+            self.model = self.model()
+        return self.model
+
+    def predict(self, X):
+        return self._pick(X).predict(X)
+
+    def predict_proba(self, X):
+        return self._pick(X).predict_proba(X)
+
+
+KERNEL_TYPES = {
+    kernel.kind: kernel
+    for kernel in (LinearKernel, LogisticKernel, TreeEnsembleKernel, YeoJohnsonKernel)
+}
+
+
+# ================================
+# Compilers
+# ================================
+def compile_linear_pipeline(pipeline):
+    """Fuse PolynomialFeatures -> StandardScaler -> linear model into a quadratic form."""
+    steps = [step for _, step in pipeline.steps] if hasattr(pipeline, "steps") else [pipeline]
+    *transforms, model = steps
+
+    coef = np.ravel(model.coef_).astype(np.float64)
+    intercept = float(np.ravel(model.intercept_)[0])
+    n_features = model.n_features_in_
+    powers = np.eye(n_features, dtype=np.int64)
+
+    # Walk the transforms backwards, folding each one into the coefficients
+    for step in reversed(transforms):
+        name = type(step).__name__
+        if name == "StandardScaler":
+            scale = step.scale_ if step.scale_ is not None else np.ones_like(coef)
+            mean = step.mean_ if step.mean_ is not None else np.zeros_like(coef)
+            coef = coef / scale
+            intercept -= float(coef @ mean)
+        elif name == "PolynomialFeatures":
+            powers = step.powers_
+            n_features = step.n_features_in_
+        else:
+            raise ValueError(f"Cannot compile pipeline step {name}")
+
+    linear = np.zeros(n_features)
+    quadratic = np.zeros((n_features, n_features))
+    for weight, power in zip(coef, powers):
+        degree = power.sum()
+        if degree == 0:
+            intercept += weight
+        elif degree == 1:
+            linear[power.argmax()] += weight
+        elif degree == 2:
+            i, j = np.repeat(np.arange(n_features), power)
+            quadratic[i, j] += weight / 2
+            quadratic[j, i] += weight / 2
+        else:
+            raise ValueError("Only polynomial degree <= 2 can be compiled")
+
+    return LinearKernel(intercept, linear, quadratic if quadratic.any() else None)
+
+
+def compile_logistic(model):
+    return LogisticKernel(
+        np.asarray(model.coef_, dtype=np.float64),
+        np.asarray(model.intercept_, dtype=np.float64),
+        np.asarray(model.classes_),
+    )
+
+
+def compile_trees(model):
+    """Concatenate the node arrays of a tree or forest into one flat array."""
+    estimators = getattr(model, "estimators_", [model])
+    is_classifier = hasattr(model, "classes_")
+
+    feature, threshold, left, right, values, roots = [], [], [], [], [], []
+    offset = 0
+    for estimator in estimators:
+        tree = estimator.tree_
+        node_ids = np.arange(tree.node_count)
+        is_leaf = tree.children_left == -1
+
+        if is_classifier:
+            tree_values = tree.value[:, 0, :].astype(np.float64)
+            tree_values = tree_values / tree_values.sum(axis=1, keepdims=True)
+        else:
+            # One column per output (a single one unless fitted on a 2-D target)
+            tree_values = tree.value[:, :, 0].astype(np.float64)
+
+        feature.append(np.where(is_leaf, 0, tree.feature).astype(np.intp))
+        threshold.append(np.where(is_leaf, np.inf, tree.threshold))
+        left.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+        right.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+        values.append(tree_values)
+        roots.append(offset)
+        offset += tree.node_count
+
+    return TreeEnsembleKernel(
+        np.concatenate(feature),
+        np.concatenate(threshold),
+        np.concatenate(left).astype(np.intp),
+        np.concatenate(right).astype(np.intp),
+        np.concatenate(values),
+        np.array(roots, dtype=np.intp),
+        max(estimator.tree_.max_depth for estimator in estimators),
+        np.asarray(model.classes_) if is_classifier else None,
+    )
+
+
+def compact_trees(kernel, n_trees=None, max_depth=None):
+    """
+    Shrink a TreeEnsembleKernel: keep the first `n_trees` trees, turn nodes
+    at depth `max_depth` into leaves (their stored value is the mean of their
+    training samples), drop unreachable nodes and store the arrays as
+    int32 / float32.
+
+    Thresholds are rounded down to float32. Inputs are compared as float32,
+    and for a float32 x, x <= t holds exactly when x <= round_down(t), so
+    the splits are unchanged; only the float32 leaf values lose precision.
+    """
+    all_roots = kernel.roots.astype(np.int64)
+    roots = all_roots[:n_trees] if n_trees else all_roots
+    depth_cap = kernel.max_depth if max_depth is None else min(max_depth, kernel.max_depth)
+
+    # Breadth-first walk of all kept trees at once, one level per step
+    is_leaf = kernel.left == np.arange(len(kernel.left))
+    levels = [roots]
+    frontier = roots
+    for _ in range(depth_cap):
+        internal = frontier[~is_leaf[frontier]]
+        if not internal.size:
+            break
+        frontier = np.concatenate([kernel.left[internal], kernel.right[internal]])
+        levels.append(frontier)
+
+    kept = np.concatenate(levels)
+    new_index = np.full(len(kernel.left), -1, dtype=np.int64)
+    new_index[kept] = np.arange(len(kept))
+
+    # Nodes on the last level are leaves now, whatever they were before
+    expanded = np.zeros(len(kernel.left), dtype=bool)
+    expanded[np.concatenate(levels[:-1]) if len(levels) > 1 else []] = True
+    expanded &= ~is_leaf
+    keep_split = expanded[kept]
+
+    self_index = np.arange(len(kept))
+    left = np.where(keep_split, new_index[kernel.left[kept]], self_index)
+    right = np.where(keep_split, new_index[kernel.right[kept]], self_index)
+    feature = np.where(keep_split, kernel.feature[kept], 0)
+
+    threshold = kernel.threshold[kept].astype(np.float32)
+    rounded_up = threshold.astype(np.float64) > kernel.threshold[kept]
+    threshold[rounded_up] = np.nextafter(threshold[rounded_up], np.float32(-np.inf))
+    threshold[~keep_split] = np.inf
+
+    return TreeEnsembleKernel(
+        feature.astype(np.int32),
+        threshold,
+        left.astype(np.int32),
+        right.astype(np.int32),
+        kernel.values[kept].astype(np.float32),
+        new_index[roots].astype(np.int32),
+        len(levels) - 1,
+        kernel.classes_,
+    )
+
+
+def compile_power_transformer(transformer):
+    if transformer.method != "yeo-johnson":
+        raise ValueError("Only yeo-johnson PowerTransformers can be compiled")
+
+    scaler = getattr(transformer, "_scaler", None) if transformer.standardize else None
+    if scaler is None:
+        return YeoJohnsonKernel(np.asarray(transformer.lambdas_, dtype=np.float64))
+    return YeoJohnsonKernel(
+        np.asarray(transformer.lambdas_, dtype=np.float64),
+        np.asarray(scaler.mean_, dtype=np.float64),
+        np.asarray(scaler.scale_, dtype=np.float64),
+    )
+
+
+def compile_model(model):
+    """Return the compiled kernel for any of the model types served by app.py."""
+    name = type(model).__name__
+    if name == "PowerTransformer":
+        return compile_power_transformer(model)
+    if name == "LogisticRegression":
+        return compile_logistic(model)
+    if name in ("DecisionTreeClassifier", "DecisionTreeRegressor",
+                "RandomForestClassifier", "RandomForestRegressor"):
+        return compile_trees(model)
+    if name in ("Pipeline", "LinearRegression", "Ridge", "Lasso"):
+        return compile_linear_pipeline(model)
+    raise ValueError(f"No compiled kernel for {name}")
+
+
+# ================================
+# Export / Load
+# ================================
+# Kernel name -> (joblib artifact, key inside the artifact or None)
+EXPORTS = {
+    "diabetes": ("best_diabetes_model.joblib", None),
+    "banknote": ("bank_note_authentication_model.joblib", None),
+    "banknote_transformer": ("power_transformer.joblib", None),
+    "breastcancer": ("breast_cancer_model.joblib", "model"),
+    "breastcancer_transformer": ("breast_cancer_model.joblib", "transformer"),
+    "bitcoin": ("bitcoin_model.joblib", None),
+}
+
+# The non-model parts of the breast cancer bundle, so serving needs no unpickling
+BREAST_CANCER_METADATA = "breastcancer_components.json"
+
+
+def _replace_file(path, write):
+    # Write next to the target and rename over it, so readers (and workers that
+    # already memory-mapped the old file) never see a half-written file
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def save_kernel(kernel, directory):
+    """Write a kernel as one .npy file per array plus a kernel.json header."""
+    os.makedirs(directory, exist_ok=True)
+    arrays = kernel.arrays()
+    for name, array in arrays.items():
+        _replace_file(os.path.join(directory, f"{name}.npy"), lambda f: np.save(f, array))
+
+    # The header goes last: a fresh header means all arrays are in place
+    header = {"kind": kernel.kind, "arrays": sorted(arrays), "meta": kernel.meta()}
+    _replace_file(os.path.join(directory, "kernel.json"), lambda f: f.write(json.dumps(header, indent=2).encode()))
+
+
+def load_kernel(directory, mmap_mode=None):
+    """Load a kernel written by save_kernel; mmap_mode is passed to np.load."""
+    with open(os.path.join(directory, "kernel.json")) as f:
+        header = json.load(f)
+
+    arrays = {
+        name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+        for name in header["arrays"]
+    }
+    return KERNEL_TYPES[header["kind"]].from_arrays(arrays, header["meta"])
+
+
+def is_fresh(path, source):
+    return os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(source)
+
+
+def stale_exports(output_dir="compiled_models"):
+    """Names whose export is missing or older than its (existing) joblib artifact."""
+    stale = [
+        name for name, (source, _) in EXPORTS.items()
+        if os.path.exists(source) and not is_fresh(os.path.join(output_dir, name, "kernel.json"), source)
+    ]
+    source = EXPORTS["breastcancer"][0]
+    if os.path.exists(source) and not is_fresh(os.path.join(output_dir, BREAST_CANCER_METADATA), source):
+        stale.append("breastcancer")
+    return sorted(set(stale))
+
+
+def export_all(output_dir="compiled_models", names=None, verbose=True):
+    import joblib
+
+    loaded = {}
+    for name, (source, key) in EXPORTS.items():
+        if names is not None and name not in names:
+            continue
+        if not os.path.exists(source):
+            if verbose:
+                print(f"{name:26s} skipped, {source} not found")
+            continue
+
+        if source not in loaded:
+            loaded[source] = joblib.load(source)
+        model = loaded[source][key] if key else loaded[source]
+
+        kernel = compile_model(model)
+        save_kernel(kernel, os.path.join(output_dir, name))
+        if verbose:
+            size = sum(array.nbytes for array in kernel.arrays().values())
+            print(f"{name:26s} {type(model).__name__:24s} -> {kernel.kind:12s} {size / 1024:10.1f} KB")
+
+        if name == "breastcancer":
+            metadata = {k: v for k, v in loaded[source].items() if k not in ("model", "transformer")}
+            _replace_file(
+                os.path.join(output_dir, BREAST_CANCER_METADATA),
+                lambda f: f.write(json.dumps(metadata, indent=2).encode()),
+            )
+
+    if verbose:
+        print(f"\nCompiled kernels written to {output_dir}/")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile the served models into NumPy kernels")
+    parser.add_argument("--output", default="compiled_models", help="output directory")
+    args = parser.parse_args()
+    export_all(args.output)
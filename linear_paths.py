@@ -0,0 +1,113 @@
+"""
+Regularization paths for the Ridge / Lasso candidates of a search.
+
+hyperparameter_search fits every candidate of a fold on the same
+transformed training data. Candidates that only differ in `alpha` are
+solved together here:
+
+- Ridge: one SVD of the centered training matrix, X = U S V^T, gives the
+  coefficients for every alpha as V diag(s / (s^2 + alpha)) U^T y.
+- Lasso: sklearn's coordinate-descent path from the largest alpha to the
+  smallest, each solution warm-starting the next, run on the Gram matrix
+  X^T X (computed once) when there are more rows than features.
+
+The results are ordinary fitted Ridge / Lasso objects (coef_, intercept_
+set as fit() would set them), so scorers and pipelines treat them as usual.
+Anything else, and Ridge / Lasso with non-default solver settings, is
+fitted with fit() as before.
+"""
+from collections import defaultdict
+
+import numpy as np
+from sklearn.linear_model import Lasso, Ridge, lasso_path
+
+
+def _path_key(model):
+    """Group key of models solvable on one path, or None to fit on their own."""
+    if type(model) not in (Ridge, Lasso):
+        return None
+    params = model.get_params()
+    alpha = params.pop("alpha")
+    if not np.isscalar(alpha) or alpha <= 0:
+        return None
+    if type(model) is Ridge and params["solver"] in ("auto", "svd", "cholesky") and not params["positive"]:
+        params.pop("solver")
+        params.pop("max_iter")
+        params.pop("random_state")
+    elif type(model) is Lasso and not (params["positive"] or params["warm_start"]) \
+            and params["precompute"] is False and params["selection"] == "cyclic":
+        params.pop("random_state")
+    else:
+        return None
+    params.pop("copy_X")
+    return type(model), tuple(sorted(params.items()))
+
+
+def _center(X, y, fit_intercept):
+    if not fit_intercept:
+        return X, y, np.zeros(X.shape[1]), 0.0
+    X_offset = X.mean(axis=0)
+    y_offset = y.mean()
+    return X - X_offset, y - y_offset, X_offset, y_offset
+
+
+def _set_fitted(model, coef, X_offset, y_offset, n_features):
+    model.coef_ = coef
+    model.intercept_ = float(y_offset - X_offset @ coef) if model.fit_intercept else 0.0
+    model.n_features_in_ = n_features
+    return model
+
+
+def ridge_path(models, X, y):
+    """Fit Ridge models that only differ in alpha from one SVD."""
+    Xc, yc, X_offset, y_offset = _center(X, y, models[0].fit_intercept)
+    U, s, Vt = np.linalg.svd(Xc, full_matrices=False)
+    Uty = U.T @ yc
+    alphas = np.array([model.alpha for model in models], dtype=float)
+    shrink = s / (s ** 2 + alphas[:, None])  # (n_alphas, rank)
+    coefs = (shrink * Uty) @ Vt
+    return [_set_fitted(model, coef, X_offset, y_offset, X.shape[1]) for model, coef in zip(models, coefs)]
+
+
+def lasso_path_fit(models, X, y):
+    """Fit Lasso models that only differ in alpha along one warm-started path."""
+    first = models[0]
+    Xc, yc, X_offset, y_offset = _center(X, y, first.fit_intercept)
+    alphas = np.array([model.alpha for model in models], dtype=float)
+    order = np.argsort(alphas)[::-1]  # the path runs from strong to weak regularization
+    if Xc.shape[0] > Xc.shape[1]:
+        # Coordinate descent on the Gram matrix costs n_features^2 per sweep
+        # instead of n_samples * n_features, and it is shared by every alpha
+        gram = dict(precompute=Xc.T @ Xc, Xy=Xc.T @ yc)
+    else:
+        gram = dict(precompute=False)
+    _, coefs, _ = lasso_path(
+        np.asfortranarray(Xc), yc, alphas=alphas[order], max_iter=first.max_iter, tol=first.tol, **gram,
+    )
+    fitted = [None] * len(models)
+    for k, i in enumerate(order):
+        fitted[i] = _set_fitted(models[i], coefs[:, k].copy(), X_offset, y_offset, X.shape[1])
+    return fitted
+
+
+def fit_candidates(models, X, y):
+    """Fit every model on (X, y); returns them in the same order."""
+    groups = defaultdict(list)
+    for i, model in enumerate(models):
+        key = _path_key(model)
+        groups[key if key is not None else ("single", i)].append(i)
+
+    dense = not hasattr(X, "toarray")
+    if dense:
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+    for key, indices in groups.items():
+        group = [models[i] for i in indices]
+        if len(group) == 1 or not dense or np.ndim(y) != 1:
+            for model in group:
+                model.fit(X, y)
+        elif key[0] is Ridge:
+            ridge_path(group, X, y)
+        else:
+            lasso_path_fit(group, X, y)
+    return models
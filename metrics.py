@@ -0,0 +1,252 @@
+"""
+Request metrics for app.py in the Prometheus text format.
+
+Each request gets a RequestTimer in a thread-local. Code on the hot path
+calls `mark(phase)` after each step (JSON parsing, validation, transform,
+predict, ...), which records the time since the previous mark under that
+phase name and costs one perf_counter() call. When the request finishes,
+the phases, the total latency and the status go into per-endpoint
+histograms and counters. `mark` is a no-op outside a request, so the
+helpers it sits in can still be called from scripts, benchmarks and the
+micro-batching threads.
+
+Sampled cProfile captures: with a profile rate > 0 that fraction of
+requests runs under cProfile and the stats are dumped to a .prof file
+(open with `python -m pstats` or snakeviz).
+"""
+import cProfile
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+# Upper bounds in seconds, from 50us to 10s
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 10.0,
+)
+
+_current = threading.local()
+
+
+class RequestTimer:
+    __slots__ = ("start", "last", "phases")
+
+    def __init__(self):
+        self.start = self.last = time.perf_counter()
+        self.phases = []
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+
+def mark(phase):
+    """Record the time since the previous mark of the current request as `phase`."""
+    timer = getattr(_current, "timer", None)
+    if timer is not None:
+        timer.mark(phase)
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (None if empty or beyond the last bucket)."""
+        if not self.count:
+            return None
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            if cumulative >= q * self.count:
+                return bound
+        return None
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+
+class Metrics:
+    def __init__(self, profile_rate=0.0, profile_dir="profiles"):
+        self.profile_rate = profile_rate
+        self.profile_dir = profile_dir
+        self._lock = threading.Lock()
+        self._profile_lock = threading.Lock()
+        self.request_latency = defaultdict(Histogram)  # (endpoint, model, version)
+        self.phase_latency = defaultdict(Histogram)  # (endpoint, phase)
+        self.requests = defaultdict(int)  # (endpoint, model, version, status)
+        self.errors = defaultdict(int)  # (endpoint, model, version)
+        self.admission_wait = defaultdict(Histogram)  # (model,)
+        self.rejections = defaultdict(int)  # (model, reason)
+        self.profiles_written = 0
+
+    # ================================
+    # Request Lifecycle
+    # ================================
+    def start_request(self):
+        timer = _current.timer = RequestTimer()
+        _current.profiler = None
+        if self.profile_rate and random.random() < self.profile_rate and self._profile_lock.acquire(blocking=False):
+            # Only one request is profiled at a time: cProfile is process-wide on 3.12+
+            _current.profiler = cProfile.Profile()
+            _current.profiler.enable()
+        return timer
+
+    def finish_request(self, endpoint, status, model="", version=""):
+        timer = getattr(_current, "timer", None)
+        if timer is None:
+            return
+        _current.timer = None
+        timer.mark("serialize")  # from the last mark to the finished response
+        total = timer.last - timer.start
+
+        with self._lock:
+            self.request_latency[endpoint, model, version].observe(total)
+            for phase, seconds in timer.phases:
+                self.phase_latency[endpoint, phase].observe(seconds)
+            self.requests[endpoint, model, version, status] += 1
+            if status >= 400:
+                self.errors[endpoint, model, version] += 1
+
+        profiler = getattr(_current, "profiler", None)
+        if profiler is not None:
+            _current.profiler = None
+            profiler.disable()
+            self._profile_lock.release()
+            self._dump_profile(profiler, endpoint, total)
+
+    def observe_admission(self, model, wait_seconds):
+        """Time a request queued for a slot of `model` before it was admitted."""
+        with self._lock:
+            self.admission_wait[(model,)].observe(wait_seconds)
+
+    def count_rejection(self, model, reason):
+        with self._lock:
+            self.rejections[model, reason] += 1
+
+    def _dump_profile(self, profiler, endpoint, total):
+        with self._lock:
+            self.profiles_written += 1
+            sequence = self.profiles_written
+        os.makedirs(self.profile_dir, exist_ok=True)
+        name = endpoint.strip("/").replace("/", "_") or "root"
+        filename = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{sequence}-{name}-{total * 1e3:.1f}ms.prof"
+        profiler.dump_stats(os.path.join(self.profile_dir, filename))
+
+    # ================================
+    # Prometheus Text Format
+    # ================================
+    def render(self, model_versions=None, admission=None, shadow=None, prediction_log=None):
+        lines = []
+        with self._lock:
+            self._render_histograms(
+                lines, "api_request_duration_seconds", "End-to-end request latency",
+                self.request_latency, ("endpoint", "model", "version"),
+            )
+            self._render_histograms(
+                lines, "api_phase_duration_seconds", "Latency of each phase of a request",
+                self.phase_latency, ("endpoint", "phase"),
+            )
+            lines += ["# HELP api_requests_total Requests by status", "# TYPE api_requests_total counter"]
+            for (endpoint, model, version, status), count in sorted(self.requests.items()):
+                labels = _labels(endpoint=endpoint, model=model, version=version, status=status)
+                lines.append(f"api_requests_total{labels} {count}")
+            lines += ["# HELP api_errors_total Requests answered with status >= 400", "# TYPE api_errors_total counter"]
+            for (endpoint, model, version), count in sorted(self.errors.items()):
+                lines.append(f"api_errors_total{_labels(endpoint=endpoint, model=model, version=version)} {count}")
+            self._render_histograms(
+                lines, "api_admission_wait_seconds", "Time admitted requests queued for a slot",
+                self.admission_wait, ("model",),
+            )
+            lines += ["# HELP api_admission_rejected_total Requests turned away by admission control",
+                      "# TYPE api_admission_rejected_total counter"]
+            for (model, reason), count in sorted(self.rejections.items()):
+                lines.append(f"api_admission_rejected_total{_labels(model=model, reason=reason)} {count}")
+            lines += ["# HELP api_profiles_written_total Sampled cProfile captures written",
+                      "# TYPE api_profiles_written_total counter",
+                      f"api_profiles_written_total {self.profiles_written}"]
+
+        if model_versions:
+            lines += ["# HELP model_version_info Version of each loaded model", "# TYPE model_version_info gauge"]
+            for model, version in sorted(model_versions.items()):
+                lines.append(f"model_version_info{_labels(model=model, version=version)} 1")
+
+        if admission:
+            # Current occupancy of each admission gate, from AdmissionGate.stats()
+            for name, key, help_text in [
+                ("api_admission_in_flight", "in_flight", "Requests holding a slot"),
+                ("api_admission_queued", "queued", "Requests waiting for a slot"),
+            ]:
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+                for model, stats in sorted(admission.items()):
+                    lines.append(f"{name}{_labels(model=model)} {stats[key]}")
+
+        if shadow:
+            self._render_shadow(lines, shadow)
+
+        if prediction_log:
+            # From PredictionLogger.stats()
+            lines += ["# HELP prediction_log_rows_total Prediction log rows by outcome",
+                      "# TYPE prediction_log_rows_total counter",
+                      f"prediction_log_rows_total{_labels(outcome='logged')} {prediction_log['logged_rows']}",
+                      f"prediction_log_rows_total{_labels(outcome='written')} {prediction_log['written_rows']}"]
+            for reason, count in sorted(prediction_log["dropped_rows"].items()):
+                lines.append(f"prediction_log_rows_total{_labels(outcome='dropped', reason=reason)} {count}")
+            lines += ["# HELP prediction_log_queue_rows Rows waiting for the prediction log writer",
+                      "# TYPE prediction_log_queue_rows gauge",
+                      f"prediction_log_queue_rows {prediction_log['queue']['rows']}"]
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _render_shadow(lines, shadow):
+        # {served model: ShadowScorer.stats()}: rows and time scored by each
+        # version of the served model and its shadows, and the rows each shadow agreed on
+        timings = []
+        for primary, stats in sorted(shadow.items()):
+            timings += [(primary, primary, version, timing) for version, timing in stats["primary"].items()]
+            timings += [(primary, name, version, timing) for name, entry in stats["shadows"].items()
+                        for version, timing in entry["versions"].items()]
+        for name, key, help_text in [
+            ("shadow_scored_rows_total", "rows", "Rows scored by the served model and its shadows"),
+            ("shadow_score_seconds_total", "seconds", "Time spent scoring those rows"),
+        ]:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for primary, model, version, timing in timings:
+                lines.append(f"{name}{_labels(primary=primary, model=model, version=version)} {timing[key]!r}")
+
+        lines += ["# HELP shadow_agreed_rows_total Rows where a shadow predicted the served model's class",
+                  "# TYPE shadow_agreed_rows_total counter"]
+        for primary, model, version, timing in timings:
+            for primary_version, agreement in sorted(timing.get("agreement", {}).items()):
+                labels = _labels(primary=primary, primary_version=primary_version, model=model, version=version)
+                lines.append(f"shadow_agreed_rows_total{labels} {agreement['agreed']}")
+        lines += ["# HELP shadow_dropped_rows_total Rows not shadow scored because the queue was full",
+                  "# TYPE shadow_dropped_rows_total counter"]
+        for primary, stats in sorted(shadow.items()):
+            lines.append(f"shadow_dropped_rows_total{_labels(primary=primary)} {stats['queue']['dropped_rows']}")
+
+    @staticmethod
+    def _render_histograms(lines, name, help_text, histograms, label_names):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for key, histogram in sorted(histograms.items()):
+            labels = dict(zip(label_names, key))
+            cumulative = 0
+            for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{name}_bucket{_labels(**labels, le=le)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(**labels)} {histogram.sum!r}")
+            lines.append(f"{name}_count{_labels(**labels)} {histogram.count}")
@@ -0,0 +1,109 @@
+"""
+Micro-batching of concurrent single-row predictions.
+
+Request threads hand their feature row to a MicroBatcher and wait. A worker
+thread per model takes the first waiting row, keeps collecting rows for up
+to `max_wait_ms` or until `max_batch_size` rows are queued, runs one
+vectorized predict over the stacked matrix and hands each caller its row.
+Queue wait and batch size are recorded so the wait can be tuned against
+the throughput gained.
+
+A row can be submitted with a context, e.g. the model version the request is
+pinned to. Only rows with the same context are predicted together, inside
+`bind(context)`, so a batch never runs on a model the caller did not see.
+"""
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroBatcher:
+    def __init__(self, predict_rows, max_wait_ms=2.0, max_batch_size=64, name="batcher", window=10000, bind=None):
+        self._predict_rows = predict_rows
+        self._bind = bind
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.batches = 0
+        # Recent samples for percentiles
+        self.queue_waits = deque(maxlen=window)
+        self.batch_sizes = deque(maxlen=window)
+
+        self._worker = threading.Thread(target=self._run, name=f"micro-batcher-{name}", daemon=True)
+        self._worker.start()
+
+    def submit(self, row, context=None):
+        """Queue one feature row; returns a Future resolving to its result."""
+        future = Future()
+        self._queue.put((row, time.perf_counter(), future, context))
+        return future
+
+    def predict_rows(self, features, context=None):
+        """Drop-in for a predict_rows function: each row goes through the batcher."""
+        futures = [self.submit(row, context) for row in features]
+        return [future.result() for future in futures]
+
+    def _collect(self):
+        items = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(items) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                items.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return items
+
+    def _run(self):
+        while True:
+            items = self._collect()
+            # Contexts are compared by identity (the registry hands out one
+            # entry per model version); normally every row shares one
+            groups = {}
+            for item in items:
+                groups.setdefault(id(item[3]), []).append(item)
+            for group in groups.values():
+                self._predict_batch(group)
+
+    def _predict_batch(self, items):
+        started = time.perf_counter()
+        context = items[0][3]
+        try:
+            with self._bind(context) if self._bind is not None and context is not None else nullcontext():
+                results = self._predict_rows(np.vstack([item[0] for item in items]))
+        except Exception as e:
+            for item in items:
+                item[2].set_exception(e)
+        else:
+            for item, result in zip(items, results):
+                item[2].set_result(result)
+
+        with self._stats_lock:
+            self.requests += len(items)
+            self.batches += 1
+            self.batch_sizes.append(len(items))
+            self.queue_waits.extend(started - item[1] for item in items)
+
+    def stats(self):
+        with self._stats_lock:
+            waits = np.array(self.queue_waits) * 1000
+            sizes = np.array(self.batch_sizes)
+            return {
+                "requests": self.requests,
+                "batches": self.batches,
+                "max_wait_ms": self.max_wait * 1000,
+                "max_batch_size": self.max_batch_size,
+                "batch_size_mean": float(sizes.mean()) if sizes.size else 0.0,
+                "batch_size_max": int(sizes.max()) if sizes.size else 0,
+                "queue_wait_ms_p50": float(np.percentile(waits, 50)) if waits.size else 0.0,
+                "queue_wait_ms_p99": float(np.percentile(waits, 99)) if waits.size else 0.0,
+            }
@@ -1,21 +1,27 @@
+import argparse
 import pandas as pd
 import joblib
 from sklearn.datasets import load_diabetes
-from sklearn.model_selection import KFold, GridSearchCV, train_test_split
+from sklearn.model_selection import KFold, train_test_split
 from sklearn.linear_model import LinearRegression, Ridge, Lasso
 from sklearn.preprocessing import StandardScaler, PolynomialFeatures
 from sklearn.pipeline import Pipeline
 from sklearn.metrics import r2_score
 
+from hyperparameter_search import STRATEGIES, compare_strategies, search
+from training_cache import TrainingRun
+
+RUN_NAME = "diabetes_regression"
+MODEL_PATH = "best_diabetes_model.joblib"
+# The pipeline and grid live in this file; the search code decides which candidate wins
+CODE = [__file__, "hyperparameter_search.py", "linear_paths.py"]
+
 def load_and_preprocess_data():
     data = load_diabetes(as_frame=True)
 
     # full dataframe
     df = data.frame.copy()
-    print(df.head(10))
-    print(df.columns.tolist())
-    print(df.info())
-    print(df.isnull().sum())
+    print(f"Loaded {df.shape[0]} rows x {df.shape[1]} columns, {int(df.isnull().sum().sum())} missing values")
 
     # drop sex column
     df = df.drop(columns=["sex"])
@@ -30,7 +36,12 @@ def load_and_preprocess_data():
 
     return X, Y
 
-def train_model():
+def train_model(strategy="grid", compare=False):
+    run = TrainingRun(RUN_NAME, code=CODE, params={"strategy": strategy})
+    if not compare and run.is_cached():
+        print(f"Data, code and parameters unchanged, reusing {run.version}")
+        run.publish({MODEL_PATH: "model"})
+        return run
 
     X, Y = load_and_preprocess_data()
     x_train, x_test, y_train, y_test = train_test_split(
@@ -62,28 +73,33 @@ def train_model():
 
     kfold = KFold(n_splits=5, shuffle=True, random_state=42)
 
-    grid = GridSearchCV(
-        estimator=pipeline,
-        param_grid=param_grid,
-        cv=kfold,
-        scoring='r2',
-        n_jobs=-1,
-        verbose=1
-    )
+    if compare:
+        # Wall time and best score of each search strategy, nothing is saved
+        compare_strategies(pipeline, param_grid, x_train, y_train, cv=kfold, scoring='r2')
+        return
 
-    grid.fit(x_train, y_train)
-    print("\nBest Grid Search Parameters:\n", grid.best_params_)
-    print("\nBest Cross Validation Score:", grid.best_score_)
+    # PolynomialFeatures + StandardScaler are fitted once per fold and degree,
+    # not once per model/alpha candidate (see hyperparameter_search.py)
+    result = search(pipeline, param_grid, x_train, y_train, cv=kfold, scoring='r2', strategy=strategy)
+    print("\n" + result.summary())
+    print("\nBest Grid Search Parameters:\n", result.best_params)
+    print("\nBest Cross Validation Score:", result.best_score)
 
-    y_pred = grid.predict(x_test)
+    y_pred = result.best_estimator.predict(x_test)
     test_r2 = r2_score(y_test, y_pred)
 
     print("\nTest R² Score:", test_r2)
     print("\nSample Predictions:", y_pred[:5])
 
-    joblib.dump(grid.best_estimator_, "best_diabetes_model.joblib")
-    print("\nSaved model as best_diabetes_model.joblib")
+    run.save({"model": result.best_estimator}, metrics={"cv_r2": result.best_score, "test_r2": test_r2})
+    run.publish({MODEL_PATH: "model"})
+    print(f"\nSaved model as {MODEL_PATH} ({run.version})")
+    return run
 
 
 if __name__ == "__main__":
-    train_model()
+    parser = argparse.ArgumentParser(description="Train the diabetes regression pipeline")
+    parser.add_argument("--strategy", choices=STRATEGIES, default="grid", help="hyperparameter search strategy")
+    parser.add_argument("--compare", action="store_true", help="only report wall time and best score of each strategy")
+    args = parser.parse_args()
+    train_model(args.strategy, args.compare)
@@ -0,0 +1,182 @@
+"""
+Loaders for the artifacts app.py serves, and the settings that pick between
+the sklearn objects, kernels compiled in memory and exported kernels (see
+inference.py).
+
+Importing this module has no side effects: app.py registers these loaders
+with its ModelRegistry, and score_csv.py calls them directly in its worker
+processes without starting a server.
+"""
+import json
+import os
+import threading
+
+from inference import (
+    BREAST_CANCER_METADATA, CompiledModel, TreeEnsembleKernel, compact_trees,
+    compile_model, export_all, is_fresh, load_kernel, stale_exports,
+)
+from tree_explainer import TreeExplainer, tree_kernel
+
+# Input fields expected by each model, in the order the model was trained on
+DIABETES_FEATURES = ["age", "bmi", "bp", "s1", "s2", "s3", "s4", "s5", "s6"]
+BANKNOTE_FEATURES = ["var", "skew", "curt", "entr"]
+
+# ================================
+# Model Loading Settings
+# ================================
+# Passed to joblib.load, e.g. "r" to memory-map numpy-backed arrays
+MODEL_MMAP_MODE = os.environ.get("MODEL_MMAP_MODE") or None
+
+# Replace the sklearn objects with NumPy kernels (see inference.py) that skip
+# sklearn's per-call validation. Set USE_COMPILED_MODELS=0 to serve sklearn.
+USE_COMPILED_MODELS = os.environ.get("USE_COMPILED_MODELS", "1") == "1"
+
+# Kernels exported by `python inference.py`. When an export is at least as new
+# as its joblib artifact it is loaded instead, which avoids importing sklearn.
+COMPILED_MODELS_DIR = os.environ.get("COMPILED_MODELS_DIR", "compiled_models")
+
+# Tree batches larger than this are faster through sklearn's Cython code
+COMPILED_TREE_MAX_ROWS = 256
+
+# Passed to np.load for exported kernels
+KERNEL_MMAP_MODE = MODEL_MMAP_MODE
+
+# BITCOIN_COMPACT=1 serves the float32/int32 forest written by compact_forest.py.
+# If that export is missing or stale the forest is compacted in memory, keeping
+# BITCOIN_COMPACT_TREES trees cut at BITCOIN_COMPACT_MAX_DEPTH (default: all).
+BITCOIN_COMPACT = os.environ.get("BITCOIN_COMPACT") == "1"
+BITCOIN_COMPACT_TREES = int(os.environ.get("BITCOIN_COMPACT_TREES", "0")) or None
+BITCOIN_COMPACT_MAX_DEPTH = int(os.environ.get("BITCOIN_COMPACT_MAX_DEPTH", "0")) or None
+
+# SHARED_MODELS=1 is meant for pre-fork servers running several workers. The
+# kernels are exported once to COMPILED_MODELS_DIR and every worker maps the
+# same .npy files read-only, so the model arrays sit in memory only once.
+# Trees never fall back to sklearn here, as that would load a private copy.
+SHARED_MODELS = os.environ.get("SHARED_MODELS") == "1"
+
+if SHARED_MODELS:
+    USE_COMPILED_MODELS = True
+    KERNEL_MMAP_MODE = "r"
+    COMPILED_TREE_MAX_ROWS = float("inf")
+
+
+# Unpickling imports sklearn submodules, and importing them from several loader
+# threads at once can hand a thread a partially initialized module. Unpickling
+# is therefore serialized; compiling and loading exported kernels still overlap.
+_unpickle_lock = threading.Lock()
+
+
+def load_artifact(path):
+    # joblib (and sklearn, when unpickling) are only imported if an artifact
+    # actually has to be read, keeping them out of the startup path
+    import joblib
+
+    with _unpickle_lock:
+        return joblib.load(path, mmap_mode=MODEL_MMAP_MODE)
+
+
+def exported_kernel(name, source):
+    directory = os.path.join(COMPILED_MODELS_DIR, name)
+    if not is_fresh(os.path.join(directory, "kernel.json"), source):
+        return None
+    return load_kernel(directory, mmap_mode=KERNEL_MMAP_MODE)
+
+
+def export_shared_models():
+    # The first worker to get the lock exports whatever is stale; the others
+    # wait for it and then find fresh files to map
+    import fcntl
+
+    os.makedirs(COMPILED_MODELS_DIR, exist_ok=True)
+    with open(os.path.join(COMPILED_MODELS_DIR, ".export.lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        stale = stale_exports(COMPILED_MODELS_DIR)
+        if stale:
+            export_all(COMPILED_MODELS_DIR, stale, verbose=False)
+
+
+def serving_model(name, source, load_model=None):
+    """
+    Return the object used to serve `source`: the exported kernel if fresh,
+    otherwise the joblib artifact compiled in memory (or as is when
+    USE_COMPILED_MODELS=0). Trees keep an sklearn fallback for large batches.
+    """
+    load_model = load_model or (lambda: load_artifact(source))
+    if not USE_COMPILED_MODELS:
+        return load_model()
+
+    kernel = exported_kernel(name, source)
+    if kernel is None:
+        model = load_model()
+        kernel = compile_model(model)
+    else:
+        # Only unpickle the sklearn object if a large batch ever needs it
+        model = load_model
+
+    if isinstance(kernel, TreeEnsembleKernel):
+        return CompiledModel(model, kernel, COMPILED_TREE_MAX_ROWS)
+    return kernel
+
+
+# ================================
+# Model Loaders
+# ================================
+def load_diabetes_model():
+    return serving_model("diabetes", "best_diabetes_model.joblib")
+
+
+def load_banknote_model():
+    return {
+        "model": serving_model("banknote", "bank_note_authentication_model.joblib"),
+        "transformer": serving_model("banknote_transformer", "power_transformer.joblib"),
+    }
+
+
+def load_breast_cancer_model():
+    source = "breast_cancer_model.joblib"
+    metadata_path = os.path.join(COMPILED_MODELS_DIR, BREAST_CANCER_METADATA)
+
+    if USE_COMPILED_MODELS and is_fresh(metadata_path, source):
+        with open(metadata_path) as f:
+            components = json.load(f)
+        load_model = lambda: load_artifact(source)["model"]
+        load_transformer = lambda: load_artifact(source)["transformer"]
+    else:
+        # Load breast cancer model components
+        components = load_artifact(source)
+        load_model = lambda: components["model"]
+        load_transformer = lambda: components["transformer"]
+
+    breast_cancer = {
+        **components,
+        "model": serving_model("breastcancer", source, load_model),
+        "transformer": serving_model("breastcancer_transformer", source, load_transformer),
+    }
+
+    # Everything in a response that does not depend on the input is built
+    # here, once per loaded version
+    feature_info = components["feature_info"]
+    breast_cancer["feature_labels"] = {
+        name: feature_info.get(name, {}).get("label", name) for name in components["feature_names"]
+    }
+    breast_cancer["importance_list"] = [
+        {"feature": k, "importance": float(v), "label": breast_cancer["feature_labels"].get(k, k)}
+        for k, v in list(components["feature_importance"].items())[:10]
+    ]
+    breast_cancer["explainer"] = TreeExplainer(
+        tree_kernel(breast_cancer["model"]), components["feature_names"], breast_cancer["transformer"]
+    )
+    return breast_cancer
+
+
+def load_bitcoin_model():
+    source = "bitcoin_model.joblib"
+    if not BITCOIN_COMPACT:
+        return serving_model("bitcoin", source)
+
+    # The compact forest serves every batch size itself: falling back to the
+    # full sklearn forest would give different numbers for large batches
+    kernel = exported_kernel("bitcoin_compact", source)
+    if kernel is None:
+        kernel = compact_trees(compile_model(load_artifact(source)), BITCOIN_COMPACT_TREES, BITCOIN_COMPACT_MAX_DEPTH)
+    return kernel
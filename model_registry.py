@@ -0,0 +1,232 @@
+"""
+Model registry used by app.py to load its artifacts.
+
+Each model is registered with a loader function. Depending on the loading
+mode the registry either loads everything at startup, one model after the
+other ("eager") or all at once on a thread pool ("parallel"), or defers each
+load to the first request that needs it ("lazy"). Load times are recorded
+per model so startup regressions show up in benchmarks/bench_startup.py.
+
+Each model also gets a version string derived from the size and modification
+time of its source files, taken when it is loaded. Caches key on it so a
+retrained artifact never serves stale results.
+
+Models can be reloaded while the app keeps serving: reload() loads the new
+version next to the old one, warms it up with the model's warm-up function,
+and only then swaps it in, as one (model, version) pair. watch() does this
+from a background thread whenever the sources of a loaded model change. A
+thread that called pin() (app.py pins each request) keeps the model and
+version it first used until unpin(), so a request never mixes two versions.
+"""
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+LOADING_MODES = ("eager", "parallel", "lazy")
+
+
+class ModelRegistry:
+    def __init__(self, mode="parallel"):
+        if mode not in LOADING_MODES:
+            raise ValueError(f"Unknown loading mode {mode!r}, expected one of {LOADING_MODES}")
+        self.mode = mode
+        self.loaders = {}
+        self.warmers = {}
+        self.models = {}
+        self.load_times = {}
+        self.sources = {}
+        self.versions = {}
+        self.reloads = {}
+        self._entries = {}
+        self._locks = {}
+        self._reload_locks = {}
+        self._pins = threading.local()
+        self._watcher = None
+
+    def register(self, name, loader, sources=(), warm=None):
+        self.loaders[name] = loader
+        self.sources[name] = list(sources)
+        if warm is not None:
+            self.warmers[name] = warm
+        self._locks[name] = threading.Lock()
+        self._reload_locks[name] = threading.Lock()
+
+    def _entry(self, name):
+        # (model, version) of `name`, pinned to this thread if it called pin()
+        pins = getattr(self._pins, "entries", None)
+        if pins is not None and name in pins:
+            return pins[name]
+
+        # Fast path: no locking once a model is loaded
+        entry = self._entries.get(name)
+        if entry is None:
+            with self._locks[name]:
+                # Another thread may have finished loading while we waited
+                if name not in self._entries:
+                    start = time.perf_counter()
+                    version = source_version(self.sources[name])
+                    self._swap(name, self.loaders[name](), version)
+                    self.load_times[name] = time.perf_counter() - start
+                entry = self._entries[name]
+
+        if pins is not None:
+            pins[name] = entry
+        return entry
+
+    def _swap(self, name, model, version):
+        # One dict assignment publishes model and version together; models and
+        # versions are kept in step for callers that read them directly
+        self._entries[name] = (model, version)
+        self.models[name] = model
+        self.versions[name] = version
+
+    def get(self, name):
+        return self._entry(name)[0]
+
+    def entry(self, name):
+        """(model, version) of `name` as served to this thread, e.g. to hand to pinned_to() elsewhere."""
+        return self._entry(name)
+
+    def version(self, name):
+        return self._entry(name)[1]
+
+    def served_version(self, name):
+        """Version this thread serves for `name` ("" if not loaded), without loading it."""
+        pins = getattr(self._pins, "entries", None)
+        entry = (pins or {}).get(name) or self._entries.get(name)
+        return entry[1] if entry else ""
+
+    def pin(self):
+        """Keep serving this thread the versions it first uses, until unpin()."""
+        self._pins.entries = {}
+
+    def unpin(self):
+        self._pins.entries = None
+
+    @contextmanager
+    def pinned_to(self, entries):
+        """Serve this thread the given {name: (model, version)} inside the block."""
+        previous = getattr(self._pins, "entries", None)
+        self._pins.entries = dict(entries)
+        try:
+            yield
+        finally:
+            self._pins.entries = previous
+
+    def load_all(self):
+        if self.mode == "parallel":
+            with ThreadPoolExecutor(max_workers=len(self.loaders) or 1) as pool:
+                # list() re-raises the first loader error, if any
+                list(pool.map(self.get, self.loaders))
+        else:
+            for name in self.loaders:
+                self.get(name)
+
+    def start(self):
+        """Load models according to the mode; lazy mode loads nothing yet."""
+        if self.mode != "lazy":
+            self.load_all()
+
+    def is_loaded(self, name):
+        return name in self.models
+
+    # ================================
+    # Reloading
+    # ================================
+    def changed(self):
+        """Loaded models whose source files no longer match their version."""
+        return [
+            name for name, (_, version) in list(self._entries.items())
+            if source_version(self.sources[name]) != version
+        ]
+
+    def reload(self, name, force=False):
+        """
+        Load `name` again and swap it in once warmed up. Requests keep using
+        the old version meanwhile, and keep it if loading or warming fails
+        (the error is raised and recorded in reloads[name]). Returns the
+        reload record, or None when the sources are unchanged and not `force`.
+        """
+        with self._reload_locks[name]:
+            version = source_version(self.sources[name])
+            if not force and self._entries.get(name, (None, None))[1] == version:
+                return None
+
+            record = {"previous_version": self.versions.get(name), "version": version}
+            start = time.perf_counter()
+            try:
+                model = self.loaders[name]()
+                record["load_seconds"] = round(time.perf_counter() - start, 4)
+                warm = self.warmers.get(name)
+                if warm is not None:
+                    warm_start = time.perf_counter()
+                    warm(model)
+                    record["warm_seconds"] = round(time.perf_counter() - warm_start, 4)
+            except Exception as e:
+                record.update(status="failed", error=f"{type(e).__name__}: {e}",
+                              version=record["previous_version"], failed_version=version)
+                self.reloads[name] = record
+                raise
+
+            with self._locks[name]:
+                self._swap(name, model, version)
+                self.load_times[name] = time.perf_counter() - start
+            record.update(status="reloaded", at=time.strftime("%Y-%m-%dT%H:%M:%S"))
+            self.reloads[name] = record
+            return record
+
+    def watch(self, interval, before_reload=None):
+        """
+        Reload loaded models whose sources changed, checking every `interval`
+        seconds on a daemon thread. A change is only acted on once the sources
+        have looked the same for two checks in a row, so an artifact that is
+        still being written is not loaded half-way. before_reload(names) runs
+        before the models are reloaded.
+        """
+        if self._watcher is not None:
+            return self._watcher
+
+        def run():
+            pending = {}
+            while True:
+                time.sleep(interval)
+                ready = []
+                for name in self.changed():
+                    version = source_version(self.sources[name])
+                    if self.reloads.get(name, {}).get("failed_version") == version:
+                        continue  # these files already failed to load, wait for new ones
+                    if pending.get(name) == version:
+                        ready.append(name)
+                    pending[name] = version
+                if not ready:
+                    continue
+                if before_reload is not None:
+                    try:
+                        before_reload(ready)
+                    except Exception:
+                        pass  # a preparation step; the loaders still run without it
+                for name in ready:
+                    pending.pop(name, None)
+                    try:
+                        self.reload(name)
+                    except Exception:
+                        pass  # recorded in reloads[name], the old version keeps serving
+
+        self._watcher = threading.Thread(target=run, name="model-watcher", daemon=True)
+        self._watcher.start()
+        return self._watcher
+
+
+def source_version(paths):
+    """Short hash of the size and mtime of each source file."""
+    digest = hashlib.sha1()
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+        except FileNotFoundError:
+            digest.update(f"{path}:missing;".encode())
+    return digest.hexdigest()[:12]
@@ -0,0 +1,325 @@
+"""
+Asynchronous prediction log for app.py: an audit trail of every input and
+the prediction made for it, written off the request path.
+
+A request only appends a record (the feature matrix and the results it was
+answered with, as they are) to a bounded in-memory queue. A background writer
+thread turns the queued records into columns and writes them in batches,
+whenever `flush_rows` rows are pending or every `flush_interval` seconds:
+
+    <directory>/<model>/<model>-<opened at>-<pid>-<n>.parquet   (or .arrow, Arrow IPC)
+
+with one row per prediction: the log time, model version, endpoint, one
+column per feature and one per output (prediction, probability_0, ...).
+Each flush adds a row group / record batch to the model's open file; files
+are rotated after `rotate_rows` rows or `rotate_seconds` seconds. A file
+is written under a ".inprogress" name and renamed when it is closed, so
+anything matching *.parquet / *.arrow is complete. A model whose columns
+change (another feature list, JSON vs binary bitcoin output) gets a file of
+its own.
+
+The queue holds at most `max_queue_rows` rows. When a record does not fit,
+the full-queue policy decides:
+
+- "drop_newest" (default): the new record is dropped; requests never wait
+- "drop_oldest": the oldest queued records are dropped to make room
+- "block": the request waits up to `block_timeout` seconds for the writer
+  to drain the queue, then the record is dropped
+
+Every dropped row is counted in stats(), so gaps in the trail are visible.
+pyarrow is required (it is imported when the logger is created).
+"""
+import itertools
+import os
+import threading
+import time
+from collections import defaultdict, deque
+
+import numpy as np
+
+LOG_FORMATS = ("parquet", "arrow")
+FULL_POLICIES = ("drop_newest", "drop_oldest", "block")
+IN_PROGRESS_SUFFIX = ".inprogress"
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet  # noqa: F401, pa.parquet below
+    except ImportError:
+        raise RuntimeError("The prediction log needs pyarrow installed") from None
+    return pa
+
+
+def result_columns(results):
+    """
+    Columns of per-row results as returned by app.cached_predict: a number,
+    a (prediction, probabilities) pair, or a list of outputs (multi-output
+    regressors), e.g. [(1, [0.2, 0.8]), ...] -> prediction, probability_0, probability_1.
+    """
+    first = results[0]
+    if isinstance(first, tuple):
+        predictions, probabilities = zip(*results)
+        columns = {"prediction": np.asarray(predictions)}
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        for k in range(probabilities.shape[1]):
+            columns[f"probability_{k}"] = probabilities[:, k]
+        return columns
+    if isinstance(first, list):
+        outputs = np.asarray(results, dtype=np.float64)
+        return {f"prediction_{k}": outputs[:, k] for k in range(outputs.shape[1])}
+    return {"prediction": np.asarray(results)}
+
+
+class LogFile:
+    """One open, rotating log file of a model."""
+
+    def __init__(self, pa, path, schema, fmt):
+        self.path = path
+        self.schema = schema
+        self.rows = 0
+        self.opened_at = time.monotonic()
+        self._pa = pa
+        if fmt == "parquet":
+            self._writer = pa.parquet.ParquetWriter(path + IN_PROGRESS_SUFFIX, schema)
+        else:
+            self._writer = pa.ipc.new_file(path + IN_PROGRESS_SUFFIX, schema)
+
+    def write(self, table):
+        self._writer.write_table(table)
+        self.rows += table.num_rows
+
+    def close(self):
+        self._writer.close()
+        os.replace(self.path + IN_PROGRESS_SUFFIX, self.path)
+
+
+class PredictionLogger:
+    def __init__(self, directory, fmt="parquet", max_queue_rows=100000, flush_rows=5000, flush_interval=1.0,
+                 rotate_rows=1000000, rotate_seconds=3600, full_policy="drop_newest", block_timeout=0.05):
+        if fmt not in LOG_FORMATS:
+            raise ValueError(f"Unknown prediction log format {fmt!r}, expected one of {LOG_FORMATS}")
+        if full_policy not in FULL_POLICIES:
+            raise ValueError(f"Unknown full-queue policy {full_policy!r}, expected one of {FULL_POLICIES}")
+        self._pa = _pyarrow()
+        self.directory = directory
+        self.fmt = fmt
+        self.max_queue_rows = max_queue_rows
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.rotate_rows = rotate_rows
+        self.rotate_seconds = rotate_seconds
+        self.full_policy = full_policy
+        self.block_timeout = block_timeout
+
+        self.logged_rows = 0
+        self.dropped_rows = defaultdict(int)  # policy that dropped them
+        self.written_rows = 0
+        self.files_closed = 0
+        self.flushes = 0
+        self.flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+        self.write_errors = 0
+        self.last_error = None
+
+        self._pending = deque()
+        self._pending_rows = 0
+        self._cond = threading.Condition()
+        self._flush_requested = 0
+        self._flushed = 0
+        self._closing = False
+        self._files = {}  # (model, column names) -> LogFile
+        self._sequence = itertools.count()
+        self._writer = threading.Thread(target=self._run, name="prediction-log", daemon=True)
+        self._writer.start()
+
+    # ================================
+    # Request Path
+    # ================================
+    def log(self, model, version, features, feature_names, outputs, endpoint=""):
+        """
+        Queue the rows of `features` with their `outputs`: per-row results
+        (see result_columns) or {name: 1-D array}. Returns False if dropped.
+        Nothing is copied, so the caller must not modify the arrays afterwards.
+        """
+        n_rows = len(features)
+        if not n_rows:
+            return True
+        record = (time.time(), model, version, endpoint, features, feature_names, outputs)
+        with self._cond:
+            if self._pending_rows + n_rows > self.max_queue_rows and not self._make_room(n_rows):
+                self.dropped_rows[self.full_policy] += n_rows
+                return False
+            self._pending.append(record)
+            self._pending_rows += n_rows
+            self.logged_rows += n_rows
+            if self._pending_rows >= self.flush_rows:
+                self._cond.notify_all()
+        return True
+
+    def _make_room(self, n_rows):
+        # Called holding the lock, with the queue too full for n_rows more
+        if n_rows > self.max_queue_rows or self.full_policy == "drop_newest":
+            return False
+        if self.full_policy == "drop_oldest":
+            while self._pending_rows + n_rows > self.max_queue_rows:
+                dropped = len(self._pending.popleft()[4])
+                self._pending_rows -= dropped
+                self.logged_rows -= dropped
+                self.dropped_rows["drop_oldest"] += dropped
+            return True
+        self._cond.notify_all()  # wake the writer early
+        return self._cond.wait_for(
+            lambda: self._pending_rows + n_rows <= self.max_queue_rows, self.block_timeout
+        )
+
+    # ================================
+    # Writer Thread
+    # ================================
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._pending_rows >= self.flush_rows or self._flush_requested > self._flushed
+                    or self._closing,
+                    self.flush_interval,
+                )
+                records = list(self._pending)
+                self._pending.clear()
+                self._pending_rows = 0
+                flush_requested = self._flush_requested
+                closing = self._closing
+                self._cond.notify_all()  # blocked loggers have room again
+
+            if records:
+                self._write(records)
+            self._rotate(force=closing or flush_requested > self._flushed)
+
+            with self._cond:
+                self._flushed = flush_requested
+                self._cond.notify_all()
+            if closing:
+                return
+
+    def _write(self, records):
+        start = time.perf_counter()
+        # Records of the same model, version, endpoint and layout become
+        # columns together: one concatenate per column rather than per request
+        groups = defaultdict(list)
+        for record in records:
+            _, model, version, endpoint, _, feature_names, outputs = record
+            layout = tuple(outputs) if isinstance(outputs, dict) else "rows"
+            groups[model, version, endpoint, tuple(feature_names), layout].append(record)
+
+        tables = defaultdict(list)
+        for (model, version, endpoint, feature_names, layout), group in groups.items():
+            n_rows = sum(len(record[4]) for record in group)
+            try:
+                table = self._pa.table(self._columns(group, version, endpoint, feature_names, layout))
+            except Exception as e:
+                self._error(e, n_rows)
+                continue
+            tables[model, tuple(table.schema.names)].append(table)
+
+        for (model, names), parts in tables.items():
+            for table in parts:
+                try:
+                    self._log_file(model, names, table.schema).write(table)
+                    self.written_rows += table.num_rows
+                except Exception as e:
+                    self._error(e, table.num_rows)
+                    self._close_file((model, names))  # start a fresh file next time
+
+        seconds = time.perf_counter() - start
+        self.flushes += 1
+        self.flush_seconds += seconds
+        self.max_flush_seconds = max(self.max_flush_seconds, seconds)
+
+    @staticmethod
+    def _columns(group, version, endpoint, feature_names, layout):
+        counts = [len(record[4]) for record in group]
+        n_rows = sum(counts)
+        logged_at = np.array([record[0] for record in group]) * 1e6
+        columns = {
+            "logged_at": np.repeat(logged_at.astype(np.int64), counts).astype("datetime64[us]"),
+            "model_version": np.full(n_rows, version, dtype=object),
+            "endpoint": np.full(n_rows, endpoint, dtype=object),
+        }
+        features = np.concatenate([np.asarray(record[4], dtype=np.float64) for record in group])
+        for j, name in enumerate(feature_names):
+            columns[name] = features[:, j]
+        if layout == "rows":
+            outputs = result_columns([result for record in group for result in record[6]])
+        else:
+            outputs = {name: np.concatenate([np.asarray(record[6][name]) for record in group]) for name in layout}
+        columns.update(outputs)
+        return columns
+
+    def _log_file(self, model, names, schema):
+        key = (model, names)
+        log_file = self._files.get(key)
+        if log_file is not None and not log_file.schema.equals(schema):
+            self._close_file(key)  # e.g. integer predictions after float ones
+            log_file = None
+        if log_file is None:
+            directory = os.path.join(self.directory, model)
+            os.makedirs(directory, exist_ok=True)
+            name = f"{model}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(self._sequence)}.{self.fmt}"
+            log_file = self._files[key] = LogFile(self._pa, os.path.join(directory, name), schema, self.fmt)
+        return log_file
+
+    def _rotate(self, force=False):
+        now = time.monotonic()
+        for key, log_file in list(self._files.items()):
+            if force or log_file.rows >= self.rotate_rows or now - log_file.opened_at >= self.rotate_seconds:
+                self._close_file(key)
+
+    def _close_file(self, key):
+        log_file = self._files.pop(key)
+        try:
+            log_file.close()
+            self.files_closed += 1
+        except Exception as e:
+            self._error(e, 0)
+
+    def _error(self, e, n_rows):
+        self.write_errors += 1
+        self.dropped_rows["write_error"] += n_rows
+        self.last_error = f"{type(e).__name__}: {e}"
+
+    # ================================
+    # Control and Stats
+    # ================================
+    def flush(self, timeout=None):
+        """Write everything queued so far and close the open files; False on timeout."""
+        with self._cond:
+            self._flush_requested += 1
+            target = self._flush_requested
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._flushed >= target, timeout)
+
+    def close(self, timeout=None):
+        """Write what is queued, close the files and stop the writer."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        self._writer.join(timeout)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "directory": self.directory,
+                "format": self.fmt,
+                "full_policy": self.full_policy,
+                "queue": {"rows": self._pending_rows, "records": len(self._pending), "max_rows": self.max_queue_rows},
+                "logged_rows": self.logged_rows,
+                "written_rows": self.written_rows,
+                "dropped_rows": dict(self.dropped_rows),
+                "open_files": [log_file.path + IN_PROGRESS_SUFFIX for log_file in self._files.values()],
+                "files_closed": self.files_closed,
+                "flushes": self.flushes,
+                "mean_flush_ms": round(self.flush_seconds / self.flushes * 1e3, 3) if self.flushes else None,
+                "max_flush_ms": round(self.max_flush_seconds * 1e3, 3),
+                "write_errors": self.write_errors,
+                "last_error": self.last_error,
+            }
@@ -0,0 +1,199 @@
+"""
+Streaming price ingestion for the bitcoin model.
+
+bitcoinmodel.py trains on 1-minute bars with lag1 / lag2 = the closes of the
+two previous bars. PriceStreams keeps a fixed-size ring buffer of bars per
+symbol and updates the model's feature row in O(1) on every tick:
+
+- a tick in the same minute as the last bar only replaces that bar's close
+- a tick in a new minute closes the bar, shifting price -> lag1 -> lag2
+
+so /api/bitcoin/predict can read a ready-made [lag1, lag2, price, hour,
+minute, dayofweek] row instead of repeating the current price as both lags.
+
+Run this file to replay a CSV of minute bars (timestamp, price columns, as
+built in bitcoinmodel.py) into a running server:
+    python price_stream.py bars.csv --url http://localhost:5000 --speed 60
+"""
+import argparse
+import csv
+import json
+import queue
+import threading
+import time
+import urllib.request
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Column order of the feature row, as trained in bitcoinmodel.py
+FEATURE_COLUMNS = ["lag1", "lag2", "price", "hour", "minute", "dayofweek"]
+
+
+def parse_timestamp(value):
+    """Epoch seconds or an ISO 8601 string -> aware datetime (UTC if naive)."""
+    if value is None:
+        return datetime.now(timezone.utc)
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, timezone.utc)
+    parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class PriceRingBuffer:
+    def __init__(self, capacity=1440):
+        if capacity < 3:
+            raise ValueError("capacity must hold at least 3 bars")
+        self.capacity = capacity
+        self.minutes = np.zeros(capacity, dtype=np.int64)  # epoch minute of each bar
+        self.prices = np.zeros(capacity)
+        self.count = 0  # bars appended so far (not capped)
+        self.feature_row = np.zeros(len(FEATURE_COLUMNS))
+
+    def append(self, timestamp, price):
+        """Add one tick; returns True when it opened a new bar."""
+        minute = int(timestamp.timestamp() // 60)
+        last = (self.count - 1) % self.capacity
+
+        if self.count and minute < self.minutes[last]:
+            raise ValueError("Tick is older than the latest bar")
+
+        new_bar = not self.count or minute > self.minutes[last]
+        if new_bar:
+            slot = self.count % self.capacity
+            self.minutes[slot] = minute
+            self.count += 1
+
+            row = self.feature_row
+            row[1] = row[0]  # lag2 <- lag1
+            row[0] = row[2]  # lag1 <- previous close
+            # UTC, from the epoch minute, as in training (bar_store.bar_features)
+            row[3] = (minute // 60) % 24
+            row[4] = minute % 60
+            row[5] = (minute // 1440 + 3) % 7  # 1970-01-01 was a Thursday
+        else:
+            slot = last
+
+        self.prices[slot] = price
+        self.feature_row[2] = price
+        return new_bar
+
+    def ready(self):
+        # Both lags are only real once three bars have been seen
+        return self.count >= 3
+
+    def history(self):
+        """(epoch minutes, prices) of the buffered bars, oldest first."""
+        n = min(self.count, self.capacity)
+        order = (np.arange(self.count - n, self.count)) % self.capacity
+        return self.minutes[order], self.prices[order]
+
+
+class PriceStreams:
+    """Ring buffers per symbol plus the subscribers of the prediction stream."""
+
+    def __init__(self, capacity=1440, subscriber_queue_size=100):
+        self.capacity = capacity
+        self.subscriber_queue_size = subscriber_queue_size
+        self.buffers = {}
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def ingest(self, symbol, timestamp, price):
+        with self._lock:
+            buffer = self.buffers.get(symbol)
+            if buffer is None:
+                buffer = self.buffers[symbol] = PriceRingBuffer(self.capacity)
+            buffer.append(timestamp, price)
+            return buffer.feature_row.copy() if buffer.ready() else None
+
+    def features(self, symbol):
+        """The current feature row for `symbol`, or None without enough history."""
+        with self._lock:
+            buffer = self.buffers.get(symbol)
+            if buffer is None or not buffer.ready():
+                return None
+            return buffer.feature_row.copy()
+
+    def subscribe(self):
+        subscriber = queue.Queue(maxsize=self.subscriber_queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def has_subscribers(self):
+        return bool(self._subscribers)
+
+    def publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                # A slow client loses events rather than holding up ingestion
+                pass
+
+
+# ================================
+# CSV Replay
+# ================================
+def read_bars(path):
+    """Yield (timestamp, price) from a CSV with timestamp/Datetime and price/Close columns."""
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            timestamp = row.get("timestamp") or row.get("Datetime")
+            price = row.get("price") or row.get("Close")
+            yield parse_timestamp(timestamp), float(price)
+
+
+def replay(path, url, symbol="BTC-USD", speed=0.0, batch_size=1):
+    """
+    Post the bars of `path` to the server's ingestion endpoint.
+
+    speed is how many bar-minutes to replay per real second (0 = as fast as
+    possible). Returns the number of bars sent.
+    """
+    endpoint = url.rstrip("/") + "/api/bitcoin/ingest"
+    sent = 0
+    pending = []
+    previous = None
+
+    def flush():
+        body = json.dumps({"symbol": symbol, "ticks": pending}).encode()
+        request = urllib.request.Request(endpoint, data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request) as response:
+            response.read()
+        pending.clear()
+
+    for timestamp, price in read_bars(path):
+        if speed and previous is not None:
+            time.sleep(max(0.0, (timestamp - previous).total_seconds() / 60 / speed))
+        previous = timestamp
+
+        pending.append({"timestamp": timestamp.isoformat(), "price": price})
+        sent += 1
+        if len(pending) >= batch_size:
+            flush()
+    if pending:
+        flush()
+    return sent
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a CSV of minute bars into the prediction server")
+    parser.add_argument("csv", help="CSV with timestamp and price columns")
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--symbol", default="BTC-USD")
+    parser.add_argument("--speed", type=float, default=0.0, help="bar-minutes per second, 0 = no delay")
+    parser.add_argument("--batch-size", type=int, default=1, help="ticks per request")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    count = replay(args.csv, args.url, args.symbol, args.speed, args.batch_size)
+    elapsed = time.perf_counter() - start
+    print(f"Replayed {count} bars in {elapsed:.2f}s ({count / elapsed:.0f} bars/s)")
@@ -0,0 +1,187 @@
+"""
+Request schemas generated from a model's feature list.
+
+A FeatureSchema is built once per feature list. It holds an itemgetter over
+the feature names, so one C-level call pulls every field out of a payload
+and one array("d") call converts them to float64. Per-field checks run only
+when that fast path fails, to report which fields were missing or invalid
+as structured errors instead of a bare KeyError message.
+
+Two payload layouts are accepted for batches:
+    {"records": [{feature: value, ...}, ...]}
+    {"columns": {feature: [values, ...], ...}}
+The column layout converts straight into the feature matrix without
+building a Python row per record.
+"""
+from array import array
+from functools import lru_cache
+from math import isfinite
+from operator import itemgetter
+
+import numpy as np
+
+
+class SchemaError(ValueError):
+    """Invalid payload; `errors` lists {"field": ..., "error": ...} dicts."""
+
+    def __init__(self, errors):
+        fields = ", ".join(error["field"] for error in errors)
+        super().__init__(f"Invalid input for: {fields}")
+        self.errors = errors
+
+
+def _value_error(value):
+    if value is None or isinstance(value, (dict, list)):
+        return f"Expected a number, got {type(value).__name__ if value is not None else 'null'}"
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return f"Expected a number, got {value!r}"
+    if not isfinite(number):
+        return "Must be a finite number"
+    return None
+
+
+class FeatureSchema:
+    def __init__(self, feature_names, max_rows=None):
+        self.feature_names = list(feature_names)
+        self.n_features = len(self.feature_names)
+        self.max_rows = max_rows
+        getter = itemgetter(*self.feature_names)
+        # itemgetter returns a bare value (not a tuple) for a single name
+        self._getter = getter if self.n_features > 1 else (lambda data: (getter(data),))
+
+    # ================================
+    # Single Rows
+    # ================================
+    def parse_row(self, data):
+        """Payload dict -> (1, n_features) float64 array, or raise SchemaError."""
+        if not isinstance(data, dict):
+            raise SchemaError([{"field": "body", "error": "Expected a JSON object"}])
+        try:
+            # array("d") converts a tuple of JSON numbers faster than np.array
+            values = array("d", self._getter(data))
+        except (KeyError, TypeError, ValueError):
+            pass
+        else:
+            if isfinite(sum(values)):
+                return np.frombuffer(values).reshape(1, -1)
+
+        # Slow path: find the bad fields. Numeric strings are still accepted,
+        # and so are rows whose sum merely overflowed.
+        errors = self.row_errors(data)
+        if errors:
+            raise SchemaError(errors)
+        return np.array([[float(data[name]) for name in self.feature_names]])
+
+    def row_errors(self, data):
+        errors = []
+        for name in self.feature_names:
+            if name not in data:
+                errors.append({"field": name, "error": "Missing field"})
+                continue
+            message = _value_error(data[name])
+            if message:
+                errors.append({"field": name, "error": message})
+        return errors
+
+    # ================================
+    # Batches
+    # ================================
+    def parse_batch(self, data):
+        """
+        Convert a batch payload into a float matrix, keeping per-row errors.
+
+        Rows that fail validation are reported by index instead of failing
+        the whole batch.
+
+        Returns:
+            features: (n_valid, n_features) float array of the valid rows
+            valid_rows: input indices of the rows in `features`
+            errors: dict of input index -> error message
+            n_rows: total number of rows in the payload
+        """
+        if not isinstance(data, dict):
+            raise ValueError("Expected a JSON object with 'records' or 'columns'")
+
+        if "columns" in data:
+            features, errors = self._parse_columns(data["columns"])
+        elif "records" in data:
+            features, errors = self._parse_records(data["records"])
+        else:
+            raise ValueError("Expected a JSON object with 'records' or 'columns'")
+
+        bad = np.zeros(len(features), dtype=bool)
+        bad[list(errors)] = True
+        not_finite = ~bad & ~np.isfinite(features).all(axis=1)
+        for i in np.flatnonzero(not_finite):
+            errors[int(i)] = "Features must be finite numbers"
+        bad |= not_finite
+
+        valid_rows = np.flatnonzero(~bad)
+        return features[valid_rows], valid_rows, errors, len(features)
+
+    def _check_size(self, n_rows):
+        if self.max_rows is not None and n_rows > self.max_rows:
+            raise ValueError(f"Batch too large: {n_rows} rows (max {self.max_rows})")
+
+    def _parse_columns(self, columns):
+        if not isinstance(columns, dict):
+            raise ValueError("'columns' must map feature names to arrays")
+        missing = [name for name in self.feature_names if name not in columns]
+        if missing:
+            raise ValueError(f"Missing columns: {missing}")
+        values = self._getter(columns)
+        lengths = {len(column) for column in values}
+        if len(lengths) != 1:
+            raise ValueError("All columns must have the same length")
+        n_rows = lengths.pop()
+        self._check_size(n_rows)
+
+        errors = {}
+        try:
+            # One conversion for the whole matrix; transposing makes it row-major
+            return np.array(values, dtype=np.float64).T.copy(), errors
+        except (TypeError, ValueError):
+            pass
+
+        features = np.empty((n_rows, self.n_features))
+        for j, (name, column) in enumerate(zip(self.feature_names, values)):
+            try:
+                features[:, j] = np.asarray(column, dtype=np.float64)
+            except (TypeError, ValueError):
+                # Fall back to per-value conversion only for the broken column
+                for i, value in enumerate(column):
+                    try:
+                        features[i, j] = float(value)
+                    except (TypeError, ValueError):
+                        features[i, j] = np.nan
+                        errors.setdefault(i, f"Invalid value for '{name}': {value!r}")
+        return features, errors
+
+    def _parse_records(self, records):
+        if not isinstance(records, list):
+            raise ValueError("'records' must be a list")
+        self._check_size(len(records))
+
+        features = np.empty((len(records), self.n_features))
+        errors = {}
+        getter = self._getter
+        for i, record in enumerate(records):
+            try:
+                features[i] = getter(record)
+            except KeyError as e:
+                errors[i] = f"Missing field: {e.args[0]}"
+            except (TypeError, ValueError) as e:
+                errors[i] = str(e)
+        return features, errors
+
+
+@lru_cache(maxsize=None)
+def _cached_schema(feature_names, max_rows):
+    return FeatureSchema(feature_names, max_rows)
+
+
+def schema_for(feature_names, max_rows=None):
+    """The compiled schema of a feature list, built once per distinct list."""
+    return _cached_schema(tuple(feature_names), max_rows)
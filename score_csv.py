@@ -0,0 +1,209 @@
+"""
+Offline scoring of CSV files with the same transformers and models as app.py.
+
+The input is read in fixed-size chunks, each chunk is scored on a process
+pool, and results are appended to the output (CSV, or Parquet when the
+output ends in .parquet) in input order. At most 2 chunks per worker are in
+flight, so memory stays bounded however large the file is.
+
+    python score_csv.py breastcancer data.csv scored.csv --keep id diagnosis
+    python score_csv.py banknote bank_note_authentication.csv scored.parquet --workers 4
+
+Input columns are matched to the model's features by name. For breast cancer
+the Wisconsin CSV spelling (radius_mean, radius_se, radius_worst, ...) is
+mapped to the sklearn names (mean radius, radius error, worst radius, ...)
+automatically; anything else can be mapped with --map column=feature.
+Rows with missing or non-numeric features are kept, with empty predictions.
+"""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from model_loaders import (
+    BANKNOTE_FEATURES, DIABETES_FEATURES, load_banknote_model, load_breast_cancer_model, load_diabetes_model,
+)
+
+# Scores only what a CSV row can describe on its own; bitcoin needs the
+# live price history, see price_stream.py. The loaders are the ones app.py
+# serves with, called directly: no registry, reload watcher, prediction log
+# or shadow models.
+LOADERS = {
+    "diabetes": load_diabetes_model,
+    "banknote": load_banknote_model,
+    "breastcancer": load_breast_cancer_model,
+}
+
+BREAST_CANCER_SUFFIXES = {"_mean": "mean {}", "_se": "{} error", "_worst": "worst {}"}
+
+# Models loaded in this process, on first use
+_loaded = {}
+
+
+def load_model(model):
+    if model not in _loaded:
+        _loaded[model] = LOADERS[model]()
+    return _loaded[model]
+
+
+def feature_names(model):
+    if model == "breastcancer":
+        return list(load_model("breastcancer")["feature_names"])
+    return list(DIABETES_FEATURES if model == "diabetes" else BANKNOTE_FEATURES)
+
+
+def column_mapping(columns, features, overrides=()):
+    """{input column: model feature} for every feature, or raise with the ones missing."""
+    mapping = {}
+    wanted = set(features)
+    for column in columns:
+        if column in wanted:
+            mapping[column] = column
+            continue
+        for suffix, template in BREAST_CANCER_SUFFIXES.items():
+            if column.endswith(suffix):
+                # fractal_dimension_mean -> mean fractal dimension
+                feature = template.format(column[: -len(suffix)].replace("_", " "))
+                if feature in wanted:
+                    mapping[column] = feature
+    for override in overrides:
+        column, _, feature = override.partition("=")
+        mapping = {key: value for key, value in mapping.items() if value != feature}
+        mapping[column] = feature
+
+    missing = wanted - set(mapping.values())
+    if missing:
+        raise SystemExit(f"No input column for features: {sorted(missing)} (use --map column=feature)")
+    return mapping
+
+
+# ================================
+# Scoring Workers
+# ================================
+def probability_columns(prediction, probability):
+    columns = {"prediction": prediction.astype(np.int64)}
+    for k in range(probability.shape[1]):
+        columns[f"probability_{k}"] = probability[:, k]
+    return columns
+
+
+def predict_columns(model, features):
+    """Output columns for a matrix of valid rows, as app.py's batch routes return them."""
+    if model == "diabetes":
+        return {"prediction": load_model("diabetes").predict(features)}
+    if model == "banknote":
+        components = load_model("banknote")
+        features = features.copy()
+        # Apply power transformer ONLY on curt & entr
+        features[:, 2:4] = components["transformer"].transform(features[:, 2:4])
+    else:
+        components = load_model("breastcancer")
+        features = components["transformer"].transform(features)
+    classifier = components["model"]
+    return probability_columns(classifier.predict(features), classifier.predict_proba(features))
+
+
+def score_chunk(model, features):
+    """Score one (n_rows, n_features) matrix; rows with NaN get empty outputs."""
+    valid = np.isfinite(features).all(axis=1)
+    # Invalid rows are scored as zeros (keeps the batch whole) and blanked after
+    columns = predict_columns(model, np.where(valid[:, None], features, 0.0))
+
+    results = {}
+    for name, values in columns.items():
+        if np.issubdtype(values.dtype, np.integer):
+            # Nullable integers keep one dtype across chunks, even with gaps
+            results[name] = pd.array(values, dtype="Int64")
+            results[name][~valid] = pd.NA
+        else:
+            results[name] = np.where(valid, values, np.nan)
+    return results
+
+
+class ResultWriter:
+    def __init__(self, path):
+        self.path = path
+        self.parquet = path.endswith(".parquet")
+        self.writer = None
+        self.rows = 0
+
+    def write(self, frame):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self.writer is None:
+                self.writer = pq.ParquetWriter(self.path, table.schema)
+            self.writer.write_table(table)
+        else:
+            frame.to_csv(self.path, mode="w" if self.rows == 0 else "a", header=self.rows == 0, index=False)
+        self.rows += len(frame)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def score_file(model, input_path, output_path, chunksize=10000, workers=None, keep=(), overrides=()):
+    names = feature_names(model)
+    columns = pd.read_csv(input_path, nrows=0).columns
+    mapping = column_mapping(columns, names, overrides)
+    by_feature = {feature: column for column, feature in mapping.items()}
+    usecols = [by_feature[name] for name in names]
+
+    reader = pd.read_csv(input_path, chunksize=chunksize, usecols=lambda c: c in set(usecols) | set(keep))
+    writer = ResultWriter(output_path)
+    workers = os.cpu_count() if workers is None else workers
+    pool = ProcessPoolExecutor(workers) if workers > 0 else None
+    max_in_flight = 2 * workers
+    pending = deque()
+
+    def flush(kept, future):
+        scored = future.result() if pool else future
+        writer.write(pd.concat([kept.reset_index(drop=True), pd.DataFrame(scored)], axis=1))
+
+    start = time.perf_counter()
+    try:
+        for chunk in reader:
+            features = chunk[usecols].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+            kept = chunk[[column for column in keep if column in chunk]]
+            if pool is None:
+                flush(kept, score_chunk(model, features))
+                continue
+            pending.append((kept, pool.submit(score_chunk, model, features)))
+            if len(pending) >= max_in_flight:
+                flush(*pending.popleft())
+        while pending:
+            flush(*pending.popleft())
+    finally:
+        writer.close()
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    return writer.rows, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("model", choices=list(LOADERS))
+    parser.add_argument("input", help="CSV file to score")
+    parser.add_argument("output", help="output .csv or .parquet")
+    parser.add_argument("--chunksize", type=int, default=10000, help="rows per chunk")
+    parser.add_argument("--workers", type=int, default=None, help="scoring processes (0 = score in this process)")
+    parser.add_argument("--keep", nargs="*", default=[], help="input columns copied to the output, e.g. id")
+    parser.add_argument("--map", nargs="*", default=[], metavar="COLUMN=FEATURE", help="extra column mappings")
+    args = parser.parse_args()
+
+    rows, elapsed = score_file(
+        args.model, args.input, args.output, args.chunksize, args.workers, args.keep, args.map
+    )
+    print(f"Scored {rows} rows in {elapsed:.2f}s ({rows / elapsed:.0f} rows/s) -> {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Shadow scoring of candidate models for app.py.
+
+The served ("primary") model answers the request as usual. Its inputs and
+outputs are then handed to a ShadowScorer, which has one or more candidate
+("shadow") models score the same rows on background worker threads and
+compares their predictions with the primary's. Nothing a shadow does can slow
+down or fail a response:
+
+- submit() never blocks: jobs go into a bounded queue, and when the workers
+  fall behind and the queue is full the job is dropped (and counted)
+- shadow errors are counted and otherwise ignored
+
+Everything is aggregated incrementally, per model version, so the stats
+cost the same after a million rows as after ten: rows and batches scored,
+scoring time (sum, max and a latency histogram per batch), and for each
+shadow the rows it agreed with the primary on and the summed absolute
+difference of the positive class probability.
+
+    scorer = ShadowScorer(score_candidate, ["banknote_decision_tree"], workers=1, max_queue=1000)
+    scorer.submit(features, primary_version, prediction, probability, seconds)
+    scorer.stats()
+
+score_candidate(name, features) returns (version, prediction, probability).
+"""
+import queue
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from metrics import Histogram
+
+
+class ScoreTiming:
+    """Batches, rows and time spent scoring them, aggregated as they come in."""
+
+    def __init__(self):
+        self.batches = 0
+        self.rows = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.latency = Histogram()
+
+    def observe(self, rows, seconds):
+        self.batches += 1
+        self.rows += rows
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.latency.observe(seconds)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "rows": self.rows,
+            "seconds": round(self.seconds, 6),
+            "mean_batch_ms": round(self.seconds / self.batches * 1e3, 4) if self.batches else None,
+            "mean_row_us": round(self.seconds / self.rows * 1e6, 3) if self.rows else None,
+            "p50_batch_ms": _ms(self.latency.quantile(0.5)),
+            "p99_batch_ms": _ms(self.latency.quantile(0.99)),
+            "max_batch_ms": round(self.max_seconds * 1e3, 4),
+        }
+
+
+class Agreement:
+    """How often a shadow version predicted what a primary version did."""
+
+    def __init__(self):
+        self.rows = 0
+        self.agreed = 0
+        self.probability_diff = 0.0
+
+    def observe(self, prediction, shadow_prediction, probability, shadow_probability):
+        self.rows += len(prediction)
+        self.agreed += int(np.count_nonzero(prediction == shadow_prediction))
+        # Positive class (last column) probability
+        self.probability_diff += float(np.abs(probability[:, -1] - shadow_probability[:, -1]).sum())
+
+    def stats(self):
+        return {
+            "rows": self.rows,
+            "agreed": self.agreed,
+            "agreement_rate": round(self.agreed / self.rows, 6) if self.rows else None,
+            "mean_abs_probability_diff": round(self.probability_diff / self.rows, 6) if self.rows else None,
+        }
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1e3, 4)
+
+
+class ShadowScorer:
+    def __init__(self, score, shadows, workers=1, max_queue=1000, name="shadow"):
+        self.score = score
+        self.shadows = list(shadows)
+        self.max_queue = max_queue
+        self.dropped_batches = 0
+        self.dropped_rows = 0
+        self.errors = defaultdict(int)  # shadow name
+        self.primary = defaultdict(ScoreTiming)  # primary version
+        self.timings = defaultdict(ScoreTiming)  # (shadow name, version)
+        self.agreement = defaultdict(Agreement)  # (shadow name, version, primary version)
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(max_queue)
+        self._workers = [
+            threading.Thread(target=self._run, name=f"{name}-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, features, version, prediction, probability, seconds):
+        """
+        Queue the primary's result for `features` (scored by `version` in
+        `seconds`) for the shadows. Returns False if the job was dropped.
+        The arrays are kept as they are: callers must not modify them afterwards.
+        """
+        try:
+            self._queue.put_nowait((features, version, prediction, probability))
+        except queue.Full:
+            with self._lock:
+                self.dropped_batches += 1
+                self.dropped_rows += len(features)
+            return False
+        with self._lock:
+            self.primary[version].observe(len(features), seconds)
+        return True
+
+    def _run(self):
+        while True:
+            features, version, prediction, probability = self._queue.get()
+            for name in self.shadows:
+                start = time.perf_counter()
+                try:
+                    shadow_version, shadow_prediction, shadow_probability = self.score(name, features)
+                except Exception:
+                    with self._lock:
+                        self.errors[name] += 1
+                    continue
+                seconds = time.perf_counter() - start
+                with self._lock:
+                    self.timings[name, shadow_version].observe(len(features), seconds)
+                    self.agreement[name, shadow_version, version].observe(
+                        prediction, shadow_prediction, probability, shadow_probability
+                    )
+            self._queue.task_done()
+
+    def join(self):
+        """Wait until every queued job has been scored (benchmarks and tests)."""
+        self._queue.join()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": len(self._workers),
+                "queue": {
+                    "size": self._queue.qsize(),
+                    "max_size": self.max_queue,
+                    "dropped_batches": self.dropped_batches,
+                    "dropped_rows": self.dropped_rows,
+                },
+                "primary": {version: timing.stats() for version, timing in self.primary.items()},
+                "shadows": {
+                    name: {
+                        "errors": self.errors[name],
+                        "versions": {
+                            version: {
+                                **timing.stats(),
+                                "agreement": {
+                                    primary_version: agreement.stats()
+                                    for (shadow, shadow_version, primary_version), agreement
+                                    in self.agreement.items()
+                                    if shadow == name and shadow_version == version
+                                },
+                            }
+                            for (shadow, version), timing in self.timings.items() if shadow == name
+                        },
+                    }
+                    for name in self.shadows
+                },
+            }
@@ -0,0 +1,104 @@
+"""
+Admission control: admission.py and its hooks in app.py.
+
+Run with:  python -m pytest test_admission.py
+"""
+import os
+import threading
+import time
+
+import pytest
+
+from admission import AdmissionGate, Rejected, parse_limits
+
+os.environ.setdefault("MODEL_LOADING", "lazy")
+os.environ.setdefault("MODEL_RELOAD_INTERVAL", "0")
+
+BANKNOTE_ROW = {"var": 1.0, "skew": 2.0, "curt": 3.0, "entr": 4.0}
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        assert time.perf_counter() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def test_queue_full_is_429_with_retry_after():
+    gate = AdmissionGate(max_concurrent=1, max_queue=0, max_wait=1)
+    gate.acquire()
+    with pytest.raises(Rejected) as e:
+        gate.acquire()
+    assert (e.value.status, e.value.reason) == (429, "queue_full")
+    assert e.value.retry_after >= 1
+
+
+def test_wait_past_max_wait_is_503():
+    gate = AdmissionGate(max_concurrent=1, max_queue=4, max_wait=0.05)
+    gate.acquire()
+    start = time.perf_counter()
+    with pytest.raises(Rejected) as e:
+        gate.acquire()
+    assert (e.value.status, e.value.reason) == (503, "queue_timeout")
+    assert time.perf_counter() - start >= 0.05
+    assert gate.stats()["queued"] == 0
+
+
+def test_waiters_are_admitted_in_order():
+    gate = AdmissionGate(max_concurrent=1, max_queue=10, max_wait=5)
+    gate.acquire()
+    admitted = []
+
+    def waiter(i):
+        gate.acquire()
+        admitted.append(i)
+        gate.release(0.0)
+
+    threads = []
+    for i in range(5):
+        thread = threading.Thread(target=waiter, args=(i,))
+        thread.start()
+        threads.append(thread)
+        wait_until(lambda: gate.queued == i + 1)  # queued one after the other
+    gate.release(0.0)
+    for thread in threads:
+        thread.join()
+    assert admitted == [0, 1, 2, 3, 4]
+    assert gate.stats()["in_flight"] == 0
+
+
+def test_parse_limits():
+    assert parse_limits("bitcoin=2:16, banknote=8:64") == {"bitcoin": (2, 16), "banknote": (8, 64)}
+    with pytest.raises(ValueError):
+        parse_limits("bitcoin=0:16")
+
+
+# ================================
+# app.py
+# ================================
+@pytest.fixture
+def banknote_gate(monkeypatch):
+    import app
+
+    gate = AdmissionGate(max_concurrent=1, max_queue=0, max_wait=0.1)
+    monkeypatch.setattr(app, "admission_gates", {"banknote": gate})
+    return app.app.test_client(), gate
+
+
+def test_app_rejects_with_retry_after(banknote_gate):
+    client, gate = banknote_gate
+    gate.acquire()  # another request holds the only slot
+    response = client.post("/api/banknote/authenticate", json=BANKNOTE_ROW)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert response.get_json()["reason"] == "queue_full"
+
+
+def test_app_releases_the_slot_on_teardown(banknote_gate):
+    client, gate = banknote_gate
+    assert client.post("/api/banknote/authenticate", json=BANKNOTE_ROW).status_code == 200
+    assert gate.stats()["in_flight"] == 0
+    # Also when the route fails
+    assert client.post("/api/banknote/authenticate", json={"var": 1.0}).status_code == 400
+    assert gate.stats()["in_flight"] == 0
+    assert client.post("/api/banknote/authenticate", json=BANKNOTE_ROW).status_code == 200
@@ -0,0 +1,149 @@
+"""
+Request parsing, streaming and disconnects of the asyncio server.
+
+Run with:  python -m pytest test_async_server.py
+"""
+import asyncio
+import threading
+
+import pytest
+
+from async_server import AsyncServer, HTTPError
+
+
+def hello_app(environ, start_response):
+    start_response("200 OK", [("Content-Type", "text/plain"), ("Content-Length", "2")])
+    return [b"ok"]
+
+
+def read_request(raw):
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(raw)
+        reader.feed_eof()
+        return await AsyncServer(hello_app, workers=1).read_request(reader)
+    return asyncio.run(run())
+
+
+def exchange(raw):
+    """Send raw bytes to a running server, return the status line of its answer."""
+    async def run():
+        server = AsyncServer(hello_app, workers=1)
+        listener = await asyncio.start_server(server.handle_connection, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        async with listener:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(raw)
+            await writer.drain()
+            status = await asyncio.wait_for(reader.readline(), 5)
+            writer.close()
+        server.pool.shutdown()
+        return status.decode().strip()
+    return asyncio.run(run())
+
+
+def test_request_with_body():
+    method, target, _, headers, body = read_request(b"POST /x HTTP/1.1\r\nContent-Length: 2\r\n\r\n{}")
+    assert (method, target, body) == ("POST", "/x", b"{}")
+
+
+@pytest.mark.parametrize("length", [b"abc", b"-5"])
+def test_bad_content_length_is_400(length):
+    with pytest.raises(HTTPError) as e:
+        read_request(b"POST /x HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\n{}")
+    assert e.value.status == 400
+
+
+def test_bad_content_length_gets_a_response():
+    assert exchange(b"POST /x HTTP/1.1\r\nContent-Length: abc\r\n\r\n").startswith("HTTP/1.1 400")
+    assert exchange(b"GET /x HTTP/1.1\r\n\r\n").startswith("HTTP/1.1 200")
+
+
+class StreamingApp:
+    """Streams one chunk, then waits for `release` before the last one."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = self.closed = 0
+
+    def __call__(self, environ, start_response):
+        start_response("200 OK", [("Content-Type", "text/event-stream")])
+        return self.chunks()
+
+    def chunks(self):
+        self.started += 1
+        try:
+            yield b"first"
+            self.release.wait(5)
+            yield b"last"
+        finally:
+            self.closed += 1
+
+
+def test_streams_past_the_cap_get_503():
+    app = StreamingApp()
+
+    async def run():
+        server = AsyncServer(app, workers=2, stream_workers=1)
+        listener = await asyncio.start_server(server.handle_connection, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+
+        async def open_stream():
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"GET /stream HTTP/1.1\r\n\r\n")
+            await writer.drain()
+            return reader, writer
+
+        async with listener:
+            reader, first = await open_stream()
+            assert (await asyncio.wait_for(reader.readline(), 5)).startswith(b"HTTP/1.1 200")
+            await asyncio.wait_for(reader.readuntil(b"first\r\n"), 5)
+
+            refused, second = await open_stream()
+            assert (await asyncio.wait_for(refused.readline(), 5)).startswith(b"HTTP/1.1 503")
+            second.close()
+
+            app.release.set()
+            await asyncio.wait_for(reader.readuntil(b"0\r\n\r\n"), 5)
+            assert server.open_streams == 0
+            first.close()
+
+            app.release.clear()
+            app.release.set()
+            reader, third = await open_stream()
+            assert (await asyncio.wait_for(reader.readline(), 5)).startswith(b"HTTP/1.1 200")
+            await asyncio.wait_for(reader.readuntil(b"0\r\n\r\n"), 5)
+            third.close()
+        server.pool.shutdown()
+        server.stream_pool.shutdown()
+
+    asyncio.run(run())
+    assert app.started == app.closed == 2  # the refused stream was never read
+
+
+class ResetWriter:
+    """A connection the client has reset: every drain() fails."""
+
+    def write(self, data):
+        pass
+
+    async def drain(self):
+        raise ConnectionResetError("reset by peer")
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_connection_reset_during_a_response(streaming):
+    app = StreamingApp()
+    app.release.set()
+    server = AsyncServer(app if streaming else hello_app, workers=1)
+    environ = server.build_environ("GET", "/x", "HTTP/1.1", {}, b"", ("127.0.0.1", 0))
+
+    async def run():
+        return await server.respond(ResetWriter(), environ, True)
+
+    assert asyncio.run(run()) is False  # the connection is dropped, nothing raised
+    assert server.open_streams == 0
+    if streaming:
+        assert app.closed == 1
+    server.pool.shutdown()
+    server.stream_pool.shutdown()
@@ -0,0 +1,79 @@
+"""
+Bar store, training features and incremental updates of the bitcoin model.
+
+Run with:  python -m pytest test_bar_store.py
+"""
+import numpy as np
+import pytest
+
+import bitcoinmodel
+from bar_store import BAR_DTYPE, BarStore, bar_features
+
+
+def bars(start, n, seed=0):
+    minutes = np.arange(start, start + n)
+    prices = 60000 + np.cumsum(np.random.default_rng(seed).normal(0, 10, n))
+    return minutes, prices
+
+
+def test_append_and_read_back(tmp_path):
+    store = BarStore.open("BTC-USD", tmp_path)
+    minutes, prices = bars(1000, 10)
+    assert store.append(minutes[::-1], prices[::-1]) == 10  # sorted on append
+    # Bars not newer than the last stored one are skipped
+    assert store.append(minutes[5:], prices[5:]) == 0
+    assert store.append([1009, 1010, 1010], [1.0, 2.0, 3.0]) == 1  # last value of a minute wins
+
+    store = BarStore.open("BTC-USD", tmp_path)
+    read_minutes, read_prices = store.read()
+    np.testing.assert_array_equal(read_minutes, np.r_[minutes, 1010])
+    np.testing.assert_array_equal(read_prices, np.r_[prices, 3.0])
+    assert store.last_minute() == 1010
+    np.testing.assert_array_equal(store.tail(2)[1], [prices[-1], 3.0])
+
+
+def test_partial_record_is_dropped(tmp_path):
+    store = BarStore.open("BTC-USD", tmp_path)
+    store.append(*bars(1000, 3))
+    with open(store.path, "ab") as f:
+        f.write(b"\x01" * (BAR_DTYPE.itemsize // 2))
+    assert len(BarStore(store.path)) == 3
+
+
+def test_bar_features_gathers_every_horizon():
+    minutes, prices = bars(24 * 60 * 5 + 59, 30)  # a Tuesday, 00:59 UTC
+    horizons = (1, 2, 5)
+    X, y = bar_features(minutes, prices, horizons)
+    assert X.shape == (30 - 2 - 5, 6) and y.shape == (23, 3)
+    for i, row in enumerate(range(2, 25)):
+        np.testing.assert_array_equal(X[i, :3], [prices[row - 1], prices[row - 2], prices[row]])
+        np.testing.assert_array_equal(y[i], [prices[row + h] for h in horizons])
+    np.testing.assert_array_equal(X[0, 3:], [1, 1, 1])  # 01:01 on a Tuesday
+
+    X_single, y_single = bar_features(minutes, prices)
+    assert y_single.ndim == 1
+    np.testing.assert_array_equal(y_single, prices[4:])
+
+
+@pytest.fixture
+def small_model(monkeypatch):
+    monkeypatch.setattr(bitcoinmodel, "MODEL_PARAMS", {"n_estimators": 6, "random_state": 0})
+    monkeypatch.setattr(bitcoinmodel, "TREES_PER_UPDATE", 3)
+    monkeypatch.setattr(bitcoinmodel, "WINDOW", 200)
+
+
+def test_update_adds_trees_and_keeps_bar_state(tmp_path, small_model):
+    store = BarStore.open("BTC-USD", tmp_path)
+    store.append(*bars(1000, 200))
+    horizons = (1, 2)
+    model = bitcoinmodel.full_fit(store, horizons)
+    assert model.bar_state_ == {"through": 1199, "tree_minutes": [1199] * 6}
+    first_trees = list(model.estimators_)
+
+    store.append(*bars(1200, 30, seed=1))
+    model = bitcoinmodel.update(model, store, horizons)
+    # 3 new trees, the oldest 3 dropped to stay at n_estimators
+    assert len(model.estimators_) == 6
+    assert model.estimators_[:3] == first_trees[3:]
+    assert model.bar_state_ == {"through": 1229, "tree_minutes": [1199] * 3 + [1229] * 3}
+    assert model.predict(np.zeros((1, 6))).shape == (1, 2)
@@ -0,0 +1,142 @@
+"""
+.npy / Arrow IPC bodies: binary_io.py and the binary predict_batch paths.
+
+Run with:  python -m pytest test_binary_io.py
+"""
+import io
+import os
+
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from binary_io import (
+    ARROW_STREAM_TYPE, NPY_TYPE, BinaryFormatError, read_matrix, response_format, write_table,
+)
+
+# Models are loaded on first use, and nothing watches the artifacts
+os.environ.setdefault("MODEL_LOADING", "lazy")
+os.environ.setdefault("MODEL_RELOAD_INTERVAL", "0")
+
+FEATURES = ["var", "skew", "curt", "entr"]
+
+
+def npy_bytes(array):
+    buffer = io.BytesIO()
+    np.save(buffer, array)
+    return buffer.getvalue()
+
+
+def arrow_bytes(columns):
+    table = pa.table(columns)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def read_npy_table(body):
+    return np.load(io.BytesIO(body))
+
+
+def read_arrow_table(body):
+    return pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+
+
+# ================================
+# binary_io.py
+# ================================
+def test_npy_request_round_trip():
+    X = np.random.default_rng(0).normal(size=(5, 4))
+    matrix, fmt = read_matrix(npy_bytes(X), NPY_TYPE, FEATURES)
+    assert fmt == "npy"
+    np.testing.assert_array_equal(matrix, X)
+
+
+def test_npy_declared_column_order():
+    X = np.arange(8.0).reshape(2, 4)
+    matrix, _ = read_matrix(npy_bytes(X), NPY_TYPE, FEATURES, declared_names=["entr", "curt", "skew", "var"])
+    np.testing.assert_array_equal(matrix, X[:, ::-1])
+
+
+def test_arrow_request_round_trip():
+    X = np.random.default_rng(1).normal(size=(6, 4))
+    # Columns matched by name, in any order and with extra columns
+    columns = {name: X[:, j] for j, name in reversed(list(enumerate(FEATURES)))}
+    columns["id"] = np.arange(6)
+    matrix, fmt = read_matrix(arrow_bytes(columns), ARROW_STREAM_TYPE, FEATURES)
+    assert fmt == "arrow"
+    np.testing.assert_array_equal(matrix, X)
+
+
+@pytest.mark.parametrize("fmt", ["npy", "arrow"])
+def test_response_round_trip(fmt):
+    columns = {"prediction": np.array([0, 1, 1]), "probability_1": np.array([0.1, 0.9, 0.7])}
+    body, mimetype = write_table(columns, fmt)
+    assert mimetype == (NPY_TYPE if fmt == "npy" else ARROW_STREAM_TYPE)
+    table = read_npy_table(body) if fmt == "npy" else read_arrow_table(body).to_pydict()
+    for name, values in columns.items():
+        np.testing.assert_array_equal(table[name], values)
+
+
+@pytest.mark.parametrize("array", [np.zeros(4), np.zeros((2, 3)), np.zeros((2, 4, 1))])
+def test_npy_wrong_shape(array):
+    with pytest.raises(BinaryFormatError):
+        read_matrix(npy_bytes(array), NPY_TYPE, FEATURES)
+
+
+def test_response_format_negotiation():
+    assert response_format(None, "npy") == "npy"
+    assert response_format("application/json", "npy") is None
+    assert response_format(ARROW_STREAM_TYPE, "npy") == "arrow"
+    assert response_format(NPY_TYPE, "arrow") == "npy"
+
+
+# ================================
+# /api/banknote/predict_batch
+# ================================
+@pytest.fixture(scope="module")
+def client():
+    import app
+
+    return app.app.test_client()
+
+
+def post_batch(client, body, content_type, accept=None):
+    headers = {"Accept": accept} if accept else {}
+    return client.post("/api/banknote/predict_batch", data=body, content_type=content_type, headers=headers)
+
+
+def test_binary_batch_matches_json(client):
+    X = np.random.default_rng(2).normal(0, 3, size=(20, 4))
+    expected = client.post("/api/banknote/predict_batch", json={"records": [dict(zip(FEATURES, row)) for row in X.tolist()]})
+    expected_predictions = [row["prediction"] for row in expected.get_json()["results"]]
+
+    response = post_batch(client, npy_bytes(X), NPY_TYPE)
+    assert response.status_code == 200 and response.mimetype == NPY_TYPE
+    assert read_npy_table(response.data)["prediction"].tolist() == expected_predictions
+
+    response = post_batch(client, arrow_bytes({name: X[:, j] for j, name in enumerate(FEATURES)}), ARROW_STREAM_TYPE)
+    assert response.status_code == 200 and response.mimetype == ARROW_STREAM_TYPE
+    assert read_arrow_table(response.data).column("prediction").to_pylist() == expected_predictions
+
+
+def test_accept_header_negotiation(client):
+    body = npy_bytes(np.zeros((3, 4)))
+    response = post_batch(client, body, NPY_TYPE, accept="application/json")
+    assert response.mimetype == "application/json"
+    assert response.get_json()["count"] == 3
+    response = post_batch(client, body, NPY_TYPE, accept=ARROW_STREAM_TYPE)
+    assert response.mimetype == ARROW_STREAM_TYPE
+    assert read_arrow_table(response.data).num_rows == 3
+
+
+@pytest.mark.parametrize("array", [
+    np.zeros(4),  # 1-D
+    np.zeros((3, 5)),  # wrong number of columns
+    np.array([["a", "b", "c", "d"]]),  # not numbers
+])
+def test_bad_binary_body_is_400(client, array):
+    response = post_batch(client, npy_bytes(array), NPY_TYPE)
+    assert response.status_code == 400
+    assert "error" in response.get_json()
@@ -0,0 +1,138 @@
+"""
+hyperparameter_search.search must pick what GridSearchCV picks while fitting
+the transformer steps once per fold, and successive halving must narrow the
+grid round by round.
+
+Run with:  python -m pytest test_hyperparameter_search.py
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.datasets import load_breast_cancer, load_diabetes
+from sklearn.linear_model import Lasso, Ridge
+from sklearn.model_selection import GridSearchCV, KFold, StratifiedKFold
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import PolynomialFeatures, StandardScaler
+from sklearn.tree import DecisionTreeClassifier
+
+from hyperparameter_search import search
+
+CV = KFold(5, shuffle=True, random_state=0)
+PARAM_GRID = {"poly__degree": [1, 2], "model__alpha": [0.01, 0.1, 1.0, 10.0]}
+
+
+@pytest.fixture(scope="module")
+def diabetes():
+    X, y = load_diabetes(return_X_y=True, as_frame=True)
+    return X, y
+
+
+def pipeline():
+    return Pipeline([("poly", PolynomialFeatures()), ("scale", StandardScaler()), ("model", Ridge())])
+
+
+def test_grid_matches_grid_search_cv(diabetes):
+    X, y = diabetes
+    expected = GridSearchCV(pipeline(), PARAM_GRID, cv=CV, scoring="r2").fit(X, y)
+
+    result = search(pipeline(), PARAM_GRID, X, y, cv=CV, scoring="r2")
+
+    assert result.best_params == expected.best_params_
+    assert result.best_score == pytest.approx(expected.best_score_)
+    scores = {tuple(sorted(params.items())): score for params, score in result.scores}
+    for params, score in zip(expected.cv_results_["params"], expected.cv_results_["mean_test_score"]):
+        assert scores[tuple(sorted(params.items()))] == pytest.approx(score, abs=1e-6)
+
+
+def test_transformers_fit_once_per_fold_and_degree(diabetes):
+    X, y = diabetes
+    result = search(pipeline(), PARAM_GRID, X, y, cv=CV, scoring="r2")
+
+    assert result.n_fits == 8 * 5
+    assert result.n_transformer_fits == 2 * 5
+
+
+def test_refit_on_all_rows_keeps_feature_names(diabetes):
+    X, y = diabetes
+    result = search(pipeline(), PARAM_GRID, X, y, cv=CV, scoring="r2")
+
+    assert isinstance(result.best_estimator, Pipeline)
+    assert list(result.best_estimator.feature_names_in_) == list(X.columns)
+    expected = pipeline().set_params(**result.best_params).fit(X, y)
+    np.testing.assert_allclose(result.best_estimator.predict(X), expected.predict(X))
+
+
+def test_estimators_as_grid_values(diabetes):
+    X, y = diabetes
+    candidates = [Ridge(alpha=1.0), Lasso(alpha=0.1)]
+    result = search(pipeline(), {"poly__degree": [1], "model": candidates}, X, y, cv=CV, scoring="r2")
+
+    assert type(result.best_estimator.named_steps["model"]) in (Ridge, Lasso)
+    # The grid values themselves are never fitted
+    assert not any(hasattr(model, "coef_") for model in candidates)
+
+
+def test_classifier_without_pipeline():
+    X, y = load_breast_cancer(return_X_y=True)
+    grid = {"max_depth": [2, 4, None], "min_samples_leaf": [1, 5]}
+    cv = StratifiedKFold(5, shuffle=True, random_state=0)
+    expected = GridSearchCV(DecisionTreeClassifier(random_state=0), grid, cv=cv, scoring="accuracy").fit(X, y)
+
+    result = search(DecisionTreeClassifier(random_state=0), grid, X, y, cv=cv, scoring="accuracy")
+
+    assert result.best_params == expected.best_params_
+    assert result.best_score == pytest.approx(expected.best_score_)
+    assert result.n_transformer_fits == 0
+
+
+# ================================
+# Successive Halving
+# ================================
+def test_halving_narrows_the_grid_each_round(diabetes):
+    X, y = diabetes
+    grid = {"poly__degree": [1, 2, 3], "model__alpha": [0.01, 0.1, 1.0]}
+
+    result = search(pipeline(), grid, X, y, cv=CV, scoring="r2", strategy="halving", factor=3)
+
+    # 9 candidates on a third of each fold, then the best 3 on all of it
+    assert result.n_fits == 9 * 5 + 3 * 5
+    assert len(result.scores) == 3
+    assert result.scores[0][1] == result.best_score == max(score for _, score in result.scores)
+
+
+def test_halving_last_round_scores_on_whole_folds(diabetes):
+    X, y = diabetes
+    grid_result = search(pipeline(), PARAM_GRID, X, y, cv=CV, scoring="r2")
+    halving = search(pipeline(), PARAM_GRID, X, y, cv=CV, scoring="r2", strategy="halving", factor=2)
+
+    # Training rows are only reordered in the last round, so scores match the grid
+    grid_scores = {tuple(sorted(params.items())): score for params, score in grid_result.scores}
+    for params, score in halving.scores:
+        assert score == pytest.approx(grid_scores[tuple(sorted(params.items()))], abs=1e-6)
+
+
+def test_halving_keeps_a_clearly_better_candidate():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(600, 3)), columns=["a", "b", "c"])
+    y = X["a"] ** 2 + 0.1 * rng.normal(size=600)
+    grid = {"poly__degree": [1, 2], "model__alpha": [0.001, 1.0, 100.0, 1000.0]}
+
+    result = search(pipeline(), grid, X, y, cv=CV, scoring="r2", strategy="halving", factor=2, min_resources=40)
+
+    assert result.best_params["poly__degree"] == 2
+    assert result.best_score > 0.9
+
+
+def test_halving_with_a_single_candidate(diabetes):
+    X, y = diabetes
+    result = search(pipeline(), {"poly__degree": [1], "model__alpha": [1.0]}, X, y,
+                    cv=CV, scoring="r2", strategy="halving")
+
+    assert result.n_fits == 5
+    assert result.best_params == {"model__alpha": 1.0, "poly__degree": 1}
+
+
+def test_unknown_strategy_is_rejected(diabetes):
+    X, y = diabetes
+    with pytest.raises(ValueError, match="Unknown strategy 'random'"):
+        search(pipeline(), PARAM_GRID, X, y, strategy="random")
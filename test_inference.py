@@ -0,0 +1,179 @@
+"""
+Parity tests: compiled kernels must reproduce the sklearn artifacts they replace.
+
+Run with:  python -m pytest test_inference.py
+"""
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.datasets import load_breast_cancer, load_diabetes
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import Lasso, LinearRegression, Ridge
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import PolynomialFeatures, StandardScaler
+from sklearn.tree import DecisionTreeClassifier
+
+import inference
+from inference import compact_trees, compile_model, load_kernel, save_kernel
+from tree_explainer import TreeExplainer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_artifact(name):
+    return joblib.load(os.path.join(HERE, name))
+
+
+def diabetes_X():
+    # Same columns as model.py: every feature except "sex"
+    return np.delete(load_diabetes().data, 1, axis=1)
+
+
+def banknote_X():
+    df = pd.read_csv(os.path.join(HERE, "bank_note_authentication.csv"))
+    return df.drop(columns=["auth"]).values, df["auth"].values
+
+
+def test_saved_diabetes_pipeline():
+    model = load_artifact("best_diabetes_model.joblib")
+    X = diabetes_X()
+    np.testing.assert_allclose(compile_model(model).predict(X), model.predict(X), rtol=1e-12)
+
+
+def test_polynomial_pipelines():
+    X, y = diabetes_X(), load_diabetes().target
+    for estimator in (LinearRegression(), Ridge(alpha=1), Lasso(alpha=0.1, max_iter=5000)):
+        for degree in (1, 2):
+            for include_bias in (False, True):
+                pipeline = Pipeline([
+                    ("poly", PolynomialFeatures(degree=degree, include_bias=include_bias)),
+                    ("scaler", StandardScaler()),
+                    ("model", estimator),
+                ]).fit(X, y)
+                np.testing.assert_allclose(
+                    compile_model(pipeline).predict(X), pipeline.predict(X), rtol=1e-10
+                )
+
+
+def test_banknote_transformer_and_model():
+    X, y = banknote_X()
+    transformer = load_artifact("power_transformer.joblib")
+    model = load_artifact("bank_note_authentication_model.joblib")
+
+    transformed = compile_model(transformer).transform(X[:, 2:4])
+    np.testing.assert_allclose(transformed, transformer.transform(X[:, 2:4]), rtol=1e-12, atol=1e-12)
+
+    X = X.copy()
+    X[:, 2:4] = transformed
+    kernel = compile_model(model)
+    np.testing.assert_array_equal(kernel.predict(X), model.predict(X))
+    np.testing.assert_allclose(kernel.predict_proba(X), model.predict_proba(X), rtol=1e-12, atol=1e-15)
+
+    # banknotewithdesciosntree.py saves a decision tree to the same file
+    tree = DecisionTreeClassifier(max_depth=8, random_state=42).fit(X, y)
+    np.testing.assert_array_equal(compile_model(tree).predict_proba(X), tree.predict_proba(X))
+
+
+def test_breast_cancer_components():
+    components = load_artifact("breast_cancer_model.joblib")
+    X = load_breast_cancer().data
+
+    transformed = compile_model(components["transformer"]).transform(X)
+    np.testing.assert_allclose(transformed, components["transformer"].transform(X), rtol=1e-12, atol=1e-12)
+
+    kernel = compile_model(components["model"])
+    np.testing.assert_array_equal(kernel.predict(transformed), components["model"].predict(transformed))
+    np.testing.assert_array_equal(kernel.predict_proba(transformed), components["model"].predict_proba(transformed))
+
+
+def test_breast_cancer_explanations():
+    components = load_artifact("breast_cancer_model.joblib")
+    X = load_breast_cancer().data
+    transformer = compile_model(components["transformer"])
+    transformed = components["transformer"].transform(X)
+    np.testing.assert_allclose(transformer.inverse_transform(transformed), X, rtol=1e-9, atol=1e-9)
+
+    explainer = TreeExplainer(compile_model(components["model"]), components["feature_names"], transformer)
+    leaves, contributions = explainer.explain(X)
+    # Base value plus contributions is the predicted probability, for every class
+    np.testing.assert_allclose(
+        explainer.base_value + contributions.sum(axis=1), components["model"].predict_proba(transformed), atol=1e-12
+    )
+    # Rows the caller already transformed are not transformed again
+    leaves_transformed, contributions_transformed = explainer.explain(transformer.transform(X), transformed=True)
+    np.testing.assert_array_equal(leaves_transformed, leaves)
+    np.testing.assert_allclose(contributions_transformed, contributions, atol=1e-12)
+
+    # Decision paths match sklearn's, and raw values fall on the raw side of each threshold
+    sklearn_paths = components["model"].decision_path(transformed.astype(np.float32))
+    for i in range(0, len(X), 7):
+        steps = explainer.decision_path(leaves[i, 0], X[i])
+        assert [step["node"] for step in steps] + [leaves[i, 0]] == sklearn_paths[i].indices.tolist()
+        for step in steps:
+            assert (step["value"] <= step["threshold"]) == (step["direction"] == "<=")
+
+
+def test_random_forest_regressor():
+    rng = np.random.default_rng(0)
+    X = np.c_[rng.normal(60000, 300, (400, 3)), rng.integers(0, 24, 400), rng.integers(0, 60, 400), rng.integers(0, 7, 400)]
+    y = X[:, 2] + rng.normal(0, 10, 400)
+    forest = RandomForestRegressor(n_estimators=20, random_state=42).fit(X, y)
+
+    np.testing.assert_allclose(compile_model(forest).predict(X), forest.predict(X), rtol=1e-12)
+
+
+def test_multi_output_forest():
+    # bitcoinmodel.py fits one output per forecast horizon
+    rng = np.random.default_rng(2)
+    X = np.c_[rng.normal(60000, 300, (400, 3)), rng.integers(0, 24, 400), rng.integers(0, 60, 400), rng.integers(0, 7, 400)]
+    y = X[:, 2:3] + rng.normal(0, 10, (400, 15)).cumsum(axis=1)
+    forest = RandomForestRegressor(n_estimators=10, random_state=42).fit(X, y)
+
+    kernel = compile_model(forest)
+    assert kernel.predict(X).shape == (400, 15)
+    np.testing.assert_allclose(kernel.predict(X), forest.predict(X), rtol=1e-12)
+    np.testing.assert_allclose(compact_trees(kernel).predict(X), forest.predict(X), rtol=1e-6)
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    components = load_artifact("breast_cancer_model.joblib")
+    X = components["transformer"].transform(load_breast_cancer().data)
+    kernel = compile_model(components["model"])
+
+    save_kernel(kernel, tmp_path / "breastcancer")
+    loaded = load_kernel(tmp_path / "breastcancer", mmap_mode="r")
+    np.testing.assert_array_equal(loaded.predict_proba(X), kernel.predict_proba(X))
+
+
+def test_quiet_export_prints_nothing(tmp_path, monkeypatch, capsys):
+    # app.py exports at startup and on reload with verbose=False
+    monkeypatch.setattr(inference, "EXPORTS", {"missing": (str(tmp_path / "missing.joblib"), None)})
+    inference.export_all(str(tmp_path), verbose=False)
+    assert capsys.readouterr().out == ""
+    inference.export_all(str(tmp_path))
+    assert "missing                    skipped" in capsys.readouterr().out
+
+
+def test_compact_trees():
+    rng = np.random.default_rng(1)
+    X = np.c_[rng.normal(60000, 300, (400, 3)), rng.integers(0, 24, 400), rng.integers(0, 60, 400), rng.integers(0, 7, 400)]
+    y = X[:, 2] + rng.normal(0, 10, 400)
+    forest = RandomForestRegressor(n_estimators=20, random_state=42).fit(X, y)
+    kernel = compile_model(forest)
+
+    # Same splits, only the leaf values are rounded to float32
+    compact = compact_trees(kernel)
+    assert compact.threshold.dtype == np.float32 and compact.left.dtype == np.int32
+    np.testing.assert_allclose(compact.predict(X), forest.predict(X), rtol=1e-6)
+
+    # Fewer trees: the mean over the first 5 trees
+    first_five = np.mean([tree.predict(X.astype(np.float32)) for tree in forest.estimators_[:5]], axis=0)
+    np.testing.assert_allclose(compact_trees(kernel, n_trees=5).predict(X), first_five, rtol=1e-6)
+
+    # Depth cap: the value of the node at depth 3 on each row's path
+    tree = forest.estimators_[0]
+    paths = tree.decision_path(X.astype(np.float32)).tolil().rows
+    expected = [tree.tree_.value[path[min(3, len(path) - 1)], 0, 0] for path in paths]
+    np.testing.assert_allclose(compact_trees(compile_model(tree), max_depth=3).predict(X), expected, rtol=1e-6)
@@ -0,0 +1,39 @@
+"""
+fit_candidates must give the same models as fitting each candidate on its own.
+
+Run with:  python -m pytest test_linear_paths.py
+"""
+import numpy as np
+import pytest
+from scipy import sparse
+from sklearn.base import clone
+from sklearn.datasets import load_diabetes
+from sklearn.linear_model import Lasso, Ridge
+
+from linear_paths import fit_candidates
+
+
+def candidates():
+    return [Ridge(alpha=alpha) for alpha in (0.1, 1.0, 10.0)] + \
+           [Lasso(alpha=alpha, max_iter=20000, tol=1e-8) for alpha in (0.01, 0.1, 1.0)]
+
+
+def diabetes_Xy():
+    X, y = load_diabetes(return_X_y=True)
+    return X, y
+
+
+@pytest.mark.parametrize("case", ["dense", "sparse", "2d_y"])
+def test_fit_candidates_matches_fit(case):
+    X, y = diabetes_Xy()
+    if case == "sparse":
+        X = sparse.csr_matrix(X)
+    elif case == "2d_y":
+        y = np.column_stack([y, y / 2])
+
+    models = fit_candidates(candidates(), X, y)
+    expected = [clone(model).fit(X, y) for model in candidates()]
+    for model, reference in zip(models, expected):
+        assert hasattr(model, "coef_"), f"{model} was not fitted"
+        np.testing.assert_allclose(model.coef_, reference.coef_, rtol=1e-5, atol=1e-6)
+        np.testing.assert_allclose(model.intercept_, reference.intercept_, rtol=1e-5, atol=1e-6)
@@ -0,0 +1,116 @@
+"""
+Request metrics: metrics.py and the /metrics endpoint of app.py.
+
+Run with:  python -m pytest test_metrics.py
+"""
+import os
+import pstats
+
+import pytest
+
+from metrics import LATENCY_BUCKETS, Histogram, Metrics, mark
+
+os.environ.setdefault("MODEL_LOADING", "lazy")
+os.environ.setdefault("MODEL_RELOAD_INTERVAL", "0")
+
+BANKNOTE_ROW = {"var": 1.0, "skew": 2.0, "curt": 3.0, "entr": 4.0}
+
+
+def samples(text):
+    """{'name{labels}': value} of every sample line in a Prometheus text page."""
+    result = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            key, _, value = line.rpartition(" ")
+            result[key] = float(value)
+    return result
+
+
+def test_histogram_buckets_and_quantiles():
+    histogram = Histogram()
+    for value in (0.00001, 0.0003, 0.0003, 0.002, 60.0):
+        histogram.observe(value)
+
+    assert histogram.count == 5
+    assert histogram.sum == pytest.approx(60.00261)
+    assert histogram.counts[0] == 1 and histogram.counts[-1] == 1
+    assert histogram.quantile(0.5) == 0.0005
+    assert histogram.quantile(0.8) == 0.0025
+    assert histogram.quantile(1.0) is None  # beyond the last bucket
+    assert Histogram().quantile(0.5) is None
+
+
+def test_mark_outside_a_request_is_a_no_op():
+    mark("predict")  # no timer on this thread: nothing to record, nothing raised
+
+
+def test_render_counts_requests_phases_and_errors():
+    metrics = Metrics()
+    for status in (200, 200, 400):
+        metrics.start_request()
+        mark("validate")
+        mark("predict")
+        metrics.finish_request("/api/x", status, "x", "v1")
+    metrics.finish_request("/api/x", 200)  # no request started on this thread: ignored
+
+    page = samples(metrics.render({"x": "v1"}))
+    request = 'endpoint="/api/x",model="x",version="v1"'
+    assert page[f'api_requests_total{{{request},status="200"}}'] == 2
+    assert page[f'api_requests_total{{{request},status="400"}}'] == 1
+    assert page[f"api_errors_total{{{request}}}"] == 1
+    assert page[f'api_request_duration_seconds_bucket{{{request},le="+Inf"}}'] == 3
+    assert page[f"api_request_duration_seconds_count{{{request}}}"] == 3
+    for phase in ("validate", "predict", "serialize"):
+        assert page[f'api_phase_duration_seconds_count{{endpoint="/api/x",phase="{phase}"}}'] == 3
+    assert page['model_version_info{model="x",version="v1"}'] == 1
+
+
+def test_histogram_buckets_are_cumulative():
+    metrics = Metrics()
+    metrics.observe_admission("x", 0.0003)
+    metrics.observe_admission("x", 0.003)
+    metrics.count_rejection("x", "queue_full")
+
+    page = samples(metrics.render())
+    buckets = [page[f'api_admission_wait_seconds_bucket{{model="x",le="{bound!r}"}}'] for bound in LATENCY_BUCKETS]
+    assert buckets == sorted(buckets)
+    assert page['api_admission_wait_seconds_bucket{model="x",le="0.0005"}'] == 1
+    assert page['api_admission_wait_seconds_bucket{model="x",le="0.005"}'] == 2
+    assert page['api_admission_wait_seconds_sum{model="x"}'] == pytest.approx(0.0033)
+    assert page['api_admission_rejected_total{model="x",reason="queue_full"}'] == 1
+
+
+def test_sampled_requests_write_profiles(tmp_path):
+    metrics = Metrics(profile_rate=1.0, profile_dir=str(tmp_path))
+    metrics.start_request()
+    sum(range(1000))
+    metrics.finish_request("/api/x/predict", 200, "x", "v1")
+
+    (profile,) = tmp_path.glob("*-api_x_predict-*.prof")
+    pstats.Stats(str(profile))  # a readable cProfile dump
+    assert samples(metrics.render())["api_profiles_written_total"] == 1
+
+
+def test_metrics_endpoint(monkeypatch):
+    import app
+
+    monkeypatch.setattr(app, "metrics", Metrics())
+    monkeypatch.setattr(app, "prediction_caches", {})
+    client = app.app.test_client()
+    assert client.post("/api/banknote/authenticate", json=BANKNOTE_ROW).status_code == 200
+    assert client.post("/api/banknote/authenticate", json={"var": 1.0}).status_code == 400
+    assert client.get("/no/such/page").status_code == 404
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+    page = samples(response.get_data(as_text=True))
+    version = app.registry.versions["banknote"]
+    request = f'endpoint="/api/banknote/authenticate",model="banknote",version="{version}"'
+    assert page[f'api_requests_total{{{request},status="200"}}'] == 1
+    assert page[f'api_requests_total{{{request},status="400"}}'] == 1
+    assert page[f"api_errors_total{{{request}}}"] == 1
+    assert page['api_requests_total{endpoint="unmatched",model="",version="",status="404"}'] == 1
+    for phase in ("parse_json", "validate", "predict"):
+        assert page[f'api_phase_duration_seconds_count{{endpoint="/api/banknote/authenticate",phase="{phase}"}}'] >= 1
+    assert page[f'model_version_info{{model="banknote",version="{version}"}}'] == 1
@@ -0,0 +1,85 @@
+"""
+Batching behaviour of micro_batcher.py.
+
+Run with:  python -m pytest test_micro_batcher.py
+"""
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from micro_batcher import MicroBatcher
+from model_registry import ModelRegistry
+
+
+def submit_concurrently(batcher, rows, context=None):
+    futures = [batcher.submit(row, context) for row in rows]
+    return [future.result(timeout=5) for future in futures]
+
+
+def test_batch_closes_at_max_batch_size():
+    sizes = []
+
+    def predict_rows(features):
+        sizes.append(len(features))
+        return features[:, 0].tolist()
+
+    # A long wait, so only the size limit can close the batches
+    batcher = MicroBatcher(predict_rows, max_wait_ms=5000, max_batch_size=4)
+    start = time.perf_counter()
+    submit_concurrently(batcher, np.arange(8.0).reshape(8, 1))
+    assert time.perf_counter() - start < 2
+    assert sizes == [4, 4]
+
+
+def test_batch_closes_at_max_wait():
+    batcher = MicroBatcher(lambda features: features[:, 0].tolist(), max_wait_ms=50, max_batch_size=100)
+    start = time.perf_counter()
+    assert batcher.predict_rows(np.array([[1.0]])) == [1.0]
+    elapsed = time.perf_counter() - start
+    assert 0.04 <= elapsed < 1
+    assert batcher.stats()["batch_size_max"] == 1
+
+
+def test_each_caller_gets_its_row():
+    batcher = MicroBatcher(lambda features: (features[:, 0] * 10).tolist(), max_wait_ms=20, max_batch_size=64)
+    results = {}
+
+    def call(i):
+        results[i] = batcher.predict_rows(np.array([[float(i)]]))[0]
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(32)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == {i: i * 10.0 for i in range(32)}
+    assert batcher.stats()["batches"] < 32
+
+
+def test_exception_reaches_every_caller():
+    def predict_rows(features):
+        raise RuntimeError("model failed")
+
+    batcher = MicroBatcher(predict_rows, max_wait_ms=50, max_batch_size=64)
+    futures = [batcher.submit(np.array([float(i)])) for i in range(5)]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="model failed"):
+            future.result(timeout=5)
+
+
+def test_batch_predicts_with_the_callers_pinned_version():
+    versions = iter(["v1", "v2"])
+    registry = ModelRegistry("lazy")
+    registry.register("model", lambda: next(versions))
+    old_entry = registry.entry("model")  # ("v1", <source version>)
+
+    def predict_rows(features):
+        return [registry.get("model")] * len(features)
+
+    batcher = MicroBatcher(predict_rows, max_wait_ms=20, bind=lambda entry: registry.pinned_to({"model": entry}))
+    registry.reload("model", force=True)  # swaps in "v2" while a request still holds "v1"
+    assert registry.get("model") == "v2"
+    assert submit_concurrently(batcher, np.zeros((3, 1)), old_entry) == ["v1"] * 3
+    assert submit_concurrently(batcher, np.zeros((2, 1)), registry.entry("model")) == ["v2"] * 2
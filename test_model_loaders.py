@@ -0,0 +1,102 @@
+"""
+model_loaders.py in shared-memory mode (SHARED_MODELS=1): kernels exported
+once under a lock, then memory-mapped read-only without unpickling sklearn.
+
+Run with:  python -m pytest test_model_loaders.py
+"""
+import os
+import subprocess
+import sys
+import threading
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.datasets import load_breast_cancer
+
+import inference
+import model_loaders
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# The small artifacts only; the bitcoin forest is not needed to test the mechanism
+EXPORTS = {name: inference.EXPORTS[name] for name in
+           ("banknote", "banknote_transformer", "breastcancer", "breastcancer_transformer")}
+
+
+@pytest.fixture
+def shared(tmp_path, monkeypatch):
+    """The settings SHARED_MODELS=1 applies at import, exporting to a temporary directory."""
+    monkeypatch.chdir(HERE)
+    monkeypatch.setattr(inference, "EXPORTS", EXPORTS)
+    monkeypatch.setattr(model_loaders, "COMPILED_MODELS_DIR", str(tmp_path))
+    monkeypatch.setattr(model_loaders, "USE_COMPILED_MODELS", True)
+    monkeypatch.setattr(model_loaders, "KERNEL_MMAP_MODE", "r")
+    monkeypatch.setattr(model_loaders, "COMPILED_TREE_MAX_ROWS", float("inf"))
+    return tmp_path
+
+
+def test_shared_models_setting_is_applied_at_import():
+    code = ("import model_loaders as m; "
+            "print(m.USE_COMPILED_MODELS, m.KERNEL_MMAP_MODE, m.COMPILED_TREE_MAX_ROWS)")
+    env = dict(os.environ, SHARED_MODELS="1", USE_COMPILED_MODELS="0")
+    result = subprocess.run([sys.executable, "-c", code], cwd=HERE, env=env, capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == ["True", "r", "inf"]
+
+
+def test_concurrent_workers_export_once(shared, monkeypatch):
+    exports = []
+    export_all = model_loaders.export_all
+
+    def recording_export_all(output_dir, names, verbose=True):
+        exports.append(sorted(names))
+        export_all(output_dir, names, verbose)
+
+    monkeypatch.setattr(model_loaders, "export_all", recording_export_all)
+    workers = [threading.Thread(target=model_loaders.export_shared_models) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert exports == [sorted(EXPORTS)]
+    assert inference.stale_exports(str(shared)) == []
+
+
+def test_changed_artifact_is_exported_again(shared):
+    model_loaders.export_shared_models()
+    header = shared / "banknote" / "kernel.json"
+    os.utime(header, (0, 0))  # older than its artifact, as if the artifact was retrained since
+
+    assert inference.stale_exports(str(shared)) == ["banknote"]
+    model_loaders.export_shared_models()
+    assert inference.stale_exports(str(shared)) == []
+
+
+def test_workers_map_the_exported_files_without_unpickling(shared, monkeypatch):
+    model_loaders.export_shared_models()
+
+    def no_unpickling(path):
+        raise AssertionError(f"unpickled {path}")
+
+    monkeypatch.setattr(model_loaders, "load_artifact", no_unpickling)
+    breast_cancer = model_loaders.load_breast_cancer_model()
+    banknote = model_loaders.load_banknote_model()
+
+    kernels = [breast_cancer["model"].kernel, breast_cancer["transformer"], banknote["model"], banknote["transformer"]]
+    for kernel in kernels:
+        for array in kernel.arrays().values():
+            assert isinstance(array, np.memmap)
+            assert not array.flags.writeable
+            assert os.path.dirname(os.path.dirname(array.filename)) == str(shared)
+
+    # Past the usual 256-row cutoff the tree still answers from the mapped kernel
+    X = np.tile(load_breast_cancer().data, (2, 1))
+    expected = joblib.load(os.path.join(HERE, "breast_cancer_model.joblib"))
+    X_normalized = breast_cancer["transformer"].transform(X)
+    np.testing.assert_allclose(X_normalized, expected["transformer"].transform(X), rtol=1e-6, atol=1e-9)
+    np.testing.assert_array_equal(
+        breast_cancer["model"].predict(X_normalized), expected["model"].predict(X_normalized)
+    )
@@ -0,0 +1,289 @@
+"""
+ModelRegistry: loading modes, versions, hot reload and per-thread pinning.
+
+Run with:  python -m pytest test_model_registry.py
+"""
+import os
+import threading
+import time
+
+import pytest
+
+from model_registry import ModelRegistry, source_version
+
+
+class Loader:
+    """Loader returning "<name>-<n>" on its n-th call, optionally waiting on a barrier first."""
+
+    def __init__(self, name, calls, barrier=None, delay=0.0):
+        self.name = name
+        self.calls = calls
+        self.barrier = barrier
+        self.delay = delay
+
+    def __call__(self):
+        if self.barrier is not None:
+            self.barrier.wait(timeout=2)
+        time.sleep(self.delay)
+        self.calls.append(self.name)
+        return f"{self.name}-{self.calls.count(self.name)}"
+
+
+def registry_of(mode, names, **kwargs):
+    calls = []
+    registry = ModelRegistry(mode)
+    for name in names:
+        registry.register(name, Loader(name, calls, **kwargs))
+    return registry, calls
+
+
+# ================================
+# Loading Modes
+# ================================
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError, match="Unknown loading mode 'sometimes'"):
+        ModelRegistry("sometimes")
+
+
+def test_lazy_loads_each_model_on_first_use():
+    registry, calls = registry_of("lazy", ["a", "b"])
+    registry.start()
+    assert calls == [] and not registry.is_loaded("a")
+
+    assert registry.get("a") == "a-1"
+    assert registry.get("a") == "a-1"
+    assert calls == ["a"]
+    assert registry.is_loaded("a") and not registry.is_loaded("b")
+    assert set(registry.load_times) == {"a"}
+
+
+def test_concurrent_first_use_loads_once():
+    registry, calls = registry_of("lazy", ["a"], delay=0.05)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("a"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ["a"]
+    assert results == ["a-1"] * 8
+
+
+def test_eager_loads_in_registration_order():
+    registry, calls = registry_of("eager", ["c", "a", "b"])
+    registry.start()
+
+    assert calls == ["c", "a", "b"]
+    assert all(registry.is_loaded(name) for name in "abc")
+
+
+def test_parallel_loads_at_the_same_time():
+    # Each loader waits until all three are running: one after the other would time out
+    registry, calls = registry_of("parallel", ["a", "b", "c"], barrier=threading.Barrier(3))
+    registry.start()
+
+    assert sorted(calls) == ["a", "b", "c"]
+    assert set(registry.load_times) == {"a", "b", "c"}
+
+
+@pytest.mark.parametrize("mode", ["eager", "parallel"])
+def test_startup_raises_loader_errors(mode):
+    registry, _ = registry_of(mode, ["a"])
+    registry.register("broken", lambda: 1 / 0)
+
+    with pytest.raises(ZeroDivisionError):
+        registry.start()
+    assert not registry.is_loaded("broken")
+
+
+def test_failed_lazy_load_is_retried():
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise OSError("disk busy")
+        return "model"
+
+    registry = ModelRegistry("lazy")
+    registry.register("a", flaky)
+    with pytest.raises(OSError):
+        registry.get("a")
+    assert registry.get("a") == "model"
+
+
+def test_version_follows_the_source_files(tmp_path):
+    source = tmp_path / "model.joblib"
+    source.write_bytes(b"v1")
+    registry = ModelRegistry("lazy")
+    registry.register("a", lambda: "model", [str(source)])
+
+    assert registry.version("a") == source_version([str(source)])
+    assert registry.served_version("b") == ""
+    source.write_bytes(b"version 2")
+    assert source_version([str(source)]) != registry.version("a")
+    assert source_version([str(tmp_path / "missing")]) != source_version([str(source)])
+
+
+# ================================
+# Hot Reload and Pinning
+# ================================
+def wait_until(condition, timeout=5):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        assert time.perf_counter() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def artifact(tmp_path):
+    """A registry serving the text of one source file, which tests rewrite to retrain."""
+    source = tmp_path / "model.txt"
+    source.write_text("v1")
+    registry = ModelRegistry("lazy")
+    registry.register("m", lambda: source.read_text(), [str(source)])
+    return registry, source
+
+
+def retrain(source, text):
+    source.write_text(text)
+    # Make sure the mtime moves even on coarse-grained filesystems
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_reload_only_when_sources_change(artifact):
+    registry, source = artifact
+    assert registry.get("m") == "v1"
+    assert registry.reload("m") is None
+
+    retrain(source, "v2")
+    record = registry.reload("m")
+    assert record["status"] == "reloaded"
+    assert record["previous_version"] != record["version"] == registry.version("m")
+    assert registry.get("m") == "v2"
+    assert registry.reload("m", force=True)["status"] == "reloaded"
+
+
+def test_old_version_serves_until_warm_up_finishes(artifact):
+    registry, source = artifact
+    registry.get("m")
+    warming, release = threading.Event(), threading.Event()
+
+    def warm(model):
+        warming.set()
+        release.wait(5)
+
+    registry.warmers["m"] = warm
+    retrain(source, "v2")
+    reload = threading.Thread(target=registry.reload, args=("m",))
+    reload.start()
+    warming.wait(5)
+    assert registry.get("m") == "v1"
+
+    release.set()
+    reload.join()
+    assert registry.get("m") == "v2"
+    assert "warm_seconds" in registry.reloads["m"]
+
+
+def test_failed_warm_up_keeps_the_old_version(artifact):
+    registry, source = artifact
+    old_version = registry.version("m")
+    registry.warmers["m"] = lambda model: 1 / 0
+    retrain(source, "v2")
+
+    with pytest.raises(ZeroDivisionError):
+        registry.reload("m")
+    assert registry.entry("m") == ("v1", old_version)
+    record = registry.reloads["m"]
+    assert record["status"] == "failed"
+    assert record["version"] == old_version
+    assert record["failed_version"] == source_version([str(source)])
+    assert record["error"].startswith("ZeroDivisionError")
+
+
+def test_pinned_thread_keeps_its_version_across_a_reload(artifact):
+    registry, source = artifact
+    registry.pin()
+    try:
+        first = registry.entry("m")
+        retrain(source, "v2")
+        other = threading.Thread(target=registry.reload, args=("m",))
+        other.start()
+        other.join()
+
+        assert registry.entry("m") == first
+        assert registry.served_version("m") == first[1]
+    finally:
+        registry.unpin()
+    assert registry.get("m") == "v2"
+
+
+def test_pinned_to_serves_the_given_entries(artifact):
+    registry, _ = artifact
+    with registry.pinned_to({"m": ("other", "v0")}):
+        assert registry.entry("m") == ("other", "v0")
+    assert registry.get("m") == "v1"
+
+
+def test_watcher_reloads_once_the_files_settle(artifact):
+    registry, source = artifact
+    registry.get("m")
+    prepared = []
+    registry.watch(0.01, prepared.append)
+
+    retrain(source, "v2")
+    wait_until(lambda: registry.get("m") == "v2")
+    assert prepared[-1] == ["m"]
+    assert registry.reloads["m"]["status"] == "reloaded"
+
+
+def test_watcher_skips_files_that_failed_to_load(artifact):
+    registry, source = artifact
+    registry.get("m")
+    attempts = []
+
+    def warm(model):
+        attempts.append(model)
+        if model == "broken":
+            raise ValueError("bad artifact")
+
+    registry.warmers["m"] = warm
+    registry.watch(0.01)
+
+    retrain(source, "broken")
+    wait_until(lambda: registry.reloads.get("m", {}).get("status") == "failed")
+    time.sleep(0.1)
+    assert attempts == ["broken"]
+    assert registry.get("m") == "v1"
+
+    retrain(source, "v3")
+    wait_until(lambda: registry.get("m") == "v3")
+
+
+def test_reload_route_reports_failures(monkeypatch, artifact):
+    os.environ.setdefault("MODEL_LOADING", "lazy")
+    os.environ.setdefault("MODEL_RELOAD_INTERVAL", "0")
+    import app
+
+    registry, source = artifact
+    registry.get("m")
+    registry.warmers["m"] = lambda model: 1 / 0
+    monkeypatch.setattr(app, "registry", registry)
+    monkeypatch.setattr(app, "SHARED_MODELS", False)
+    client = app.app.test_client()
+
+    response = client.post("/api/models/reload", json={"models": ["m"]})
+    assert response.status_code == 200
+    assert response.get_json()["results"]["m"]["status"] == "unchanged"
+
+    retrain(source, "v2")
+    response = client.post("/api/models/reload", json={"models": ["m"]})
+    assert response.status_code == 500
+    assert response.get_json()["results"]["m"]["status"] == "failed"
+
+    response = client.post("/api/models/reload", json={"models": ["nope"]})
+    assert response.status_code == 400
+    assert response.get_json()["fields"] == [{"field": "models", "error": "Unknown models: ['nope']"}]
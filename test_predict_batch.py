@@ -0,0 +1,156 @@
+"""
+The /api/<model>/predict_batch routes: results in input order, invalid rows
+reported by index without failing the batch, and the same predictions as
+the single-row routes.
+
+Run with:  python -m pytest test_predict_batch.py
+"""
+import os
+
+import numpy as np
+import pytest
+from sklearn.datasets import load_breast_cancer
+
+os.environ.setdefault("MODEL_LOADING", "lazy")
+os.environ.setdefault("MODEL_RELOAD_INTERVAL", "0")
+
+DIABETES_ROW = {"age": 0.03, "bmi": 0.06, "bp": 0.02, "s1": -0.04, "s2": -0.03,
+                "s3": -0.04, "s4": -0.002, "s5": 0.02, "s6": -0.02}
+BANKNOTE_ROWS = [
+    {"var": 3.6216, "skew": 8.6661, "curt": -2.8073, "entr": -0.44699},
+    {"var": -1.3971, "skew": 3.3191, "curt": -1.3927, "entr": -1.9948},
+    {"var": 0.5, "skew": -2.0, "curt": 1.5, "entr": 0.1},
+]
+
+
+class PlusTen:
+    """Stands in for the bitcoin forest: the next price is the current one plus 10."""
+
+    def predict(self, X):
+        return np.asarray(X)[:, 2] + 10
+
+
+@pytest.fixture
+def client(monkeypatch):
+    import app
+
+    # Every prediction goes through the model, not a cache filled by another test
+    monkeypatch.setattr(app, "prediction_caches", {})
+    return app.app.test_client()
+
+
+def single(client, path, row):
+    response = client.post(path, json=row)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def assert_same_prediction(result, expected):
+    # Batch and single-row paths may round the last bit of a probability differently
+    assert result["prediction"] == expected["prediction"]
+    assert result["probability"][0] == pytest.approx(expected["probability"][0])
+
+
+def test_diabetes_batch_matches_single_rows(client):
+    rows = [DIABETES_ROW, {**DIABETES_ROW, "bmi": -0.05}, {**DIABETES_ROW, "age": 0.0}]
+    response = client.post("/api/diabetes/predict_batch", json={"records": rows})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["count"] == 3 and body["error_count"] == 0
+    expected = [single(client, "/api/diabetes/predict", row)["prediction"] for row in rows]
+    assert [row["prediction"] for row in body["results"]] == pytest.approx(expected)
+
+
+def test_banknote_records_and_columns_agree(client):
+    records = client.post("/api/banknote/predict_batch", json={"records": BANKNOTE_ROWS}).get_json()
+    columns = client.post("/api/banknote/predict_batch", json={
+        "columns": {name: [row[name] for row in BANKNOTE_ROWS] for name in BANKNOTE_ROWS[0]}
+    }).get_json()
+
+    assert records == columns
+    for row, result in zip(BANKNOTE_ROWS, records["results"]):
+        assert_same_prediction(result, single(client, "/api/banknote/authenticate", row))
+
+
+def test_invalid_rows_are_reported_in_place(client):
+    rows = [BANKNOTE_ROWS[0], {"var": 1.0, "skew": 2.0, "curt": 3.0}, BANKNOTE_ROWS[1],
+            {**BANKNOTE_ROWS[2], "entr": "abc"}, {**BANKNOTE_ROWS[2], "entr": 1e400}]
+    response = client.post("/api/banknote/predict_batch", json={"records": rows})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["count"] == 5 and body["error_count"] == 3
+    results = body["results"]
+    assert results[1] == {"error": "Missing field: entr"}
+    assert "error" in results[3]
+    assert results[4] == {"error": "Features must be finite numbers"}
+    assert_same_prediction(results[0], single(client, "/api/banknote/authenticate", BANKNOTE_ROWS[0]))
+    assert_same_prediction(results[2], single(client, "/api/banknote/authenticate", BANKNOTE_ROWS[1]))
+
+
+def test_batch_of_only_invalid_rows(client):
+    response = client.post("/api/diabetes/predict_batch", json={"records": [{"age": 1.0}, None]})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["error_count"] == 2
+    assert all("error" in result for result in body["results"])
+
+
+def test_breast_cancer_batch_explains_on_request(client):
+    data = load_breast_cancer()
+    rows = [dict(zip(data.feature_names, map(float, x))) for x in data.data[:3]]
+
+    plain = client.post("/api/breastcancer/predict_batch", json={"records": rows}).get_json()
+    explained = client.post("/api/breastcancer/predict_batch", json={"records": rows, "explain": True}).get_json()
+
+    assert plain["count"] == 3 and plain["error_count"] == 0
+    assert plain["feature_importance"] == explained["feature_importance"]
+    assert all("explanation" not in result for result in plain["results"])
+    for row, result, with_explanation in zip(rows, plain["results"], explained["results"]):
+        assert with_explanation["prediction"] == result["prediction"]
+        assert "explanation" in with_explanation
+        expected = single(client, "/api/breastcancer/predict", {**row, "explain": False})
+        assert result["prediction_label"] == expected["prediction_label"]
+        assert_same_prediction(result, expected)
+
+
+def test_bitcoin_batch_rejects_non_positive_prices(client, monkeypatch):
+    import app
+
+    monkeypatch.setitem(app.registry._entries, "bitcoin", (PlusTen(), "test"))
+    response = client.post("/api/bitcoin/predict_batch", json={"columns": {"price": [100.0, 0.0, -5.0, 250.0]}})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["error_count"] == 2
+    assert body["results"][1] == body["results"][2] == {"error": "Price must be positive"}
+    assert [body["results"][i]["current_price"] for i in (0, 3)] == [100.0, 250.0]
+    assert [body["results"][i]["predicted_price"] for i in (0, 3)] == [110.0, 260.0]
+
+
+@pytest.mark.parametrize("payload, message", [
+    ([BANKNOTE_ROWS[0]], "Expected a JSON object with 'records' or 'columns'"),
+    ({"rows": BANKNOTE_ROWS}, "Expected a JSON object with 'records' or 'columns'"),
+    ({"records": {"var": 1.0}}, "'records' must be a list"),
+    ({"columns": {"var": [1.0], "skew": [1.0], "curt": [1.0]}}, "Missing columns: ['entr']"),
+    ({"columns": {"var": [1.0, 2.0], "skew": [1.0], "curt": [1.0], "entr": [1.0]}},
+     "All columns must have the same length"),
+])
+def test_malformed_batch_is_400(client, payload, message):
+    response = client.post("/api/banknote/predict_batch", json=payload)
+
+    assert response.status_code == 400
+    assert response.get_json()["error"] == message
+
+
+def test_oversized_batch_is_400(client, monkeypatch):
+    import app
+    from schemas import schema_for
+
+    monkeypatch.setattr(app, "BANKNOTE_SCHEMA", schema_for(app.BANKNOTE_FEATURES, 2))
+    response = client.post("/api/banknote/predict_batch", json={"records": BANKNOTE_ROWS})
+
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "Batch too large: 3 rows (max 2)"
@@ -0,0 +1,48 @@
+"""
+LRU / TTL behaviour and keys of prediction_cache.py.
+
+Run with:  python -m pytest test_prediction_cache.py
+"""
+import numpy as np
+
+import prediction_cache
+from prediction_cache import PredictionCache, row_keys
+
+
+def test_lru_eviction():
+    cache = PredictionCache(maxsize=2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(prediction_cache.time, "monotonic", lambda: now[0])
+    cache = PredictionCache(maxsize=10, ttl=5)
+    cache.put("a", 1)
+    now[0] += 4
+    assert cache.get("a") == 1
+    now[0] += 2
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert (stats["expirations"], stats["size"], stats["hits"], stats["misses"]) == (1, 0, 1, 1)
+
+
+def test_keys_change_with_model_version():
+    rows = np.array([[1.0, -0.0], [2.0, 3.0]])
+    assert row_keys("v1", rows) != row_keys("v2", rows)
+    assert row_keys("v1", rows) == row_keys("v1", rows.copy())
+    # -0.0 and 0.0 share an entry
+    assert row_keys("v1", rows)[0] == row_keys("v1", np.array([[1.0, 0.0]]))[0]
+
+
+def test_reloaded_version_misses():
+    cache = PredictionCache()
+    rows = np.array([[1.0, 2.0]])
+    cache.put(row_keys("v1", rows)[0], "old result")
+    assert cache.get(row_keys("v2", rows)[0]) is None
@@ -0,0 +1,142 @@
+"""
+Prediction log: prediction_log.py.
+
+Run with:  python -m pytest test_prediction_log.py
+"""
+import glob
+import os
+import time
+
+import numpy as np
+import pytest
+
+from prediction_log import PredictionLogger
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.parquet  # noqa: E402
+
+FEATURES = ["var", "skew", "curt", "entr"]
+
+
+def rows(n, start=0):
+    return np.arange(start, start + 4 * n, dtype=np.float64).reshape(n, 4)
+
+
+def results(n):
+    return [(1, [0.25, 0.75])] * n
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        assert time.perf_counter() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def log_files(directory, fmt="parquet"):
+    return sorted(glob.glob(os.path.join(str(directory), "*", f"*.{fmt}")))
+
+
+def read(path):
+    if path.endswith(".parquet"):
+        return pa.parquet.read_table(path)
+    return pa.ipc.open_file(path).read_all()
+
+
+@pytest.fixture
+def make_logger(tmp_path):
+    loggers = []
+
+    def make(**kwargs):
+        kwargs = {"flush_rows": 10 ** 6, "flush_interval": 60, **kwargs}
+        logger = PredictionLogger(str(tmp_path), **kwargs)
+        loggers.append(logger)
+        return logger
+
+    yield make
+    for logger in loggers:
+        logger.close(5)
+
+
+def test_drop_newest(make_logger, tmp_path):
+    logger = make_logger(max_queue_rows=5, full_policy="drop_newest")
+    assert logger.log("banknote", "v1", rows(3), FEATURES, results(3))
+    assert not logger.log("banknote", "v1", rows(3, 100), FEATURES, results(3))
+    assert logger.flush(5)
+    stats = logger.stats()
+    assert stats["dropped_rows"] == {"drop_newest": 3}
+    assert (stats["logged_rows"], stats["written_rows"]) == (3, 3)
+    assert read(log_files(tmp_path)[0])["var"].to_pylist() == [0.0, 4.0, 8.0]
+
+
+def test_drop_oldest(make_logger, tmp_path):
+    logger = make_logger(max_queue_rows=5, full_policy="drop_oldest")
+    assert logger.log("banknote", "v1", rows(3), FEATURES, results(3))
+    assert logger.log("banknote", "v1", rows(3, 100), FEATURES, results(3))
+    assert logger.flush(5)
+    stats = logger.stats()
+    assert stats["dropped_rows"] == {"drop_oldest": 3}
+    assert (stats["logged_rows"], stats["written_rows"]) == (3, 3)
+    assert read(log_files(tmp_path)[0])["var"].to_pylist() == [100.0, 104.0, 108.0]
+
+
+def test_block_drops_after_timeout(make_logger):
+    logger = make_logger(max_queue_rows=5, full_policy="block", block_timeout=0.05)
+    assert logger.log("banknote", "v1", rows(3), FEATURES, results(3))
+    start = time.perf_counter()
+    assert not logger.log("banknote", "v1", rows(3), FEATURES, results(3))
+    assert time.perf_counter() - start >= 0.05
+    assert logger.stats()["dropped_rows"] == {"block": 3}
+
+
+def test_block_waits_for_the_writer(make_logger):
+    logger = make_logger(max_queue_rows=5, flush_interval=0.01, full_policy="block", block_timeout=5)
+    assert logger.log("banknote", "v1", rows(3), FEATURES, results(3))
+    assert logger.log("banknote", "v1", rows(3), FEATURES, results(3))
+    assert logger.flush(5)
+    stats = logger.stats()
+    assert stats["dropped_rows"] == {}
+    assert stats["written_rows"] == 6
+
+
+def test_rotates_after_rotate_rows(make_logger, tmp_path):
+    logger = make_logger(flush_rows=3, rotate_rows=5)
+    logger.log("banknote", "v1", rows(3), FEATURES, results(3))
+    wait_until(lambda: logger.stats()["written_rows"] == 3)
+    assert logger.stats()["files_closed"] == 0
+    logger.log("banknote", "v1", rows(3), FEATURES, results(3))
+    wait_until(lambda: logger.stats()["files_closed"] == 1)
+    logger.log("banknote", "v1", rows(3), FEATURES, results(3))
+    assert logger.flush(5)
+    assert [read(path).num_rows for path in log_files(tmp_path)] == [6, 3]
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_only_complete_files_are_visible(make_logger, tmp_path, fmt):
+    logger = make_logger(fmt=fmt, flush_rows=3)
+    logger.log("banknote", "v1", rows(3), FEATURES, results(3), "/api/banknote/authenticate")
+    wait_until(lambda: logger.stats()["written_rows"] == 3)
+    assert log_files(tmp_path, fmt) == []
+    assert len(logger.stats()["open_files"]) == 1
+
+    assert logger.flush(5)
+    assert logger.stats()["open_files"] == []
+    assert glob.glob(os.path.join(str(tmp_path), "*", "*.inprogress")) == []
+    (path,) = log_files(tmp_path, fmt)
+    table = read(path)
+    assert table.column_names == [
+        "logged_at", "model_version", "endpoint", *FEATURES, "prediction", "probability_0", "probability_1"
+    ]
+    assert table["probability_1"].to_pylist() == [0.75] * 3
+    assert table["endpoint"].to_pylist() == ["/api/banknote/authenticate"] * 3
+
+
+def test_new_columns_open_a_new_file(make_logger, tmp_path):
+    logger = make_logger()
+    logger.log("banknote", "v1", rows(2), FEATURES, results(2))
+    logger.log("banknote", "v1", rows(2), ["a", "b", "c", "d"], results(2))
+    logger.log("banknote", "v2", rows(2), FEATURES, results(2))
+    assert logger.flush(5)
+    tables = [read(path) for path in log_files(tmp_path)]
+    assert sorted(table.num_rows for table in tables) == [2, 4]
+    assert sorted(tuple(table.column_names[3:7]) for table in tables) == [("a", "b", "c", "d"), tuple(FEATURES)]
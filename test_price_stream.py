@@ -0,0 +1,163 @@
+"""
+Bitcoin feature rows, streamed or built per request, must match the rows
+bitcoinmodel.py trains on: time features are UTC whatever the host timezone.
+
+Run with:  python -m pytest test_price_stream.py
+"""
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+import bitcoinmodel
+from bar_store import bar_features
+from price_stream import PriceRingBuffer
+
+os.environ.setdefault("MODEL_LOADING", "lazy")
+os.environ.setdefault("MODEL_RELOAD_INTERVAL", "0")
+
+# A Tuesday 23:30 UTC, which is 05:00 on Wednesday in Asia/Kolkata (+05:30)
+NOW = datetime(2026, 1, 6, 23, 30, tzinfo=timezone.utc)
+UTC_TIME_FEATURES = [23, 30, 1]
+
+
+def test_non_utc_tick_matches_training_features():
+    # 03:58 at +05:00 is 22:58 UTC on the day before: hour and weekday both differ
+    start = datetime(2024, 3, 4, 3, 58, tzinfo=timezone(timedelta(hours=5)))
+    buffer = PriceRingBuffer(capacity=10)
+    prices = [100.0, 101.0, 102.0, 103.0]
+    rows = []
+    for i, price in enumerate(prices):
+        buffer.append(start + timedelta(minutes=i), price)
+        rows.append(buffer.feature_row.copy())
+
+    minutes, history = buffer.history()
+    X, _ = bar_features(minutes, history, (1,))
+    np.testing.assert_array_equal(rows[2], X[0])
+
+
+class FrozenDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return NOW.astimezone(tz)  # local time of the host when tz is None
+
+
+class RecordingModel:
+    """Stands in for the bitcoin forest and keeps the rows it was asked to predict."""
+
+    def __init__(self):
+        self.rows = []
+
+    def predict(self, X):
+        self.rows.append(np.array(X))
+        return np.asarray(X)[:, 2]
+
+
+@pytest.fixture
+def non_utc_host():
+    if not hasattr(time, "tzset"):
+        pytest.skip("needs time.tzset")
+    previous = os.environ.get("TZ")
+    os.environ["TZ"] = "Asia/Kolkata"
+    time.tzset()
+    yield
+    if previous is None:
+        del os.environ["TZ"]
+    else:
+        os.environ["TZ"] = previous
+    time.tzset()
+
+
+@pytest.fixture
+def fake_bitcoin(monkeypatch):
+    import app
+
+    model = RecordingModel()
+    monkeypatch.setattr(app, "prediction_caches", {})
+    monkeypatch.setitem(app.registry._entries, "bitcoin", (model, "test"))
+    return app, model
+
+
+@pytest.fixture
+def bitcoin_app(monkeypatch, fake_bitcoin, non_utc_host):
+    app, model = fake_bitcoin
+    monkeypatch.setattr(app, "datetime", FrozenDatetime)
+    return app, model
+
+
+def test_request_time_features_are_utc(bitcoin_app):
+    app, model = bitcoin_app
+    client = app.app.test_client()
+    assert client.post("/api/bitcoin/predict", json={"price": 60000.0}).status_code == 200
+    assert client.post("/api/bitcoin/predict_batch", json={"records": [{"price": 60000.0}]}).status_code == 200
+    app.bitcoin_columns(np.array([[60000.0]]))
+    assert len(model.rows) == 3
+    for X in model.rows:
+        np.testing.assert_array_equal(X[:, 3:], [UTC_TIME_FEATURES])
+
+
+def test_predict_next_two_minutes_uses_utc(monkeypatch, non_utc_host):
+    model = RecordingModel()
+    monkeypatch.setattr(bitcoinmodel, "datetime", FrozenDatetime)
+    assert bitcoinmodel.predict_next_two_minutes(model, 60000.0) == 60000.0
+    np.testing.assert_array_equal(model.rows[0][:, 3:], [UTC_TIME_FEATURES])
+
+
+# ================================
+# Ingest and stream routes
+# ================================
+def ticks(prices, start=1_700_000_000):
+    return [{"timestamp": start + 60 * i, "price": price} for i, price in enumerate(prices)]
+
+
+def test_ingest_makes_features_and_a_prediction(fake_bitcoin):
+    app, model = fake_bitcoin
+    client = app.app.test_client()
+    response = client.post("/api/bitcoin/ingest", json={"symbol": "INGEST-1", "ticks": ticks([100.0, 101.0])})
+    assert response.get_json() == {"symbol": "INGEST-1", "ingested": 2, "ready": False}
+
+    response = client.post("/api/bitcoin/ingest", json={"symbol": "INGEST-1", **ticks([102.0], 1_700_000_120)[0]})
+    body = response.get_json()
+    assert (body["ingested"], body["ready"]) == (1, True)
+    assert body["prediction"]["timestamp"] == "2023-11-14T22:15:20+00:00"
+    np.testing.assert_array_equal(model.rows[-1][0, :3], [101.0, 100.0, 102.0])
+    np.testing.assert_array_equal(app.price_streams.features("INGEST-1"), model.rows[-1][0])
+
+
+def test_invalid_tick_rejects_the_whole_batch(fake_bitcoin):
+    app, _ = fake_bitcoin
+    client = app.app.test_client()
+    bad = ticks([100.0, 101.0, 102.0, 103.0])
+    bad[2]["price"] = -1
+    bad[3]["timestamp"] = "yesterday"
+    response = client.post("/api/bitcoin/ingest", json={"symbol": "INGEST-2", "ticks": bad})
+    assert response.status_code == 400
+    assert [error["field"] for error in response.get_json()["fields"]] == ["ticks[2].price", "ticks[3].timestamp"]
+    assert "INGEST-2" not in app.price_streams.buffers  # nothing was applied
+
+    response = client.post("/api/bitcoin/ingest", json={"symbol": "INGEST-2", "price": "abc"})
+    assert response.status_code == 400
+    assert response.get_json()["fields"][0]["field"] == "price"
+    assert client.post("/api/bitcoin/ingest", json={"ticks": {"price": 1}}).status_code == 400
+
+
+def test_stream_sends_each_prediction_of_its_symbol(fake_bitcoin):
+    app, _ = fake_bitcoin
+    client = app.app.test_client()
+    response = client.get("/api/bitcoin/stream?symbol=STREAM-1", buffered=False)
+    assert response.mimetype == "text/event-stream"
+    chunks = iter(response.response)
+    assert next(chunks) == b": connected\n\n"
+
+    client.post("/api/bitcoin/ingest", json={"symbol": "OTHER", "ticks": ticks([50.0, 51.0, 52.0])})
+    client.post("/api/bitcoin/ingest", json={"symbol": "STREAM-1", "ticks": ticks([100.0, 101.0, 102.0])})
+    chunk = next(chunks).decode()
+    assert chunk.startswith("data: ") and chunk.endswith("\n\n")
+    event = json.loads(chunk[len("data: "):])
+    assert (event["symbol"], event["current_price"], event["model_version"]) == ("STREAM-1", 102.0, "test")
+
+    response.close()
+    assert not app.price_streams.has_subscribers()
@@ -0,0 +1,47 @@
+"""
+Payload validation of schemas.py.
+
+Run with:  python -m pytest test_schemas.py
+"""
+import numpy as np
+import pytest
+
+from schemas import SchemaError, schema_for
+
+FEATURES = ["var", "skew", "curt", "entr"]
+
+
+def test_valid_row():
+    row = schema_for(FEATURES).parse_row({"var": 1, "skew": 2.5, "curt": "3", "entr": -4})
+    np.testing.assert_array_equal(row, [[1, 2.5, 3, -4]])
+
+
+def test_missing_and_non_numeric_fields():
+    with pytest.raises(SchemaError) as e:
+        schema_for(FEATURES).parse_row({"var": 1, "skew": "abc", "entr": None})
+    assert e.value.errors == [
+        {"field": "skew", "error": "Expected a number, got 'abc'"},
+        {"field": "curt", "error": "Missing field"},
+        {"field": "entr", "error": "Expected a number, got null"},
+    ]
+    assert str(e.value) == "Invalid input for: skew, curt, entr"
+
+
+def test_non_finite_field():
+    with pytest.raises(SchemaError) as e:
+        schema_for(FEATURES).parse_row({"var": 1, "skew": 2, "curt": "nan", "entr": 4})
+    assert e.value.errors == [{"field": "curt", "error": "Must be a finite number"}]
+
+
+def test_batch_keeps_per_row_errors():
+    records = [
+        {"var": 1, "skew": 2, "curt": 3, "entr": 4},
+        {"var": 1, "skew": 2, "curt": 3},
+        {"var": 1, "skew": "x", "curt": 3, "entr": 4},
+    ]
+    features, valid_rows, errors, n_rows = schema_for(FEATURES).parse_batch({"records": records})
+    assert n_rows == 3
+    assert valid_rows.tolist() == [0]
+    assert set(errors) == {1, 2}
+    assert errors[1] == "Missing field: entr"
+    np.testing.assert_array_equal(features, [[1, 2, 3, 4]])
@@ -0,0 +1,127 @@
+"""
+Tests for score_csv.py: column mapping, chunked scoring and the CLI.
+
+Run with:  python -m pytest test_score_csv.py
+"""
+import os
+import subprocess
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+import score_csv
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture
+def banknote_csv(tmp_path):
+    df = pd.read_csv(os.path.join(HERE, "bank_note_authentication.csv")).head(50)
+    df.insert(0, "id", range(len(df)))
+    df["entr"] = df["entr"].astype(object)
+    df.loc[3, "entr"] = "n/a"
+    df.loc[7, "curt"] = np.nan
+    path = tmp_path / "banknote.csv"
+    df.to_csv(path, index=False)
+    return path, df
+
+
+def expected_banknote(df):
+    model = joblib.load(os.path.join(HERE, "bank_note_authentication_model.joblib"))
+    transformer = joblib.load(os.path.join(HERE, "power_transformer.joblib"))
+    features = df[score_csv.BANKNOTE_FEATURES].apply(pd.to_numeric, errors="coerce")
+    valid = features.notna().all(axis=1).to_numpy()
+    X = features[valid].to_numpy(dtype=np.float64, copy=True)
+    X[:, 2:4] = transformer.transform(X[:, 2:4])
+    return valid, model.predict(X), model.predict_proba(X)
+
+
+def test_wisconsin_columns_map_to_sklearn_names():
+    mapping = score_csv.column_mapping(
+        ["id", "radius_mean", "fractal_dimension_se", "concave points_worst"],
+        ["mean radius", "fractal dimension error", "worst concave points"],
+    )
+    assert mapping == {
+        "radius_mean": "mean radius",
+        "fractal_dimension_se": "fractal dimension error",
+        "concave points_worst": "worst concave points",
+    }
+
+
+def test_override_replaces_a_mapping():
+    mapping = score_csv.column_mapping(["var", "skew", "curt", "entr", "entropy"], score_csv.BANKNOTE_FEATURES,
+                                       ["entropy=entr"])
+    assert mapping["entropy"] == "entr"
+    assert "entr" not in mapping
+
+
+def test_missing_feature_is_reported():
+    with pytest.raises(SystemExit, match=r"\['entr'\]"):
+        score_csv.column_mapping(["var", "skew", "curt"], score_csv.BANKNOTE_FEATURES)
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_scores_in_input_order_with_invalid_rows_blank(banknote_csv, tmp_path, monkeypatch, workers):
+    path, df = banknote_csv
+    monkeypatch.chdir(HERE)
+    output = tmp_path / "scored.csv"
+
+    rows, _ = score_csv.score_file("banknote", str(path), str(output), chunksize=8, workers=workers, keep=["id"])
+
+    scored = pd.read_csv(output)
+    valid, prediction, probability = expected_banknote(df)
+    assert rows == len(df)
+    assert list(scored.columns) == ["id", "prediction", "probability_0", "probability_1"]
+    assert scored["id"].tolist() == list(range(len(df)))
+    assert scored.loc[~valid, "prediction"].isna().all()
+    assert scored.loc[valid, "prediction"].astype(int).tolist() == prediction.tolist()
+    np.testing.assert_allclose(scored.loc[valid, ["probability_0", "probability_1"]], probability)
+
+
+def test_parquet_output(banknote_csv, tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    path, df = banknote_csv
+    monkeypatch.chdir(HERE)
+    output = tmp_path / "scored.parquet"
+
+    score_csv.score_file("banknote", str(path), str(output), chunksize=8, workers=0)
+
+    scored = pd.read_parquet(output)
+    assert len(scored) == len(df)
+    assert str(scored["prediction"].dtype) == "Int64"
+
+
+def test_cli_scores_without_server_side_effects(banknote_csv, tmp_path):
+    path, df = banknote_csv
+    output = tmp_path / "scored.csv"
+    env = dict(os.environ, PREDICTION_LOG="1", PREDICTION_LOG_DIR=str(tmp_path / "logs"),
+               BANKNOTE_SHADOW_MODELS="banknote_decision_tree", CANDIDATES_DIR=str(tmp_path / "candidates"))
+    # Fails if any worker imports app.py
+    check = "import sys, score_csv; sys.modules['app'] = None; sys.argv[0] = 'score_csv.py'; score_csv.main()"
+
+    result = subprocess.run(
+        [sys.executable, "-c", check, "banknote", str(path), str(output), "--workers", "1", "--keep", "id"],
+        cwd=HERE, env=env, capture_output=True, text=True,
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert f"Scored {len(df)} rows" in result.stderr
+    assert len(pd.read_csv(output)) == len(df)
+    assert not (tmp_path / "logs").exists()
+
+
+def test_cli_rejects_unmappable_input(tmp_path):
+    path = tmp_path / "bad.csv"
+    pd.DataFrame({"var": [1.0], "skew": [2.0]}).to_csv(path, index=False)
+
+    result = subprocess.run(
+        [sys.executable, "score_csv.py", "banknote", str(path), str(tmp_path / "out.csv"), "--workers", "0"],
+        cwd=HERE, capture_output=True, text=True,
+    )
+
+    assert result.returncode == 1
+    assert "No input column for features: ['curt', 'entr']" in result.stderr
+    assert not (tmp_path / "out.csv").exists()
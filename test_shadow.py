@@ -0,0 +1,122 @@
+"""
+Shadow scoring: shadow.py and its hook in app.py.
+
+Run with:  python -m pytest test_shadow.py
+"""
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from shadow import ShadowScorer
+
+os.environ.setdefault("MODEL_LOADING", "lazy")
+os.environ.setdefault("MODEL_RELOAD_INTERVAL", "0")
+
+BANKNOTE_ROW = {"var": 1.0, "skew": 2.0, "curt": 3.0, "entr": 4.0}
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        assert time.perf_counter() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def primary_result(features):
+    probability = np.column_stack([1 - features[:, 0], features[:, 0]])
+    return (probability[:, 1] > 0.5).astype(int), probability
+
+
+def test_full_queue_drops_and_counts():
+    release = threading.Event()
+
+    def score(name, features):
+        release.wait(5)
+        return ("v1", *primary_result(features))
+
+    scorer = ShadowScorer(score, ["candidate"], workers=1, max_queue=1)
+    features = np.full((3, 1), 0.9)
+    assert scorer.submit(features, "v1", *primary_result(features), 0.001)
+    wait_until(lambda: scorer.stats()["queue"]["size"] == 0)  # the worker holds the first job
+    assert scorer.submit(features, "v1", *primary_result(features), 0.001)
+    assert not scorer.submit(features[:2], "v1", *primary_result(features[:2]), 0.001)
+    assert not scorer.submit(features, "v1", *primary_result(features), 0.001)
+
+    release.set()
+    scorer.join()
+    stats = scorer.stats()
+    assert stats["queue"]["dropped_batches"] == 2
+    assert stats["queue"]["dropped_rows"] == 5
+    assert stats["primary"]["v1"]["rows"] == 6
+    assert stats["shadows"]["candidate"]["versions"]["v1"]["rows"] == 6
+
+
+def test_agreement_matches_per_row_comparison():
+    rng = np.random.default_rng(0)
+
+    def score(name, features):
+        # A candidate that sees the positive class probability shifted
+        probability = np.clip(np.column_stack([1 - features[:, 0], features[:, 0]]) + [[-0.1, 0.1]], 0, 1)
+        return "c1", (probability[:, 1] > 0.5).astype(int), probability
+
+    scorer = ShadowScorer(score, ["candidate"], workers=2)
+    agreed = rows = 0
+    diff = 0.0
+    for _ in range(20):
+        features = rng.uniform(0, 1, (int(rng.integers(1, 10)), 1))
+        prediction, probability = primary_result(features)
+        _, shadow_prediction, shadow_probability = score("candidate", features)
+        agreed += sum(int(a == b) for a, b in zip(prediction, shadow_prediction))
+        diff += sum(abs(a - b) for a, b in zip(probability[:, 1], shadow_probability[:, 1]))
+        rows += len(features)
+        primary_version = "v1" if rows % 2 else "v2"
+        scorer.submit(features, primary_version, prediction, probability, 0.001)
+    scorer.join()
+
+    agreement = scorer.stats()["shadows"]["candidate"]["versions"]["c1"]["agreement"]
+    assert sum(entry["rows"] for entry in agreement.values()) == rows
+    assert sum(entry["agreed"] for entry in agreement.values()) == agreed
+    assert 0 < agreed < rows
+    total_diff = sum(entry["mean_abs_probability_diff"] * entry["rows"] for entry in agreement.values())
+    assert total_diff == pytest.approx(diff, abs=1e-4)
+    for entry in agreement.values():
+        assert entry["agreement_rate"] == round(entry["agreed"] / entry["rows"], 6)
+
+
+def test_shadow_errors_are_counted():
+    def score(name, features):
+        if name == "broken":
+            raise RuntimeError("shadow failed")
+        return ("c1", *primary_result(features))
+
+    scorer = ShadowScorer(score, ["broken", "candidate"])
+    features = np.full((2, 1), 0.2)
+    assert scorer.submit(features, "v1", *primary_result(features), 0.001)
+    scorer.join()
+    stats = scorer.stats()["shadows"]
+    assert stats["broken"] == {"errors": 1, "versions": {}}
+    assert stats["candidate"]["errors"] == 0
+    assert stats["candidate"]["versions"]["c1"]["agreement"]["v1"]["agreed"] == 2
+
+
+def test_app_response_unaffected_by_failing_shadow(monkeypatch):
+    import app
+
+    monkeypatch.setattr(app, "prediction_caches", {})  # every request predicts
+    client = app.app.test_client()
+    expected = client.post("/api/banknote/authenticate", json=BANKNOTE_ROW)
+
+    def score(name, features):
+        raise RuntimeError("shadow failed")
+
+    scorer = ShadowScorer(score, ["broken"])
+    monkeypatch.setattr(app, "shadow_scorers", {"banknote": scorer})
+    response = client.post("/api/banknote/authenticate", json=BANKNOTE_ROW)
+    scorer.join()
+    assert response.status_code == 200
+    assert response.get_json() == expected.get_json()
+    assert scorer.errors["broken"] == 1
+    assert client.get("/api/shadow/stats").get_json()["models"]["banknote"]["shadows"]["broken"]["errors"] == 1
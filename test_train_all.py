@@ -0,0 +1,155 @@
+"""
+train_all.py orchestration, run on small stand-in training modules instead
+of the real scripts (which would publish over the served artifacts).
+
+Run with:  python -m pytest test_train_all.py
+"""
+import json
+import os
+
+import pytest
+
+import train_all
+from training_cache import TrainingRun, write_json
+
+FAKE_JOBS = '''
+import os
+import sys
+import time
+
+from training_cache import TrainingRun
+
+
+def train(cache_dir, alpha=1, pid_file=None, seconds=0.0):
+    print(f"training with alpha={alpha}")
+    print("a warning", file=sys.stderr)
+    if pid_file:
+        with open(pid_file, "w") as f:
+            f.write(str(os.getpid()))
+    time.sleep(seconds)
+    run = TrainingRun("fake", params={"alpha": alpha}, cache_dir=cache_dir)
+    if not run.is_cached():
+        run.save({"model": alpha}, metrics={"score": alpha / 10})
+    return run
+
+
+def fail(cache_dir):
+    print("fetching prices")
+    raise ConnectionError("no network")
+
+
+def nothing(cache_dir):
+    return None
+'''
+
+
+@pytest.fixture
+def jobs(tmp_path, monkeypatch):
+    """Jobs a/b train, c fails, d has nothing to train; everything is kept under tmp_path."""
+    (tmp_path / "fake_jobs.py").write_text(FAKE_JOBS)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setattr(train_all, "TRAINING_CACHE_DIR", str(cache_dir))
+    monkeypatch.setattr(train_all, "JOBS", {
+        "a": ("fake_jobs", "train"), "b": ("fake_jobs", "train"),
+        "c": ("fake_jobs", "fail"), "d": ("fake_jobs", "nothing"),
+    })
+    kwargs = {
+        "a": {"cache_dir": str(cache_dir), "pid_file": str(tmp_path / "a.pid"), "seconds": 0.2},
+        "b": {"cache_dir": str(cache_dir), "alpha": 2, "pid_file": str(tmp_path / "b.pid"), "seconds": 0.2},
+    }
+    monkeypatch.setattr(train_all, "job_kwargs",
+                        lambda name, strategy, bitcoin_feed=None: kwargs.get(name, {"cache_dir": str(cache_dir)}))
+    return cache_dir
+
+
+def by_job(summary):
+    return {record["job"]: record for record in summary["jobs"]}
+
+
+def test_jobs_report_trained_then_cached(jobs):
+    records = by_job(train_all.train_all(["a", "b"]))
+    assert [records[name]["status"] for name in "ab"] == ["trained", "trained"]
+    assert records["b"]["metrics"] == {"score": 0.2}
+    version = records["a"]["version"]
+
+    # As if the first run had finished a while ago
+    run = TrainingRun("fake", params={"alpha": 1}, cache_dir=str(jobs))
+    write_json(run.manifest_path, {**run.manifest(), "created": "2000-01-01T00:00:00"})
+    records = by_job(train_all.train_all(["a"]))
+    assert records["a"]["status"] == "cached"
+    assert records["a"]["version"] == version
+
+
+def test_summary_keeps_the_requested_order(jobs):
+    summary = train_all.train_all(["d", "b", "a"])
+
+    assert [record["job"] for record in summary["jobs"]] == ["d", "b", "a"]
+    with open(jobs / "train_all.json") as f:
+        assert json.load(f) == summary
+    for record in summary["jobs"]:
+        assert record["wall_seconds"] >= record["import_seconds"] >= 0
+        assert record["cpu_seconds"] >= 0 and record["peak_rss_mb"] > 0
+
+
+def test_each_job_runs_in_a_process_of_its_own(jobs, tmp_path):
+    train_all.train_all(["a", "b"])
+
+    pids = {(tmp_path / f"{name}.pid").read_text() for name in "ab"}
+    assert len(pids) == 2 and str(os.getpid()) not in pids
+
+
+def test_jobs_run_in_parallel(jobs):
+    parallel = train_all.train_all(["a", "b"])
+    assert parallel["wall_seconds"] < sum(record["wall_seconds"] for record in parallel["jobs"])
+
+
+def test_failed_job_does_not_stop_the_others(jobs):
+    records = by_job(train_all.train_all(["a", "c", "d"]))
+
+    assert records["c"]["status"] == "failed"
+    assert records["c"]["error"] == "ConnectionError: no network"
+    assert records["a"]["status"] == "trained"
+    assert records["d"]["status"] == "done"
+    with open(records["c"]["log"]) as f:
+        log = f.read()
+    assert "fetching prices" in log and "Traceback" in log
+
+
+def test_output_goes_to_the_log_unless_verbose(jobs, capfd):
+    records = by_job(train_all.train_all(["a"]))
+    out, err = capfd.readouterr()
+    assert "training with alpha=1" not in out and "a warning" not in err
+    with open(records["a"]["log"]) as f:
+        assert f.read().splitlines()[:2] == ["training with alpha=1", "a warning"]
+
+    train_all.train_all(["a"], verbose=True)
+    out, err = capfd.readouterr()
+    assert "training with alpha=1" in out and "a warning" in err
+
+
+def test_unknown_job_module_fails_that_job(jobs, monkeypatch):
+    monkeypatch.setitem(train_all.JOBS, "e", ("no_such_module", "train"))
+    record = by_job(train_all.train_all(["e"]))["e"]
+
+    assert record["status"] == "failed"
+    assert record["error"].startswith("ModuleNotFoundError")
+    assert record["import_seconds"] is None
+
+
+def test_banknote_option_picks_the_script(jobs, monkeypatch):
+    monkeypatch.setitem(train_all.JOBS, "banknote", ("fake_jobs", "nothing"))
+    monkeypatch.setattr(train_all, "BANKNOTE_MODULES", {"logistic": "no_such_module", "tree": "fake_jobs"})
+
+    assert by_job(train_all.train_all(["banknote"], banknote="tree"))["banknote"]["status"] == "done"
+    assert by_job(train_all.train_all(["banknote"]))["banknote"]["status"] == "failed"
+
+
+@pytest.mark.parametrize("only, code", [(["a", "d"], 0), (["a", "c"], 1)])
+def test_exit_status(jobs, monkeypatch, capsys, only, code):
+    monkeypatch.setattr("sys.argv", ["train_all.py", "--only", *only])
+
+    with pytest.raises(SystemExit) as exit_info:
+        train_all.main()
+    assert exit_info.value.code == code
+    assert "All jobs finished" in capsys.readouterr().out
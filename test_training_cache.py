@@ -0,0 +1,172 @@
+"""
+Training cache: training_cache.py.
+
+Run with:  python -m pytest test_training_cache.py
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import training_cache
+from training_cache import TrainingRun, fingerprint, prune_runs, stage
+
+builds = []
+
+
+def split(values, ratio=0.5):
+    builds.append("split")
+    cut = int(len(values) * ratio)
+    return np.asarray(values[:cut]), pd.Series(values[cut:], name="rest")
+
+
+def split_differently(values, ratio=0.5):
+    builds.append("split_differently")
+    cut = int(len(values) * (1 - ratio))
+    return np.asarray(values[:cut]), pd.Series(values[cut:], name="rest")
+
+
+def frame(n):
+    builds.append("frame")
+    return pd.DataFrame({"a": range(n), "b": [float(i) / 2 for i in range(n)]})
+
+
+@pytest.fixture
+def files(tmp_path):
+    code = tmp_path / "train.py"
+    data = tmp_path / "data.csv"
+    code.write_text("MODEL = 'ridge'\n")
+    data.write_text("x,y\n1,2\n")
+    return code, data, tmp_path / "cache"
+
+
+def run_of(files, params=None):
+    code, data, cache_dir = files
+    return TrainingRun("run", code=[str(code)], data=[str(data)], params=params or {"alpha": 1}, cache_dir=str(cache_dir))
+
+
+@pytest.fixture(autouse=True)
+def clear_builds():
+    builds.clear()
+
+
+def test_key_does_not_depend_on_the_working_directory(monkeypatch, tmp_path):
+    monkeypatch.chdir(training_cache.REPO_ROOT)
+    from_root = fingerprint("run", code=["training_cache.py"], params={"alpha": 1})
+    monkeypatch.chdir(tmp_path)
+    elsewhere = fingerprint("run", code=[os.path.join(training_cache.REPO_ROOT, "training_cache.py")],
+                            params={"alpha": 1})
+    assert elsewhere == from_root
+
+
+# ================================
+# Training Runs
+# ================================
+def test_finished_run_is_a_cache_hit(files):
+    run = run_of(files)
+    assert not run.is_cached()
+    run.save({"model": {"coef": [1, 2]}}, metrics={"r2": 0.5})
+
+    again = run_of(files)
+    assert again.version == run.version and again.is_cached()
+    assert again.load("model") == {"coef": [1, 2]}
+    manifest = again.manifest()
+    assert manifest["artifacts"] == ["model"] and manifest["metrics"] == {"r2": 0.5}
+
+
+@pytest.mark.parametrize("change", ["code", "data", "params"])
+def test_changed_inputs_miss_the_cache(files, change):
+    code, data, _ = files
+    run_of(files).save({"model": 1})
+
+    if change == "code":
+        code.write_text("MODEL = 'lasso'\n")
+    elif change == "data":
+        data.write_text("x,y\n1,3\n")
+    run = run_of(files, {"alpha": 2} if change == "params" else None)
+    assert not run.is_cached()
+
+
+def test_missing_artifact_misses_the_cache(files):
+    run = run_of(files)
+    run.save({"model": 1, "transformer": 2})
+    os.remove(run.artifact_path("transformer"))
+    assert not run_of(files).is_cached()
+
+
+def test_force_retrain_ignores_finished_runs(files, monkeypatch):
+    run_of(files).save({"model": 1})
+    monkeypatch.setattr(training_cache, "FORCE_RETRAIN", True)
+    assert not run_of(files).is_cached()
+
+
+def test_publish_keeps_unchanged_files_untouched(files, tmp_path):
+    run = run_of(files)
+    run.save({"model": {"coef": 1}})
+    target = tmp_path / "serve" / "model.joblib"
+
+    run.publish({str(target): "model"})
+    os.utime(target, (0, 0))
+    run.publish({str(target): "model"})
+    assert target.stat().st_mtime == 0
+
+    other = run_of(files, {"alpha": 2})
+    other.save({"model": {"coef": 2}})
+    other.publish({str(target): "model"})
+    assert target.stat().st_mtime > 0
+    with open(files[2] / "published.json") as f:
+        assert json.load(f)[str(target)]["version"] == other.version
+
+
+def test_prune_keeps_newest_and_published_runs(files, tmp_path):
+    runs = [run_of(files, {"alpha": alpha}) for alpha in range(4)]
+    for i, run in enumerate(runs):
+        run.save({"model": i})
+        os.utime(run.manifest_path, (i, i))
+    runs[0].publish({str(tmp_path / "model.joblib"): "model"})
+
+    assert prune_runs("run", keep=1, cache_dir=str(files[2])) == 2
+    assert [run.is_cached() for run in runs] == [True, False, False, True]
+    assert not os.path.exists(runs[1].artifact_path("model"))
+
+
+# ================================
+# Stages
+# ================================
+def test_stage_hit_skips_the_build(tmp_path):
+    first = stage("split", split, list(range(10)), cache_dir=str(tmp_path))
+    second = stage("split", split, list(range(10)), cache_dir=str(tmp_path))
+
+    assert builds == ["split"]
+    np.testing.assert_array_equal(second[0], first[0])
+    pd.testing.assert_series_equal(second[1], first[1])
+
+
+def test_stage_rebuilds_for_new_arguments_or_code(tmp_path):
+    stage("split", split, list(range(10)), cache_dir=str(tmp_path))
+    stage("split", split, list(range(10)), ratio=0.3, cache_dir=str(tmp_path))
+    stage("split", split, list(range(12)), cache_dir=str(tmp_path))
+    stage("split", split_differently, list(range(10)), cache_dir=str(tmp_path))
+
+    assert builds == ["split", "split", "split", "split_differently"]
+
+
+def test_stage_returns_a_single_value_as_built(tmp_path):
+    built = stage("frame", frame, 5, cache_dir=str(tmp_path))
+    cached = stage("frame", frame, 5, cache_dir=str(tmp_path))
+
+    assert builds == ["frame"]
+    assert isinstance(cached, pd.DataFrame)
+    pd.testing.assert_frame_equal(cached, built)
+
+
+def test_force_retrain_rebuilds_stages(tmp_path, monkeypatch):
+    stage("frame", frame, 5, cache_dir=str(tmp_path))
+    monkeypatch.setattr(training_cache, "FORCE_RETRAIN", True)
+    stage("frame", frame, 5, cache_dir=str(tmp_path))
+    monkeypatch.setattr(training_cache, "FORCE_RETRAIN", False)
+    stage("frame", frame, 5, cache_dir=str(tmp_path))
+
+    assert builds == ["frame", "frame"]
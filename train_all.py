@@ -0,0 +1,160 @@
+"""
+Train every model in one command, each as an independent job on a process pool.
+
+    python train_all.py                       # diabetes, banknote, breastcancer, bitcoin
+    python train_all.py --only diabetes breastcancer --strategy halving
+    python train_all.py --banknote tree --verbose
+
+Jobs run headless: nothing is plotted, and everything a training script
+prints goes to training_cache/logs/<job>.log instead of the terminal
+(--verbose prints it as it happens). Each job runs in a fresh process, so
+its CPU time and peak memory are its own.
+
+The jobs are the existing training scripts, so they keep their caching
+(see training_cache.py): an unchanged job only republishes its artifacts,
+and every artifact is written to a temporary file and renamed into place.
+A failing job (bitcoin needs network access for yfinance, unless
+--bitcoin-feed points it at a CSV of bars) does not stop the others; the
+exit status is 1 if any job failed.
+
+A summary table is printed at the end and saved to training_cache/train_all.json.
+"""
+import argparse
+import contextlib
+import importlib
+import os
+import resource
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from training_cache import TRAINING_CACHE_DIR, write_json
+
+# job: (module, function); keyword arguments are added in job_kwargs
+JOBS = {
+    "diabetes": ("model", "train_model"),
+    "banknote": ("banknotemode", "train_and_test_data"),
+    "breastcancer": ("Breastcanacerwithdescisiontree", "main"),
+    "bitcoin": ("bitcoinmodel", "train"),
+}
+
+BANKNOTE_MODULES = {"logistic": "banknotemode", "tree": "banknotewithdesciosntree"}
+
+
+def job_kwargs(name, strategy, bitcoin_feed=None):
+    if name == "diabetes":
+        return {"strategy": strategy}
+    if name == "breastcancer":
+        return {"strategy": strategy, "show_plots": False}
+    if name == "bitcoin" and bitcoin_feed:
+        from bar_store import CsvFeed
+
+        return {"feed": CsvFeed(bitcoin_feed)}
+    return {}
+
+
+def run_job(name, module_name, function_name, kwargs, verbose=False):
+    """Run one training function in this (fresh) process; returns its timing record."""
+    # Anything that still draws a figure renders off screen
+    os.environ["MPLBACKEND"] = "Agg"
+    log_dir = os.path.join(TRAINING_CACHE_DIR, "logs")
+    os.makedirs(log_dir, exist_ok=True)
+    log_path = os.path.join(log_dir, f"{name}.log")
+
+    start = time.perf_counter()
+    started_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+    record = {"job": name, "module": module_name, "log": log_path}
+    import_seconds = None
+    run = None
+    with open(log_path, "w") as log, contextlib.ExitStack() as output:
+        if not verbose:
+            output.enter_context(contextlib.redirect_stdout(log))
+            output.enter_context(contextlib.redirect_stderr(log))
+        try:
+            module = importlib.import_module(module_name)
+            import_seconds = time.perf_counter() - start
+            run = getattr(module, function_name)(**kwargs)
+        except BaseException as e:
+            traceback.print_exc()
+            record.update(status="failed", error=f"{type(e).__name__}: {e}")
+
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    record["wall_seconds"] = round(time.perf_counter() - start, 3)
+    record["import_seconds"] = round(import_seconds, 3) if import_seconds is not None else None
+    record["cpu_seconds"] = round(usage.ru_utime + usage.ru_stime, 3)
+    record["peak_rss_mb"] = round(usage.ru_maxrss / 1024, 1)  # ru_maxrss is in KiB on Linux
+    if run is not None:
+        manifest = run.manifest() or {}
+        # A manifest older than this job means the run was reused, not trained
+        reused = manifest.get("created", started_at) < started_at
+        record.update(status="cached" if reused else "trained", version=run.version,
+                      metrics=manifest.get("metrics", {}))
+    elif "status" not in record:
+        record["status"] = "done"  # nothing to train, e.g. no new bitcoin bars
+    return record
+
+
+def run_job_in_fresh_process(name, module_name, function_name, kwargs, verbose=False):
+    # A pool of one per job rather than max_tasks_per_child=1, which needs Python 3.11
+    with ProcessPoolExecutor(1) as pool:
+        return pool.submit(run_job, name, module_name, function_name, kwargs, verbose).result()
+
+
+def train_all(names, strategy="grid", banknote="logistic", workers=None, verbose=False, bitcoin_feed=None):
+    jobs = {}
+    for name in names:
+        module_name, function_name = JOBS[name]
+        if name == "banknote":
+            module_name = BANKNOTE_MODULES[banknote]
+        jobs[name] = (module_name, function_name, job_kwargs(name, strategy, bitcoin_feed))
+
+    start = time.perf_counter()
+    records = {}
+    # One process per job: no module state is shared and peak memory is per job.
+    # `workers` threads each wait on one job's process.
+    with ThreadPoolExecutor(workers or len(jobs)) as pool:
+        futures = {pool.submit(run_job_in_fresh_process, name, *job, verbose): name for name, job in jobs.items()}
+        for future in as_completed(futures):
+            record = future.result()
+            records[record["job"]] = record
+            print(f"{record['job']:13s} {record['status']:8s} {record['wall_seconds']:7.2f}s", file=sys.stderr)
+
+    summary = {
+        "wall_seconds": round(time.perf_counter() - start, 3),
+        "jobs": [records[name] for name in names],
+    }
+    write_json(os.path.join(TRAINING_CACHE_DIR, "train_all.json"), summary)
+    return summary
+
+
+def print_summary(summary):
+    print(f"\n{'job':13s} {'status':8s} {'wall s':>7s} {'import s':>8s} {'cpu s':>7s} {'peak MB':>8s}  version")
+    for record in summary["jobs"]:
+        import_seconds = record["import_seconds"]
+        print(f"{record['job']:13s} {record['status']:8s} {record['wall_seconds']:7.2f} "
+              f"{import_seconds if import_seconds is not None else float('nan'):8.2f} "
+              f"{record['cpu_seconds']:7.2f} {record['peak_rss_mb']:8.1f}  "
+              f"{record.get('version') or record.get('error', '')}")
+    print(f"\nAll jobs finished in {summary['wall_seconds']:.2f}s; logs in {os.path.join(TRAINING_CACHE_DIR, 'logs')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=list(JOBS), default=list(JOBS), help="jobs to run")
+    parser.add_argument("--strategy", choices=("grid", "halving"), default="grid",
+                        help="hyperparameter search strategy of the diabetes and breast cancer jobs")
+    parser.add_argument("--banknote", choices=list(BANKNOTE_MODULES), default="logistic",
+                        help="which banknote script publishes the served model")
+    parser.add_argument("--bitcoin-feed", metavar="CSV", help="update the bitcoin model from a CSV of bars, not Yahoo")
+    parser.add_argument("--workers", type=int, default=None, help="parallel jobs (default: one per job)")
+    parser.add_argument("--verbose", action="store_true", help="print the scripts' output instead of logging it")
+    args = parser.parse_args()
+
+    summary = train_all(args.only, args.strategy, args.banknote, args.workers, args.verbose, args.bitcoin_feed)
+    print_summary(summary)
+    sys.exit(1 if any(record["status"] == "failed" for record in summary["jobs"]) else 0)
+
+
+if __name__ == "__main__":
+    main()
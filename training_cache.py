@@ -0,0 +1,281 @@
+"""
+Content-addressed cache for the training scripts.
+
+A training run is identified by a key hashed from everything that decides
+its result:
+- the bytes of its code files (the script and the repo modules it uses)
+- the bytes of its data files (bundled sklearn datasets are covered by the
+  sklearn version, which is part of every key)
+- its hyperparameters
+- the numpy / pandas / sklearn versions
+
+When a run with the same key has finished before, the script skips loading,
+preprocessing and fitting and only republishes the stored artifacts:
+
+    run = TrainingRun("banknote_logistic", code=[__file__], data=["bank_note_authentication.csv"], params=params)
+    if not run.is_cached():
+        ...
+        run.save({"model": model, "transformer": pt}, metrics={"accuracy": accuracy})
+    run.publish({"bank_note_authentication_model.joblib": "model", "power_transformer.joblib": "transformer"})
+
+Artifacts are stored under collision-free versioned names,
+training_cache/artifacts/<run>-<key>-<artifact>.joblib, so two scripts that
+produce the same serving file (both banknote scripts write
+bank_note_authentication_model.joblib) never overwrite each other's results.
+publish() copies one version to the path app.py loads, atomically, and
+records which run it came from in training_cache/published.json.
+
+Intermediate results can be cached on their own with stage(): arrays are
+stored as .npy, DataFrames / Series as Parquet (when pyarrow is installed)
+and anything else with joblib, keyed by the source of the function that
+built them and its arguments. Stages are shared between runs, e.g. the two
+banknote scripts split and transform the data the same way.
+
+Set FORCE_RETRAIN=1 to ignore finished runs and stages (results are still
+stored), and TRAINING_CACHE_DIR to move the cache.
+"""
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+TRAINING_CACHE_DIR = os.environ.get("TRAINING_CACHE_DIR", "training_cache")
+FORCE_RETRAIN = os.environ.get("FORCE_RETRAIN") == "1"
+
+KEY_LENGTH = 12
+# Code and data files are keyed by their path inside the repository, so the
+# key does not depend on the directory a script is run from
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def _library_versions():
+    # Read from the package metadata, so checking the cache does not import sklearn
+    from importlib.metadata import version
+
+    return {"numpy": np.__version__, "pandas": pd.__version__, "sklearn": version("scikit-learn")}
+
+
+def _function_source(function):
+    try:
+        return inspect.getsource(function)
+    except (OSError, TypeError):
+        # Defined interactively: fall back to its bytecode and constants
+        code = function.__code__
+        return code.co_code + repr(code.co_consts).encode()
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def fingerprint(name, code=(), data=(), params=None):
+    """Cache key of a run: hex digest over name, code and data files, params and library versions."""
+    digest = hashlib.sha256()
+    digest.update(f"{name}\0".encode())
+    for kind, paths in (("code", code), ("data", data)):
+        for path in paths:
+            # Relative to the repo root, so a checkout elsewhere (or another working
+            # directory) gives the same key
+            name_in_repo = os.path.relpath(os.path.abspath(path), REPO_ROOT).replace(os.sep, "/")
+            digest.update(f"{kind}:{name_in_repo}:{file_digest(path)}\0".encode())
+    # joblib.hash covers arrays, DataFrames and estimators given as parameters
+    digest.update(joblib.hash(params).encode())
+    digest.update(json.dumps(_library_versions(), sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def write_json(path, data):
+    """Write JSON through a temporary file so readers never see a partial file."""
+    directory = os.path.dirname(path) or "."
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _read_json(path, default=None):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+
+# ================================
+# Stage Outputs
+# ================================
+def _save_value(directory, index, value):
+    """Store one output of a stage; returns its manifest entry."""
+    if isinstance(value, np.ndarray) and not value.dtype.hasobject:
+        path = f"{index}.npy"
+        np.save(os.path.join(directory, path), value, allow_pickle=False)
+        return {"file": path, "kind": "npy"}
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        frame = value.to_frame() if isinstance(value, pd.Series) else value
+        path = f"{index}.parquet"
+        try:
+            frame.to_parquet(os.path.join(directory, path))
+        except ImportError:
+            pass  # no parquet engine, stored with joblib below
+        else:
+            return {"file": path, "kind": "series" if isinstance(value, pd.Series) else "frame"}
+    path = f"{index}.joblib"
+    joblib.dump(value, os.path.join(directory, path))
+    return {"file": path, "kind": "joblib"}
+
+
+def _load_value(directory, entry):
+    path = os.path.join(directory, entry["file"])
+    if entry["kind"] == "npy":
+        return np.load(path, allow_pickle=False)
+    if entry["kind"] in ("frame", "series"):
+        frame = pd.read_parquet(path)
+        return frame.iloc[:, 0] if entry["kind"] == "series" else frame
+    return joblib.load(path)
+
+
+def stage(name, build, *args, cache_dir=None, **kwargs):
+    """
+    build(*args, **kwargs), cached by the source of `build` and its arguments.
+
+    `build` returns one value or a tuple of values; the same shape is returned
+    on a cache hit.
+    """
+    cache_dir = cache_dir or TRAINING_CACHE_DIR
+    key = fingerprint(name, params=(_function_source(build), args, kwargs))[:KEY_LENGTH]
+    directory = os.path.join(cache_dir, "stages", f"{name}-{key}")
+    manifest = _read_json(os.path.join(directory, "manifest.json"))
+
+    if manifest is not None and not FORCE_RETRAIN:
+        values = tuple(_load_value(directory, entry) for entry in manifest["outputs"])
+        return values if manifest["tuple"] else values[0]
+
+    result = build(*args, **kwargs)
+    values = result if isinstance(result, tuple) else (result,)
+    os.makedirs(os.path.dirname(directory), exist_ok=True)
+    # Written to a temporary directory and renamed, so a stage is complete or absent
+    tmp = tempfile.mkdtemp(dir=os.path.dirname(directory), prefix=f".{name}-")
+    outputs = [_save_value(tmp, i, value) for i, value in enumerate(values)]
+    write_json(os.path.join(tmp, "manifest.json"), {"tuple": isinstance(result, tuple), "outputs": outputs})
+    shutil.rmtree(directory, ignore_errors=True)
+    try:
+        os.replace(tmp, directory)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)  # a concurrent run stored the same stage
+    return result
+
+
+# ================================
+# Training Runs
+# ================================
+class TrainingRun:
+    def __init__(self, name, code=(), data=(), params=None, cache_dir=None):
+        self.name = name
+        self.cache_dir = cache_dir or TRAINING_CACHE_DIR
+        self.key = fingerprint(name, code, data, params)
+        self.version = f"{name}-{self.key[:KEY_LENGTH]}"
+        self.manifest_path = os.path.join(self.cache_dir, "runs", f"{self.version}.json")
+        self.artifact_dir = os.path.join(self.cache_dir, "artifacts")
+
+    def artifact_path(self, artifact):
+        return os.path.join(self.artifact_dir, f"{self.version}-{artifact}.joblib")
+
+    def manifest(self):
+        return _read_json(self.manifest_path)
+
+    def is_cached(self):
+        """True when an identical run finished before and all of its artifacts are still there."""
+        if FORCE_RETRAIN:
+            return False
+        manifest = self.manifest()
+        return manifest is not None and all(
+            os.path.exists(self.artifact_path(artifact)) for artifact in manifest["artifacts"]
+        )
+
+    def load(self, artifact):
+        return joblib.load(self.artifact_path(artifact))
+
+    def save(self, artifacts, metrics=None):
+        """Store {artifact name: object} under this run's version; the manifest is written last."""
+        start = time.perf_counter()
+        os.makedirs(self.artifact_dir, exist_ok=True)
+        os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+        for artifact, value in artifacts.items():
+            path = self.artifact_path(artifact)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            joblib.dump(value, tmp)
+            os.replace(tmp, path)
+        write_json(self.manifest_path, {
+            "run": self.name,
+            "version": self.version,
+            "key": self.key,
+            "artifacts": sorted(artifacts),
+            "metrics": metrics or {},
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "save_seconds": round(time.perf_counter() - start, 3),
+        })
+
+    def publish(self, targets):
+        """
+        Copy artifacts to the paths app.py loads, {serving path: artifact name}.
+
+        Each file is replaced atomically, and left untouched when it already
+        holds the same bytes, so its mtime (and the model version app.py
+        derives from it) only changes when the model does.
+        """
+        import fcntl
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        published_path = os.path.join(self.cache_dir, "published.json")
+        # Runs publishing at the same time (train_all.py) would otherwise lose
+        # each other's entries in published.json
+        with open(os.path.join(self.cache_dir, ".publish.lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            published = _read_json(published_path, {})
+            for target, artifact in targets.items():
+                source = self.artifact_path(artifact)
+                if not (os.path.exists(target) and file_digest(target) == file_digest(source)):
+                    os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+                    tmp = f"{target}.{os.getpid()}.tmp"
+                    shutil.copyfile(source, tmp)  # a fresh mtime, so compiled exports are seen as stale
+                    os.replace(tmp, target)
+                published[target] = {"run": self.name, "version": self.version, "artifact": source}
+            write_json(published_path, published)
+
+
+def prune_runs(name, keep, cache_dir=None):
+    """Delete all but the newest `keep` versions of a run; published versions are kept."""
+    cache_dir = cache_dir or TRAINING_CACHE_DIR
+    runs_dir = os.path.join(cache_dir, "runs")
+    published = {entry["version"] for entry in _read_json(os.path.join(cache_dir, "published.json"), {}).values()}
+    manifests = sorted(
+        (path for path in (os.path.join(runs_dir, f) for f in os.listdir(runs_dir))
+         if os.path.basename(path).startswith(f"{name}-") and path.endswith(".json")),
+        key=os.path.getmtime,
+        reverse=True,
+    ) if os.path.isdir(runs_dir) else []
+
+    removed = 0
+    for path in manifests[keep:]:
+        manifest = _read_json(path)
+        if manifest is None or manifest["run"] != name or manifest["version"] in published:
+            continue
+        os.remove(path)  # the manifest first, so a half-pruned run is never seen as cached
+        for artifact in manifest["artifacts"]:
+            try:
+                os.remove(os.path.join(cache_dir, "artifacts", f"{manifest['version']}-{artifact}.joblib"))
+            except FileNotFoundError:
+                pass
+        removed += 1
+    return removed
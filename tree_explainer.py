@@ -0,0 +1,102 @@
+"""
+Per-prediction explanations for the tree models served by app.py.
+
+A decision tree predicts the value of the leaf a row lands in. Along the
+row's decision path every split moves the value from the parent node's to
+the child's, and that change is credited to the feature the split tested, so
+for every row
+
+    prediction = base value (the root's) + sum of the feature contributions
+
+(averaged over the trees of a forest). None of this depends on the row
+beyond the leaf it reaches, so it is all computed when the explainer is
+built with the model: each node's parent, the contributions accumulated from
+the root down to it (n_nodes x n_features x n_values, meant for single trees
+and small forests), and the split thresholds in the units of the raw inputs.
+Explaining a batch is then the same vectorized walk as predicting it
+(TreeEnsembleKernel.apply) plus one gather.
+
+    explainer = TreeExplainer(tree_kernel(model), feature_names, transformer)
+    leaves, contributions = explainer.explain(X)
+"""
+import numpy as np
+
+from inference import TreeEnsembleKernel, compile_trees
+
+
+def tree_kernel(model):
+    """Node arrays of a served tree model: compiled (CompiledModel / kernel) or sklearn."""
+    kernel = getattr(model, "kernel", model)
+    return kernel if isinstance(kernel, TreeEnsembleKernel) else compile_trees(kernel)
+
+
+class TreeExplainer:
+    def __init__(self, kernel, feature_names, transformer=None):
+        self.kernel = kernel
+        self.feature_names = list(feature_names)
+        self.transformer = transformer
+
+        node_ids = np.arange(len(kernel.left))
+        is_split = kernel.left != node_ids
+        self.parent = node_ids.copy()  # roots are their own parent
+        self.parent[kernel.left[is_split]] = node_ids[is_split]
+        self.parent[kernel.right[is_split]] = node_ids[is_split]
+
+        values = np.asarray(kernel.values, dtype=np.float64)
+        self.base_value = values[kernel.roots].mean(axis=0)
+
+        # Contributions accumulated from the root to every node, filled one
+        # level at a time: a child adds its value change to its parent's split feature
+        self.node_contributions = np.zeros((len(node_ids), len(self.feature_names), values.shape[1]))
+        frontier = kernel.roots[is_split[kernel.roots]]
+        while frontier.size:
+            parents = np.concatenate([frontier, frontier])
+            children = np.concatenate([kernel.left[frontier], kernel.right[frontier]])
+            self.node_contributions[children] = self.node_contributions[parents]
+            self.node_contributions[children, kernel.feature[parents]] += values[children] - values[parents]
+            frontier = children[is_split[children]]
+
+        # The transform is monotonic per feature, so a split on a transformed
+        # feature is the same split on the raw one at the inverse threshold
+        self.raw_threshold = np.asarray(kernel.threshold, dtype=np.float64).copy()
+        if transformer is not None and is_split.any():
+            split_nodes = node_ids[is_split]
+            columns = kernel.feature[split_nodes]
+            grid = np.zeros((len(split_nodes), len(self.feature_names)))
+            grid[np.arange(len(split_nodes)), columns] = kernel.threshold[split_nodes]
+            raw = transformer.inverse_transform(grid)
+            self.raw_threshold[split_nodes] = raw[np.arange(len(split_nodes)), columns]
+
+    def explain(self, X, transformed=False):
+        """
+        Leaves (n_rows, n_trees) and per-feature contributions of the raw rows X
+        (or of rows already passed through the transformer, with transformed=True).
+
+        Contributions have shape (n_rows, n_features, n_values): one column
+        per class probability (or regression output), summing with base_value
+        to the prediction.
+        """
+        if self.transformer is not None and not transformed:
+            X = self.transformer.transform(X)
+        leaves = self.kernel.apply(X)
+        contributions = self.node_contributions[leaves]
+        if leaves.shape[1] == 1:
+            return leaves, contributions[:, 0]
+        return leaves, contributions.mean(axis=1)
+
+    def decision_path(self, leaf, raw_row):
+        """The splits from the root to `leaf`, as dicts in the units of the raw row."""
+        steps = []
+        child = int(leaf)
+        while self.parent[child] != child:
+            node = int(self.parent[child])
+            feature = int(self.kernel.feature[node])
+            steps.append({
+                "node": node,
+                "feature": self.feature_names[feature],
+                "value": float(raw_row[feature]),
+                "threshold": float(self.raw_threshold[node]),
+                "direction": "<=" if child == self.kernel.left[node] else ">",
+            })
+            child = node
+        return steps[::-1]